@@ -0,0 +1,162 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# benchmarks/bench_conversations.py
+# End-to-end conversation benchmark on the offline stub model.
+# Drives complete intake -> symptom -> scribe conversations through the real
+# routing logic, Runners, session DB and MCP history server.
+#
+#   python -m benchmarks.bench_conversations --conversations 50 --concurrency 10 --latency-ms 200
+#   python -m benchmarks.bench_conversations --output results.json --baseline last.json
+import argparse
+import asyncio
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.common import print_report, summarize_ms
+
+PATIENT_IDS = ["PT-1001", "PT-1002", "PT-1003", "PT-1004", "PT-1005"]
+
+PATIENT_TURNS = [
+    "I have had a throbbing headache",
+    "It started two days ago, quite suddenly",
+    "It's a throbbing pain behind my eyes",
+    "About a 6 out of 10",
+    "Bright light makes it worse, it doesn't move anywhere",
+    "A little nausea, no vision changes",
+    "I took ibuprofen, no new allergies",
+    "No, that's everything",
+]
+
+# Metrics compared against --baseline; direction says which way is worse
+REGRESSION_CHECKS = [("turns_per_sec", "lower"), ("agent_turn_p95_ms", "higher")]
+
+
+async def run_conversation(service, index: int, turn_latencies: list) -> int:
+    patient_id = PATIENT_IDS[index % len(PATIENT_IDS)]
+    conv, _ = await service.start_conversation(f"bench_user_{index}")
+    turns = 1
+    for text in [patient_id] + PATIENT_TURNS:
+        started = time.perf_counter()
+        await service.handle_input(conv, text)
+        turn_latencies.append(time.perf_counter() - started)
+        turns += 1
+        if conv.done:
+            break
+    if not conv.done:
+        raise RuntimeError(f"Conversation {index} did not reach SUMMARY_COMPLETE")
+    return turns
+
+
+def sandbox_environment(work_dir: str) -> None:
+    """Points every file the service writes (sessions aside) into work_dir, away from the real stores."""
+    os.environ["MEDISCREEN_NOTE_DB"] = os.path.join(work_dir, "soap_notes.db")
+    os.environ["MEDISCREEN_LOG_DIR"] = os.path.join(work_dir, "logs")
+    os.environ["MEDISCREEN_TRANSCRIPT_DIR"] = os.path.join(work_dir, "logs", "transcripts")
+    os.environ["MEDISCREEN_SESSION_ARCHIVE_DIR"] = os.path.join(work_dir, "logs", "session_archive")
+
+
+async def run_benchmark(conversations: int, concurrency: int, db_dir: str):
+    # Imported late so the MEDISCREEN_* environment set by main() is picked up
+    from src.orchestrator import open_service
+
+    tracemalloc.start()
+    turn_latencies = []
+    async with open_service(db_url=f"sqlite:///{os.path.join(db_dir, 'bench.db')}") as service:
+        gate = asyncio.Semaphore(concurrency)
+
+        async def bounded(i):
+            async with gate:
+                return await run_conversation(service, i, turn_latencies)
+
+        started = time.perf_counter()
+        turns = sum(await asyncio.gather(*(bounded(i) for i in range(conversations))))
+        elapsed = time.perf_counter() - started
+        latency = service.tracer.metrics.snapshot()
+
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "conversations": conversations,
+        "concurrency": concurrency,
+        "turns": turns,
+        "elapsed_s": round(elapsed, 3),
+        "turns_per_sec": round(turns / elapsed, 2),
+        "conversations_per_sec": round(conversations / elapsed, 2),
+        "patient_turn": summarize_ms(turn_latencies),
+        "agent_turn_p95_ms": max((row["p95_ms"] for row in latency.get("agent_turn", [])), default=0.0),
+        "stages": latency,
+        "memory": {
+            "python_peak_mb": round(peak / 1e6, 2),
+            "max_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 2),
+        },
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float) -> list:
+    """Returns human-readable regressions beyond `tolerance` (fraction) versus the baseline."""
+    regressions = []
+    for key, worse in REGRESSION_CHECKS:
+        old, new = baseline.get(key), report.get(key)
+        if not old or new is None:
+            continue
+        change = (new - old) / old
+        if (worse == "lower" and change < -tolerance) or (worse == "higher" and change > tolerance):
+            regressions.append(f"{key}: {old} -> {new} ({change:+.1%})")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Offline end-to-end conversation benchmark")
+    parser.add_argument("--conversations", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Stub model latency per call")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Stub model latency jitter")
+    parser.add_argument("--output", help="Write the report as JSON (to track over time)")
+    parser.add_argument("--baseline", help="Previous --output file; exit 1 on regression")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression fraction")
+    args = parser.parse_args(argv)
+
+    os.environ["MEDISCREEN_MODEL_BACKEND"] = "stub"
+    os.environ["MEDISCREEN_STUB_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["MEDISCREEN_STUB_JITTER_MS"] = str(args.jitter_ms)
+    # Stub notes filed under real roster IDs must never reach the production note store
+    work_dir = tempfile.mkdtemp(prefix="mediscreen_bench_")
+    sandbox_environment(work_dir)
+
+    report = asyncio.run(run_benchmark(args.conversations, args.concurrency, work_dir))
+    print_report("conversation benchmark (stub model)", report)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        if regressions:
+            print("\nREGRESSIONS:\n  " + "\n  ".join(regressions))
+            sys.exit(1)
+        print("\nNo regressions versus baseline.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# benchmarks/bench_history_load.py
+# Load test for the history server: N concurrent MCP clients call
+# get_patient_history against one shared server for a fixed duration.
+# Reports throughput, latency percentiles, the server's startup/index time
+# and its resident memory (sampled while under load).
+#
+#   python -m benchmarks.generate_patients --patients 1000000 --shards 16 --output data/synthetic_1m/
+#   python -m benchmarks.bench_history_load --data data/synthetic_1m --patients 1000000 --clients 32 --duration 30
+#   python -m benchmarks.bench_history_load --url http://127.0.0.1:8766/mcp --pid 4242 --patients 5   (running server)
+import argparse
+import asyncio
+import os
+import random
+import resource
+import time
+from typing import Dict, List, Optional
+
+from mcp import ClientSession
+
+from benchmarks.common import print_report, start_http_history_server, summarize_ms, wait_for_port
+from benchmarks.generate_patients import patient_id
+from src.mcp_pool import history_transport
+
+
+def rss_mb(pid: int) -> Optional[float]:
+    """Resident set size of a process in MB (Linux /proc, else psutil if installed)."""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    try:
+        import psutil
+        return round(psutil.Process(pid).memory_info().rss / (1024 * 1024), 1)
+    except Exception:
+        return None
+
+
+async def client_loop(connect, deadline: float, patients: int, start: int, miss_rate: float,
+                      seed: int, latencies: List[float], counts: Dict[str, int]) -> None:
+    """One MCP session issuing get_patient_history back to back until the deadline."""
+    rng = random.Random(seed)
+    async with connect() as (read, write):
+        async with ClientSession(read, write) as session:
+            await session.initialize()
+            while time.monotonic() < deadline:
+                if rng.random() < miss_rate:
+                    pid = patient_id(patients + rng.randrange(patients), start)  # Beyond the roster
+                else:
+                    pid = patient_id(rng.randrange(patients), start)
+                t0 = time.perf_counter()
+                try:
+                    result = await session.call_tool("get_patient_history", arguments={"patient_id": pid})
+                except Exception:
+                    counts["errors"] += 1
+                    continue
+                latencies.append(time.perf_counter() - t0)
+                text = result.content[0].text if result.content else ""
+                counts["not_found" if text.startswith("Error:") else "found"] += 1
+
+
+async def sample_rss(pid: Optional[int], samples: List[float], interval: float = 0.5) -> None:
+    while pid is not None:
+        value = rss_mb(pid)
+        if value is not None:
+            samples.append(value)
+        await asyncio.sleep(interval)
+
+
+async def run_load(url: str, server_pid: Optional[int], clients: int, duration: float, patients: int,
+                   start: int, miss_rate: float) -> Dict[str, object]:
+    connect = history_transport(url=url)
+    latencies: List[float] = []
+    counts = {"found": 0, "not_found": 0, "errors": 0}
+    rss_before = rss_mb(server_pid) if server_pid else None
+    rss_samples: List[float] = []
+    sampler = asyncio.create_task(sample_rss(server_pid, rss_samples))
+
+    started = time.monotonic()
+    deadline = started + duration
+    await asyncio.gather(*(client_loop(connect, deadline, patients, start, miss_rate, seed, latencies, counts)
+                           for seed in range(clients)))
+    elapsed = time.monotonic() - started
+    sampler.cancel()
+    await asyncio.gather(sampler, return_exceptions=True)
+
+    requests = counts["found"] + counts["not_found"]
+    return {
+        "clients": clients,
+        "requests": requests,
+        **counts,
+        "throughput_rps": round(requests / elapsed, 1) if elapsed else 0.0,
+        "latency": summarize_ms(latencies),
+        "server_rss_mb": {
+            "before": rss_before,
+            "peak": max(rss_samples) if rss_samples else None,
+            "after": rss_mb(server_pid) if server_pid else None,
+        },
+        # ru_maxrss is KB on Linux
+        "client_peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+    }
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="History server load test (concurrent MCP clients)")
+    parser.add_argument("--data", help="Roster file or shard directory for the spawned server (MEDISCREEN_PATIENT_DATA)")
+    parser.add_argument("--patients", type=int, default=5, help="Size of the roster's ID space (PT-<start>..)")
+    parser.add_argument("--start", type=int, default=1001, help="First numeric Patient ID")
+    parser.add_argument("--clients", type=int, default=16, help="Concurrent MCP client sessions")
+    parser.add_argument("--duration", type=float, default=20.0, help="Seconds of load per run")
+    parser.add_argument("--miss-rate", type=float, default=0.05, help="Fraction of lookups for unknown IDs")
+    parser.add_argument("--transport", choices=["streamable-http", "sse"], default="streamable-http")
+    parser.add_argument("--port", type=int, default=8798, help="Port for the spawned server")
+    parser.add_argument("--startup-timeout", type=float, default=3600.0,
+                        help="Seconds to wait for the spawned server (the first start indexes the roster)")
+    parser.add_argument("--url", help="Load an already-running server instead of spawning one")
+    parser.add_argument("--pid", type=int, help="PID of the --url server, for RSS sampling")
+    args = parser.parse_args(argv)
+
+    server = None
+    url, server_pid = args.url, args.pid
+    if not url:
+        if args.data:
+            os.environ["MEDISCREEN_PATIENT_DATA"] = os.path.abspath(args.data)
+        started = time.perf_counter()
+        server = start_http_history_server(args.port, transport=args.transport)
+        await wait_for_port("127.0.0.1", args.port, timeout=args.startup_timeout)
+        print_report("server startup", {"seconds": round(time.perf_counter() - started, 2),
+                                        "rss_mb": rss_mb(server.pid)})
+        url = f"http://127.0.0.1:{args.port}/{'sse' if args.transport == 'sse' else 'mcp'}"
+        server_pid = server.pid
+    try:
+        report = await run_load(url, server_pid, args.clients, args.duration, args.patients,
+                                args.start, args.miss_rate)
+        print_report(f"get_patient_history load ({url})", report)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
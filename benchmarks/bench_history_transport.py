@@ -0,0 +1,82 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# benchmarks/bench_history_transport.py
+# Compares a stdio child per session against one shared HTTP history server.
+#
+#   python -m benchmarks.bench_history_transport --sessions 5 --calls 200
+#   python -m benchmarks.bench_history_transport --url http://127.0.0.1:8766/mcp   (reuse a running server)
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from mcp import ClientSession, StdioServerParameters
+
+from benchmarks.common import print_report, start_http_history_server, summarize_ms, wait_for_port
+from src.mcp_pool import history_transport
+
+PATIENT_IDS = ["PT-1001", "PT-1002", "PT-1003", "PT-1004", "PT-1005"]
+
+
+async def bench_transport(connect, sessions: int, calls: int):
+    """Opens `sessions` sequential sessions; times session startup and each call."""
+    startup, latency = [], []
+    for _ in range(sessions):
+        started = time.perf_counter()
+        async with connect() as (read, write):
+            async with ClientSession(read, write) as session:
+                await session.initialize()
+                # First call included in startup: it pays for any lazy server-side loading
+                await session.call_tool("get_patient_history", arguments={"patient_id": PATIENT_IDS[0]})
+                startup.append(time.perf_counter() - started)
+
+                for i in range(calls):
+                    t0 = time.perf_counter()
+                    await session.call_tool("get_patient_history", arguments={"patient_id": PATIENT_IDS[i % len(PATIENT_IDS)]})
+                    latency.append(time.perf_counter() - t0)
+    return {"session_startup": summarize_ms(startup), "call_latency": summarize_ms(latency)}
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="stdio vs shared HTTP history server benchmark")
+    parser.add_argument("--sessions", type=int, default=5, help="Sessions to open per transport")
+    parser.add_argument("--calls", type=int, default=200, help="Calls per session")
+    parser.add_argument("--port", type=int, default=8799, help="Port for the temporary shared server")
+    parser.add_argument("--url", help="Benchmark an already-running shared server instead of starting one")
+    args = parser.parse_args(argv)
+
+    stdio_params = StdioServerParameters(command=sys.executable, args=["-m", "servers.history_server"], env=os.environ)
+    stdio = await bench_transport(history_transport(stdio_params), args.sessions, args.calls)
+    print_report("stdio (child process per session)", stdio)
+
+    server = None
+    url = args.url
+    if not url:
+        server = start_http_history_server(args.port)
+        await wait_for_port("127.0.0.1", args.port)
+        url = f"http://127.0.0.1:{args.port}/mcp"
+    try:
+        shared = await bench_transport(history_transport(url=url), args.sessions, args.calls)
+        print_report(f"shared server ({url})", shared)
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,112 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# benchmarks/bench_session_store.py
+# Session writes per second under many concurrent conversations.
+# Each conversation does what a Runner does per turn: load the session, append
+# a few events, end the turn. Compares ADK's default DatabaseSessionService
+# with the tuned store (WAL + pool), with and without per-turn batching.
+#
+#   python -m benchmarks.bench_session_store --conversations 200 --concurrency 50 --turns 10
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import uuid
+
+from google.adk.events import Event
+from google.adk.sessions import DatabaseSessionService
+from google.genai import types
+
+from benchmarks.common import print_report, summarize_ms
+from src.metrics import MetricsRegistry
+from src.session_store import InstrumentedSessionService
+from src.utils import end_turn, get_or_create_session
+
+APP_NAME = "mediscreen_bench"
+MODES = ("default", "tuned", "tuned_batched")
+
+
+def build_service(mode: str, db_url: str):
+    if mode == "default":
+        return DatabaseSessionService(db_url=db_url)
+    return InstrumentedSessionService(db_url=db_url, metrics=MetricsRegistry(), write_behind=(mode == "tuned_batched"))
+
+
+def make_event(author: str, text: str, invocation_id: str) -> Event:
+    role = "user" if author == "user" else "model"
+    return Event(invocation_id=invocation_id, author=author,
+                 content=types.Content(role=role, parts=[types.Part(text=text)]))
+
+
+async def run_conversation(service, index: int, turns: int, events_per_turn: int, turn_latencies: list) -> int:
+    user_id, session_id = f"bench_user_{index}", str(uuid.uuid4())
+    await get_or_create_session(service, APP_NAME, user_id, session_id)
+    written = 0
+    for turn in range(turns):
+        started = time.perf_counter()
+        session = await service.get_session(app_name=APP_NAME, user_id=user_id, session_id=session_id)
+        invocation_id = f"e-{uuid.uuid4()}"
+        for i in range(events_per_turn):
+            author = "user" if i == 0 else "SymptomSpecialist"
+            await service.append_event(session, make_event(author, f"turn {turn} event {i} " + "x" * 200, invocation_id))
+            written += 1
+        end_turn(service, session_id)
+        turn_latencies.append(time.perf_counter() - started)
+    return written
+
+
+async def bench_mode(mode: str, conversations: int, concurrency: int, turns: int, events_per_turn: int):
+    db_dir = tempfile.mkdtemp(prefix=f"mediscreen_sessions_{mode}_")
+    service = build_service(mode, f"sqlite:///{os.path.join(db_dir, 'sessions.db')}")
+    gate = asyncio.Semaphore(concurrency)
+    turn_latencies = []
+
+    async def bounded(i):
+        async with gate:
+            return await run_conversation(service, i, turns, events_per_turn, turn_latencies)
+
+    started = time.perf_counter()
+    written = sum(await asyncio.gather(*(bounded(i) for i in range(conversations))))
+    if hasattr(service, "flush"):
+        await service.flush()  # Count batched writes only once they are in the DB
+    elapsed = time.perf_counter() - started
+
+    return {
+        "events_written": written,
+        "elapsed_s": round(elapsed, 3),
+        "writes_per_sec": round(written / elapsed, 1),
+        "turn": summarize_ms(turn_latencies),
+    }
+
+
+async def main(argv=None):
+    parser = argparse.ArgumentParser(description="Session store write throughput benchmark")
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--events-per-turn", type=int, default=4, help="Events a Runner appends per turn")
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=list(MODES))
+    args = parser.parse_args(argv)
+
+    report = {}
+    for mode in args.modes:
+        report[mode] = await bench_mode(mode, args.conversations, args.concurrency, args.turns, args.events_per_turn)
+    print_report(f"session store ({args.conversations} conversations, concurrency {args.concurrency})", report)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
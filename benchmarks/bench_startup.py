@@ -0,0 +1,105 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# benchmarks/bench_startup.py
+# Startup cost: an `-X importtime` profile of the entry points (in a fresh
+# interpreter each), and optionally how long a kiosk takes to attach to a
+# running daemon and receive its greeting.
+#
+#   python -m benchmarks.bench_startup                                  # src.main vs src.orchestrator
+#   python -m benchmarks.bench_startup --module src.server --top 30
+#   python -m benchmarks.bench_startup --attach 127.0.0.1:8765 --sessions 20   (after: python -m src.main --daemon)
+import argparse
+import asyncio
+import json
+import re
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List, Tuple
+
+from benchmarks.common import print_report, summarize_ms
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)")
+
+
+def import_profile(module: str) -> List[Tuple[str, int, int, int]]:
+    """(module, self_us, cumulative_us, depth) for every import triggered by `import module`."""
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((name, int(self_us), int(cumulative_us), (len(indent) - 1) // 2))
+    return rows
+
+
+def summarize_profile(rows: List[Tuple[str, int, int, int]], top: int) -> Dict[str, object]:
+    by_package: Dict[str, int] = defaultdict(int)
+    for name, self_us, _, _ in rows:
+        by_package[name.split(".")[0]] += self_us
+    slowest = sorted(rows, key=lambda row: row[2], reverse=True)[:top]
+    packages = sorted(by_package.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "total_ms": round(sum(self_us for _, self_us, _, _ in rows) / 1000, 1),
+        "modules": len(rows),
+        "slowest_cumulative_ms": {name: round(cumulative_us / 1000, 1) for name, _, cumulative_us, _ in slowest},
+        "by_package_ms": {package: round(self_us / 1000, 1) for package, self_us in packages},
+    }
+
+
+async def attach_once(host: str, port: int) -> float:
+    """Connect, start a conversation and wait for the greeting's turn_end."""
+    started = time.perf_counter()
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write((json.dumps({"type": "start", "user_id": "bench_kiosk"}) + "\n").encode("utf-8"))
+        await writer.drain()
+        while True:
+            line = await reader.readline()
+            if not line or json.loads(line).get("type") == "turn_end":
+                break
+        return time.perf_counter() - started
+    finally:
+        writer.close()
+
+
+async def bench_attach(address: str, sessions: int) -> Dict[str, object]:
+    host, _, port = address.rpartition(":")
+    samples = [await attach_once(host or "127.0.0.1", int(port)) for _ in range(sessions)]
+    return {"attach_to_greeting": summarize_ms(samples)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Import-time profile and daemon attach latency")
+    parser.add_argument("--module", action="append", help="Module to profile (repeatable; default: src.main, src.orchestrator)")
+    parser.add_argument("--top", type=int, default=15, help="Rows per table")
+    parser.add_argument("--attach", metavar="HOST:PORT", help="Also time kiosk sessions against a running daemon")
+    parser.add_argument("--sessions", type=int, default=10, help="Sessions to open with --attach")
+    args = parser.parse_args(argv)
+
+    for module in args.module or ["src.main", "src.orchestrator"]:
+        print_report(f"import {module}", summarize_profile(import_profile(module), args.top))
+    if args.attach:
+        print_report(f"attach to daemon at {args.attach}", asyncio.run(bench_attach(args.attach, args.sessions)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# benchmarks/common.py
+# Small helpers shared by the benchmark scripts.
+import asyncio
+import json
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Sequence
+
+
+def percentile(samples: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile (pct in 0..100) of an unsorted sample list."""
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def summarize_ms(samples: Sequence[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds for samples given in seconds."""
+    return {
+        "count": len(samples),
+        "mean_ms": round(1000 * sum(samples) / len(samples), 3) if samples else 0.0,
+        "p50_ms": round(1000 * percentile(samples, 50), 3),
+        "p95_ms": round(1000 * percentile(samples, 95), 3),
+        "p99_ms": round(1000 * percentile(samples, 99), 3),
+    }
+
+
+def start_http_history_server(port: int, transport: str = "streamable-http", extra_args: Optional[List[str]] = None) -> subprocess.Popen:
+    """Launches servers/history_server.py as a shared HTTP service."""
+    args = [sys.executable, "-m", "servers.history_server", "--transport", transport, "--port", str(port)]
+    return subprocess.Popen(args + (extra_args or []), stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+async def wait_for_port(host: str, port: int, timeout: float = 30.0) -> None:
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            _, writer = await asyncio.open_connection(host, port)
+            writer.close()
+            return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise TimeoutError(f"Nothing listening on {host}:{port} after {timeout}s")
+            await asyncio.sleep(0.1)
+
+
+def print_report(title: str, report: Dict) -> None:
+    print(f"\n=== {title} ===")
+    print(json.dumps(report, indent=2))
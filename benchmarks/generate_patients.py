@@ -0,0 +1,138 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# benchmarks/generate_patients.py
+# Deterministic synthetic patient rosters in the mock_patients.json schema,
+# for sizing the history server. Record i depends only on (seed, i), so the
+# same roster comes out however it is sharded. Records are streamed to disk,
+# so 10M patients never sit in memory at once.
+#
+#   python -m benchmarks.generate_patients --patients 100000 --output data/synthetic_100k.json
+#   python -m benchmarks.generate_patients --patients 10000000 --shards 64 --output data/synthetic_10m/
+#   MEDISCREEN_PATIENT_DATA=data/synthetic_10m python -m servers.history_server --transport streamable-http
+import argparse
+import datetime
+import json
+import os
+import random
+import time
+from typing import Any, Dict, Iterator, Tuple
+
+FEMALE_NAMES = ["Jane", "Emily", "Sarah", "Maria", "Aisha", "Priya", "Olivia", "Sofia", "Mei", "Fatima",
+                "Grace", "Hannah", "Chloe", "Amara", "Lucia", "Nora", "Ines", "Yuki", "Zara", "Elena"]
+MALE_NAMES = ["John", "Michael", "Robert", "David", "Ahmed", "Raj", "Liam", "Mateo", "Wei", "Omar",
+              "James", "Daniel", "Lucas", "Kwame", "Diego", "Noah", "Arjun", "Kenji", "Ivan", "Samuel"]
+SURNAMES = ["Doe", "Smith", "Chen", "Brown", "Connor", "Garcia", "Patel", "Kim", "Nguyen", "Okafor",
+            "Rossi", "Muller", "Silva", "Khan", "Cohen", "Ivanova", "Tanaka", "Haddad", "Novak", "Walker",
+            "Lopez", "Singh", "Johnson", "Williams", "Martin", "Dubois", "Larsen", "Kowalski", "Murphy", "Ali"]
+
+# Condition -> typical medications (the mock roster pairs them the same way)
+CONDITIONS = {
+    "Type 2 Diabetes": ["Metformin 500mg", "Empagliflozin 10mg"],
+    "Hypertension": ["Lisinopril 10mg", "Amlodipine 5mg"],
+    "Asthma": ["Albuterol Inhaler (PRN)", "Fluticasone Inhaler"],
+    "Osteoarthritis": ["Celecoxib 200mg", "Acetaminophen 500mg (PRN)"],
+    "Hyperlipidemia": ["Atorvastatin 20mg", "Rosuvastatin 10mg"],
+    "Generalized Anxiety Disorder": ["Sertraline 50mg", "Buspirone 10mg"],
+    "Gout": ["Allopurinol 100mg", "Colchicine 0.6mg"],
+    "Obesity": [],
+    "Hypothyroidism": ["Levothyroxine 50mcg"],
+    "GERD": ["Omeprazole 20mg"],
+    "Migraine": ["Sumatriptan 50mg (PRN)"],
+    "Atrial Fibrillation": ["Apixaban 5mg", "Metoprolol 25mg"],
+    "Chronic Kidney Disease": [],
+    "COPD": ["Tiotropium Inhaler"],
+    "Depression": ["Escitalopram 10mg"],
+}
+ALLERGIES = ["Penicillin (Anaphylaxis)", "Latex", "Peanuts", "Sulfa Drugs", "Shellfish", "Aspirin",
+             "Codeine", "Iodine Contrast", "Eggs", "Bee Stings"]
+
+DOB_START = datetime.date(1930, 1, 1).toordinal()
+DOB_END = datetime.date(2010, 12, 31).toordinal()
+VISIT_START = datetime.date(2020, 1, 1).toordinal()
+VISIT_END = datetime.date(2025, 11, 30).toordinal()
+
+
+def patient_id(index: int, start: int = 1001) -> str:
+    return f"PT-{start + index}"
+
+
+def synthetic_patient(seed: int, index: int) -> Dict[str, Any]:
+    """One patient record; a pure function of (seed, index)."""
+    rng = random.Random(seed * 1_000_003 + index)
+    gender = rng.choice(["Female", "Male"])
+    first = rng.choice(FEMALE_NAMES if gender == "Female" else MALE_NAMES)
+    conditions = rng.sample(list(CONDITIONS), k=rng.choices([0, 1, 2, 3], weights=[30, 40, 20, 10])[0])
+    medications = [med for condition in conditions for med in CONDITIONS[condition][:rng.randint(1, 2)]]
+    allergies = rng.sample(ALLERGIES, k=rng.choices([0, 1, 2], weights=[55, 35, 10])[0])
+    return {
+        "name": f"{first} {rng.choice(SURNAMES)}",
+        "dob": datetime.date.fromordinal(rng.randint(DOB_START, DOB_END)).isoformat(),
+        "gender": gender,
+        "conditions": conditions,
+        "medications": medications,
+        "allergies": allergies,
+        "last_visit": datetime.date.fromordinal(rng.randint(VISIT_START, VISIT_END)).isoformat(),
+    }
+
+
+def iter_roster(count: int, seed: int = 0, start: int = 1001, offset: int = 0) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """(patient_id, record) for patients offset .. offset + count - 1."""
+    for index in range(offset, offset + count):
+        yield patient_id(index, start), synthetic_patient(seed, index)
+
+
+def write_roster(path: str, count: int, seed: int = 0, start: int = 1001, offset: int = 0) -> int:
+    """Streams one roster object ({"PT-...": {...}, ...}) to path. Returns bytes written."""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{\n")
+        for n, (pid, record) in enumerate(iter_roster(count, seed, start, offset)):
+            f.write(("," if n else "") + f"{json.dumps(pid)}:{json.dumps(record, separators=(',', ':'))}\n")
+        f.write("}\n")
+        return f.tell()
+
+
+def generate(output: str, patients: int, shards: int = 1, seed: int = 0, start: int = 1001) -> Dict[str, Any]:
+    """Writes a single roster file (shards == 1) or a directory of roster shards."""
+    started = time.perf_counter()
+    if shards <= 1:
+        os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+        files = [(output, patients, 0)]
+    else:
+        os.makedirs(output, exist_ok=True)
+        per_shard = -(-patients // shards)
+        files = [(os.path.join(output, f"patients-{shard:05d}-of-{shards:05d}.json"),
+                  min(per_shard, patients - shard * per_shard), shard * per_shard)
+                 for shard in range(shards) if shard * per_shard < patients]
+    written = sum(write_roster(path, count, seed, start, offset) for path, count, offset in files)
+    return {
+        "patients": patients,
+        "files": len(files),
+        "bytes": written,
+        "first_id": patient_id(0, start),
+        "last_id": patient_id(patients - 1, start),
+        "seconds": round(time.perf_counter() - started, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a synthetic patient roster (mock_patients.json schema)")
+    parser.add_argument("--patients", type=int, default=10000, help="Number of patients (e.g. 10000 .. 10000000)")
+    parser.add_argument("--output", required=True, help="Roster file, or a directory when --shards > 1")
+    parser.add_argument("--shards", type=int, default=1, help="Split the roster over N files in --output")
+    parser.add_argument("--seed", type=int, default=0, help="Same seed + patient count = same roster")
+    parser.add_argument("--start", type=int, default=1001, help="First numeric Patient ID (PT-<start>)")
+    args = parser.parse_args()
+    print(json.dumps(generate(args.output, args.patients, args.shards, args.seed, args.start), indent=2))
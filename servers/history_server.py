@@ -13,11 +13,15 @@
 # limitations under the License.
 
 
+import argparse
 import json
 import os
+from typing import Any, Dict, List, Optional
 from mcp.server.fastmcp import FastMCP
 import logging
 
+from servers.patient_store import PatientStore, edit_distance, id_key
+
 
 # This ensures the MCP server process doesn't print INFO logs to stderr
 logging.basicConfig(level=logging.CRITICAL)
@@ -28,28 +32,87 @@ mcp = FastMCP("HistoryArchivist")
 
 
 # Load data (In production, this would connect to a SQL DB)
-DATA_PATH = os.path.join(os.path.dirname(__file__), '../data/mock_patients.json')
+# MEDISCREEN_PATIENT_DATA may point at another roster file, or a directory of shards
+# (e.g. a synthetic roster from benchmarks/generate_patients.py)
+DATA_PATH = os.getenv("MEDISCREEN_PATIENT_DATA") or os.path.join(os.path.dirname(__file__), '../data/mock_patients.json')
+
+# Loaded once per server process; the store re-syncs itself when the JSON changes
+store = PatientStore(DATA_PATH)
+
+
+def to_json(payload: Any) -> str:
+    """Compact serialization: no indentation, no spaces (fewer bytes on stdio and tokens in context)."""
+    return json.dumps(payload, separators=(",", ":"))
+
 
-def load_db():
-    with open(DATA_PATH, 'r') as f:
-        return json.load(f)
+def project(record: Dict[str, Any], fields: Optional[List[str]]) -> Dict[str, Any]:
+    """Keeps only the requested fields of a record (all fields if none requested)."""
+    if not fields:
+        return record
+    return {key: record[key] for key in fields if key in record}
 
 @mcp.tool()
 def get_patient_history(patient_id: str) -> str:
     """
     Retrieves the full medical history for a given Patient ID.
     Args:
-        patient_id: The ID of the patient (e.g., 'PT-123')
+        patient_id: The ID of the patient (e.g., 'PT-123'); any case or separator is accepted
     Returns:
         JSON string of patient history or error message.
     """
-    db = load_db()
-    patient = db.get(patient_id)
-    
-    if patient:
-        return json.dumps(patient, indent=2)
+    resolved = store.resolve(patient_id)
+
+    if resolved:
+        return to_json(resolved[1])
+    # Near-miss IDs are counted, not listed: confirming one takes the patient's name and DOB
+    similar = len(store.suggest(patient_id))
+    if similar:
+        return (f"Error: Patient ID '{patient_id}' not found. {similar} similar ID(s) on file: ask for the "
+                f"patient's full name and date of birth and call find_patient.")
+    return f"Error: Patient ID '{patient_id}' not found."
+
+@mcp.tool()
+def find_patient(name: str, dob: str, patient_id: str = "") -> str:
+    """
+    Finds a patient by full name and date of birth, e.g. when the typed Patient ID was not found.
+    Args:
+        name: The patient's full name (any case or order; small typos are tolerated)
+        dob: Date of birth (e.g. '1979-05-12', '05/12/1979' or 'May 12, 1979')
+        patient_id: The ID the patient typed, if any; the match must be within two edits of it
+    Returns:
+        Compact JSON: {"patient_id": id, "record": {...}} on a single match, else {"error": "..."}.
+    """
+    if patient_id:
+        # A near name is only trusted when the typed ID is a near miss of the same chart;
+        # otherwise a new patient with a similar name and the same DOB gets someone else's history
+        typed = id_key(patient_id)
+        matches = [match for match in store.find_by_name_dob(name, dob)
+                   if edit_distance(typed, id_key(match[0]), 2) <= 2]
     else:
-        return f"Error: Patient ID '{patient_id}' not found."
+        matches = store.find_by_name_dob(name, dob, max_distance=0)
+    if not matches:
+        return to_json({"error": "No patient with that name and date of birth."})
+    if len(matches) > 1:
+        return to_json({"error": f"{len(matches)} patients match; ask for the Patient ID again."})
+    found_id, record = matches[0]
+    return to_json({"patient_id": found_id, "record": record})
+
+@mcp.tool()
+def get_patient_histories(patient_ids: List[str], fields: Optional[List[str]] = None) -> str:
+    """
+    Retrieves medical histories for many Patient IDs in one call.
+    Args:
+        patient_ids: The IDs of the patients (e.g., ['PT-1001', 'PT-1002'])
+        fields: Optional list of record fields to return (e.g., ['name', 'allergies']).
+                All fields are returned when omitted.
+    Returns:
+        Compact JSON object: {"patients": {id: record}, "not_found": [ids]}.
+    """
+    found = store.get_many(patient_ids)
+    return to_json({
+        "patients": {pid: project(record, fields) for pid, record in found.items()},
+        "not_found": [pid for pid in dict.fromkeys(patient_ids) if pid not in found],
+    })
 
 @mcp.resource("hospital://protocols/intake")
 def get_intake_protocol() -> str:
@@ -57,4 +120,14 @@ def get_intake_protocol() -> str:
     return "1. Verify ID. 2. Get Chief Complaint. 3. Check Vitals."
 
 if __name__ == "__main__":
-    mcp.run()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="HistoryArchivist MCP server")
+    parser.add_argument("--transport", choices=["stdio", "sse", "streamable-http"], default="stdio",
+                        help="stdio (child of one client) or a long-lived shared HTTP service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    # Only used by the HTTP transports; clients connect to http://HOST:PORT/mcp (or /sse)
+    mcp.settings.host = args.host
+    mcp.settings.port = args.port
+    mcp.run(transport=args.transport)
\ No newline at end of file
@@ -0,0 +1,361 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# servers/patient_store.py
+import datetime
+import glob
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import string
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory locks; run a single history worker there
+    fcntl = None
+
+# Characters a mistyped ID key may contain (keys are upper-cased and stripped of separators)
+ID_ALPHABET = string.ascii_uppercase + string.digits
+DOB_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%d.%m.%Y", "%B %d, %Y", "%b %d, %Y", "%d %B %Y", "%d %b %Y"]
+# Seconds a connection waits on another process's write lock before 'database is locked'
+BUSY_TIMEOUT = 60.0
+
+
+def id_key(patient_id: str) -> str:
+    """Case/format-insensitive form of an ID: 'pt 1004', 'Pt_1004', 'PT-1004' -> 'PT1004'."""
+    return re.sub(r"[^A-Z0-9]", "", patient_id.upper())
+
+
+def name_key(name: str) -> str:
+    """Case/order-insensitive form of a name: 'DOE,  jane' -> 'doe jane'."""
+    return " ".join(sorted(re.findall(r"[^\W\d_]+", name.casefold())))
+
+
+def normalize_dob(dob: str) -> Optional[str]:
+    """ISO date from the common spellings ('1979-05-12', '05/12/1979', 'May 12, 1979'), or None."""
+    text = " ".join(dob.replace(",", ", ").split()).replace(" ,", ",")
+    for fmt in DOB_FORMATS:
+        try:
+            return datetime.datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Damerau-Levenshtein (optimal string alignment) distance, or limit + 1 once it exceeds limit."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2: List[int] = []
+    previous = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1] if previous[-1] <= limit else limit + 1
+
+
+def edits1(key: str, alphabet: str = ID_ALPHABET) -> Set[str]:
+    """Every key one deletion, transposition, substitution or insertion (from alphabet) away."""
+    splits = [(key[:i], key[i:]) for i in range(len(key) + 1)]
+    deletes = {left + right[1:] for left, right in splits if right}
+    transposes = {left + right[1] + right[0] + right[2:] for left, right in splits if len(right) > 1}
+    replaces = {left + c + right[1:] for left, right in splits if right for c in alphabet}
+    inserts = {left + c + right for left, right in splits for c in alphabet}
+    return (deletes | transposes | replaces | inserts) - {key}
+
+
+class PatientStore:
+    """
+    Indexed, persistent view of the patient roster.
+    The JSON file stays the source of truth; records are mirrored into a SQLite
+    index keyed by Patient ID so lookups never re-parse the roster.
+    When the source file's mtime changes, only the records whose content
+    changed are rewritten (and removed records are dropped). After the first
+    sync this happens on a background thread with its own connection, so
+    lookups keep being served from the current index while it runs.
+    Several server processes may share one index file (MEDISCREEN_HISTORY_WORKERS):
+    builds are serialized by a lock file, and whoever gets it second finds the
+    index already current.
+    source_path may also be a directory of *.json shards (one roster object
+    each), which keeps memory bounded while indexing very large rosters.
+
+    Besides exact IDs, the index resolves IDs typed in any case or format
+    (normalized key column), suggests IDs within a bounded edit distance
+    (candidate keys probed against the same index, so cost doesn't grow with
+    the roster) and finds patients by name + date of birth.
+    """
+
+    def __init__(self, source_path: str, index_path: Optional[str] = None, check_interval: float = 1.0):
+        self.source_path = source_path
+        self.index_path = index_path or os.path.splitext(source_path.rstrip(os.sep))[0] + ".index.sqlite"
+        # Minimum seconds between mtime checks, so hot lookups don't stat() every call
+        self.check_interval = check_interval
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.index_path, timeout=BUSY_TIMEOUT, check_same_thread=False)
+        with self._build_lock():
+            self._init_schema()
+
+        self._source_mtime = None
+        self._last_check = 0.0
+        self._sync_thread: Optional[threading.Thread] = None
+        self.last_sync_error: Optional[BaseException] = None
+        self.refresh(force=True)
+
+    @contextmanager
+    def _build_lock(self) -> Iterator[None]:
+        """Exclusive across processes sharing this index (a no-op without fcntl)."""
+        if fcntl is None:
+            yield
+            return
+        with open(self.index_path + ".lock", "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def _init_schema(self) -> None:
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(patients)")}
+            if columns and "id_key" not in columns:
+                # Index from before the lookup columns existed: it is derived data, so rebuild it
+                self._conn.execute("DROP TABLE patients")
+                self._conn.execute("DELETE FROM meta WHERE key = 'source_mtime'")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS patients ("
+                " patient_id TEXT PRIMARY KEY,"
+                " record TEXT NOT NULL,"
+                " digest TEXT NOT NULL,"
+                " id_key TEXT NOT NULL,"
+                " name_key TEXT,"
+                " dob TEXT)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS patients_id_key ON patients (id_key)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS patients_dob_name ON patients (dob, name_key)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)"
+            )
+
+    def refresh(self, force: bool = False) -> bool:
+        """
+        Re-syncs the index if the source file changed since the last sync.
+        force=True syncs in the calling thread and returns True if any records
+        were rewritten; otherwise the sync is started in the background (at most
+        one at a time) and False is returned.
+        """
+        now = time.monotonic()
+        if not force and now - self._last_check < self.check_interval:
+            return False
+        self._last_check = now
+
+        mtime = self._source_version()
+        if mtime == self._source_mtime:
+            return False
+
+        if force:
+            with self._lock:
+                changed = self._sync_if_stale(self._conn, mtime)
+            self._source_mtime = mtime
+            return changed
+        if self._sync_thread is None or not self._sync_thread.is_alive():
+            self._sync_thread = threading.Thread(
+                target=self._background_sync, args=(mtime,), name="patient-store-sync", daemon=True
+            )
+            self._sync_thread.start()
+        return False
+
+    def wait_for_sync(self, timeout: Optional[float] = None) -> None:
+        """Blocks until a running background sync has finished."""
+        thread = self._sync_thread
+        if thread is not None:
+            thread.join(timeout)
+
+    def _background_sync(self, mtime: int) -> None:
+        conn = sqlite3.connect(self.index_path, timeout=BUSY_TIMEOUT)
+        try:
+            self._sync_if_stale(conn, mtime)
+            self._source_mtime = mtime
+            self.last_sync_error = None
+        except Exception as e:
+            # Keep serving the current index; the next check retries
+            self.last_sync_error = e
+        finally:
+            conn.close()
+
+    def _sync_if_stale(self, conn: sqlite3.Connection, mtime: int) -> bool:
+        with self._build_lock():
+            # Checked under the lock: another process may have just synced the same version
+            row = conn.execute("SELECT value FROM meta WHERE key = 'source_mtime'").fetchone()
+            if row and row[0] == str(mtime):
+                # Index on disk is already current (e.g. after a server restart)
+                return False
+            return self._sync(conn, mtime)
+
+    def _source_files(self) -> List[str]:
+        if os.path.isdir(self.source_path):
+            return sorted(glob.glob(os.path.join(self.source_path, "*.json")))
+        return [self.source_path]
+
+    def _source_version(self) -> int:
+        """The file's mtime, or for a shard directory a fingerprint of every shard's name and mtime."""
+        if not os.path.isdir(self.source_path):
+            return os.stat(self.source_path).st_mtime_ns
+        stamps = "|".join(f"{path}:{os.stat(path).st_mtime_ns}" for path in self._source_files())
+        return int(hashlib.sha1(stamps.encode("utf-8")).hexdigest()[:15], 16)
+
+    def _sync(self, conn: sqlite3.Connection, mtime: int) -> bool:
+        existing = dict(conn.execute("SELECT patient_id, digest FROM patients"))
+        changed = False
+        for path in self._source_files():
+            with open(path, 'r') as f:
+                roster = json.load(f)
+            upserts = []
+            for patient_id, record in roster.items():
+                payload = json.dumps(record, separators=(",", ":"))
+                digest = hashlib.sha1(json.dumps(record, sort_keys=True).encode("utf-8")).hexdigest()
+                if existing.pop(patient_id, None) != digest:
+                    upserts.append((patient_id, payload, digest, id_key(patient_id),
+                                    name_key(record.get("name") or ""), record.get("dob")))
+            with conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO patients (patient_id, record, digest, id_key, name_key, dob)"
+                    " VALUES (?, ?, ?, ?, ?, ?)",
+                    upserts,
+                )
+            changed = changed or bool(upserts)
+        # Anything left over is no longer in the roster
+        removed = [(patient_id,) for patient_id in existing]
+
+        with conn:
+            conn.executemany("DELETE FROM patients WHERE patient_id = ?", removed)
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('source_mtime', ?)", (str(mtime),)
+            )
+        return changed or bool(removed)
+
+    def get(self, patient_id: str) -> Optional[Dict[str, Any]]:
+        """Returns the patient record for an exact Patient ID, or None."""
+        self.refresh()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT record FROM patients WHERE patient_id = ?", (patient_id,)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, patient_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Returns {patient_id: record} for every ID found, keyed by the ID as requested
+        (IDs in another case/format resolve like resolve()); missing IDs are omitted.
+        """
+        self.refresh()
+        ids = list(dict.fromkeys(patient_ids))
+        found = {}
+        with self._lock:
+            # Chunk to stay under SQLite's bound-parameter limit
+            for start in range(0, len(ids), 500):
+                chunk = ids[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT patient_id, record FROM patients WHERE patient_id IN ({placeholders})", chunk
+                )
+                for patient_id, record in rows:
+                    found[patient_id] = json.loads(record)
+            # Second pass over the normalized key for the IDs not found verbatim
+            by_key: Dict[str, List[str]] = {}
+            for patient_id in ids:
+                if patient_id not in found and id_key(patient_id):
+                    by_key.setdefault(id_key(patient_id), []).append(patient_id)
+            keys = list(by_key)
+            for start in range(0, len(keys), 500):
+                chunk = keys[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self._conn.execute(
+                    f"SELECT id_key, MIN(patient_id), record FROM patients WHERE id_key IN ({placeholders})"
+                    " GROUP BY id_key", chunk
+                )
+                for key, _, record in rows:
+                    for patient_id in by_key[key]:
+                        found[patient_id] = json.loads(record)
+        return found
+
+    def resolve(self, patient_id: str) -> Optional[Tuple[str, Dict[str, Any]]]:
+        """(canonical ID, record) for an exact ID, else for the same ID in another case/format."""
+        self.refresh()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT patient_id, record FROM patients WHERE patient_id = ?", (patient_id,)
+            ).fetchone() or self._conn.execute(
+                "SELECT patient_id, record FROM patients WHERE id_key = ? ORDER BY patient_id LIMIT 1",
+                (id_key(patient_id),),
+            ).fetchone()
+        return (row[0], json.loads(row[1])) if row else None
+
+    def suggest(self, patient_id: str, max_distance: int = 1, limit: int = 5) -> List[str]:
+        """Existing IDs within max_distance edits (1 or 2) of the typed ID, closest first."""
+        self.refresh()
+        key = id_key(patient_id)
+        if not key:
+            return []
+        candidates = {key} | edits1(key)
+        if max_distance >= 2:
+            # Second ring over digit edits only (IDs are PT-<digits>), or the candidate set explodes
+            for near in edits1(key, string.digits):
+                candidates |= edits1(near, string.digits)
+        found: List[Tuple[str, str]] = []
+        probe = list(candidates)
+        with self._lock:
+            for start in range(0, len(probe), 500):
+                chunk = probe[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                found.extend(self._conn.execute(
+                    f"SELECT patient_id, id_key FROM patients WHERE id_key IN ({placeholders})", chunk
+                ))
+        ranked = sorted((edit_distance(key, found_key, max_distance), pid) for pid, found_key in found)
+        return [pid for distance, pid in ranked if distance <= max_distance][:limit]
+
+    def find_by_name_dob(self, name: str, dob: str, max_distance: int = 2) -> List[Tuple[str, Dict[str, Any]]]:
+        """
+        Patients born on dob whose name matches, allowing a few typos
+        (max_distance edits over the normalized name). Closest first.
+        """
+        self.refresh()
+        iso_dob, wanted = normalize_dob(dob), name_key(name)
+        if iso_dob is None or not wanted:
+            return []
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT patient_id, record, name_key FROM patients WHERE dob = ?", (iso_dob,)
+            ).fetchall()
+        ranked = sorted((edit_distance(wanted, key or "", max_distance), pid, record) for pid, record, key in rows)
+        return [(pid, json.loads(record)) for distance, pid, record in ranked if distance <= max_distance]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
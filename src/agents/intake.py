@@ -21,12 +21,14 @@ from src.config import get_model
 from src.prompts import INTAKE_COORDINATOR_SYS
 
 class IntakeCoordinator:
-    def __init__(self, tools=None):
+    def __init__(self, tools=None, before_model_callback=None, after_model_callback=None):
         self.agent = Agent(
             name="IntakeCoordinator",
-            model=get_model(),
+            model=get_model("IntakeCoordinator"),
             instruction=INTAKE_COORDINATOR_SYS,
-            tools=tools if tools else []  # Pass the History Tool here
+            tools=tools if tools else [],  # Pass the History Tool here
+            before_model_callback=before_model_callback,
+            after_model_callback=after_model_callback,
         )
 
     
\ No newline at end of file
@@ -19,11 +19,15 @@ from src.config import get_model
 from src.prompts import SCRIBE_SYS
 
 class ClinicalScribe:
-    def __init__(self):
+    def __init__(self, before_model_callback=None, after_model_callback=None):
         self.agent = Agent(
             name="ClinicalScribe",
-            model=get_model(),
-            instruction=SCRIBE_SYS
+            model=get_model("ClinicalScribe"),
+            instruction=SCRIBE_SYS,
+            # Every scribe prompt carries the logs it needs; don't resend the session history
+            include_contents="none",
+            before_model_callback=before_model_callback,
+            after_model_callback=after_model_callback,
         )
 
     async def generate_note(self, chat_log, patient_history):
@@ -19,12 +19,14 @@ from src.config import get_model
 from src.prompts import SYMPTOM_SPECIALIST_SYS
 
 class SymptomSpecialist:
-    def __init__(self):
+    def __init__(self, before_model_callback=None, after_model_callback=None):
         self.agent = Agent(
             name="SymptomSpecialist",
-            model=get_model(),
-            instruction=SYMPTOM_SPECIALIST_SYS
+            model=get_model("SymptomSpecialist"),
+            instruction=SYMPTOM_SPECIALIST_SYS,
             # In the future, you can add a tool here like 'get_medical_guidelines'
+            before_model_callback=before_model_callback,
+            after_model_callback=after_model_callback,
         )
 
     async def run(self, user_input):
@@ -0,0 +1,113 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/batch.py
+# Headless replay of scripted patient conversations (python -m src.main --batch FILE).
+#
+# Input is JSONL, one conversation per line:
+#   {"conversation_id": "headache-01", "turns": ["PT-1001", "I have a headache", ...]}
+# Lines shaped like {"request_id": ..., "title": ..., "body": "..."} are also accepted;
+# each non-empty line of "body" is then one patient turn.
+#
+# Output is JSONL, one result per conversation, in completion order.
+import asyncio
+import json
+import os
+import time
+from typing import Any, Dict, List
+
+from src.orchestrator import MediScreenService
+
+
+def load_scripts(path: str) -> List[Dict[str, Any]]:
+    scripts = []
+    with open(path, encoding="utf-8") as f:
+        for line_no, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            raw = json.loads(line)
+            turns = raw.get("turns")
+            if turns is None:
+                turns = [t.strip() for t in raw.get("body", "").splitlines() if t.strip()]
+            scripts.append({
+                "conversation_id": str(raw.get("conversation_id") or raw.get("request_id") or raw.get("id") or line_no),
+                "turns": turns,
+            })
+    return scripts
+
+
+async def replay(service: MediScreenService, script: Dict[str, Any]) -> Dict[str, Any]:
+    """Plays one scripted conversation to completion (or until its turns run out)."""
+    result = {"conversation_id": script["conversation_id"], "completed": False, "soap_note": None, "error": None}
+    turn_ms = []
+    started = time.perf_counter()
+    try:
+        conv, _ = await service.start_conversation(f"batch_{script['conversation_id']}")
+        result["session_id"] = conv.session_id
+        result["start_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+        for text in script["turns"]:
+            turn_started = time.perf_counter()
+            replies = await service.handle_input(conv, text)
+            turn_ms.append(round((time.perf_counter() - turn_started) * 1000, 3))
+            note = next((reply.text for reply in replies if reply.kind == "note"), None)
+            if note is not None:
+                result["soap_note"] = note
+            if conv.done:
+                break
+
+        result["completed"] = conv.done
+        result["patient_id"] = conv.patient_id
+        result["final_agent"] = conv.current_agent
+    except Exception as e:
+        service.tracer.on_error(e)
+        result["error"] = repr(e)
+
+    result["turns"] = len(turn_ms)
+    result["turn_ms"] = turn_ms
+    result["total_ms"] = round((time.perf_counter() - started) * 1000, 3)
+    return result
+
+
+async def run_batch(service: MediScreenService, input_path: str, output_path: str, parallel: int = 4) -> Dict[str, Any]:
+    """Replays every script with at most `parallel` conversations in flight; returns a summary."""
+    scripts = load_scripts(input_path)
+    gate = asyncio.Semaphore(max(1, parallel))
+
+    async def bounded(script):
+        async with gate:
+            return await replay(service, script)
+
+    os.makedirs(os.path.dirname(output_path) or ".", exist_ok=True)
+    started = time.perf_counter()
+    completed = failed = turns = 0
+    with open(output_path, "w", encoding="utf-8") as out:
+        for finished in asyncio.as_completed([bounded(script) for script in scripts]):
+            result = await finished
+            out.write(json.dumps(result) + "\n")
+            out.flush()
+            completed += result["completed"]
+            failed += result["error"] is not None
+            turns += result["turns"]
+    elapsed = time.perf_counter() - started
+
+    return {
+        "conversations": len(scripts),
+        "completed": completed,
+        "failed": failed,
+        "elapsed_s": round(elapsed, 3),
+        "conversations_per_sec": round(len(scripts) / elapsed, 3) if elapsed else 0.0,
+        "turns_per_sec": round(turns / elapsed, 3) if elapsed else 0.0,
+    }
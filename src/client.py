@@ -0,0 +1,101 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/client.py
+# Terminal client for the MediScreen line-protocol server (see src/server.py).
+import asyncio
+import json
+
+
+async def _send(writer: asyncio.StreamWriter, message: dict) -> None:
+    writer.write((json.dumps(message) + "\n").encode("utf-8"))
+    await writer.drain()
+
+
+async def _print_replies(reader: asyncio.StreamReader) -> bool:
+    """
+    Prints server messages until the end of the turn. Returns True once the conversation is done.
+    Streamed chunks are printed as they arrive; the full message that follows them is skipped
+    when it repeats them (a reply that failed mid-stream still prints its error message).
+    """
+    streamed = {}         # Agent -> text already printed chunk by chunk this turn
+    streaming_agent = None  # Agent whose line is currently open
+    while True:
+        line = await reader.readline()
+        if not line:
+            return True  # Server closed the connection
+        message = json.loads(line)
+        kind = message.get("type")
+
+        if kind == "chunk":
+            if message["agent"] != streaming_agent:
+                if streaming_agent is not None:
+                    print("\n")
+                print(f"\n{message['agent']}: ", end="")
+                streaming_agent = message["agent"]
+            streamed[streaming_agent] = streamed.get(streaming_agent, "") + message["text"]
+            print(message["text"], end="", flush=True)
+            continue
+
+        if streaming_agent is not None:
+            print("\n")  # Close the streamed line
+            streaming_agent = None
+
+        if kind == "turn_end":
+            return message.get("done", False)
+        if kind == "message":
+            printed = streamed.pop(message["agent"], None)
+            if printed is None or printed.strip() != message["text"].strip():
+                print(f"\n{message['agent']}: {message['text']}\n")
+        elif kind == "note":
+            # Print Clinical notes to console within separators, For Demo purposes
+            print("="*50)
+            print(message["text"])
+            print("="*50)
+        elif kind == "error":
+            print(f"\n[ {message['text']} ]\n")
+
+
+async def run_cli_client(host: str, port: int, user_id: str = "patient_cli_user", stream: bool = True) -> None:
+    """Interactive patient loop; input() runs in a worker thread so the event loop never blocks."""
+    reader, writer = await asyncio.open_connection(host, port)
+
+    print("\n" + "="*80)
+    print("🏥  MEDISCREEN AI  ")
+    print("You are connected with MediScreen AI. To exit, type 'quit' or 'exit'.")
+    print("="*80 + "\n")
+
+    try:
+        await _send(writer, {"type": "start", "user_id": user_id, "stream": stream})
+        done = await _print_replies(reader)
+
+        while not done:
+            try:
+                user_input = await asyncio.to_thread(input, "Patient: ")
+            except EOFError:
+                break
+
+            if user_input.lower() in ["quit", "exit"]:
+                print("\n Thanks for using MediScreen AI. Closing Session. Goodbye!")
+                break
+
+            await _send(writer, {"type": "input", "text": user_input})
+            done = await _print_replies(reader)
+    finally:
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
@@ -14,22 +14,175 @@
 
 
 # src/config.py
+# Only settings at import time: the model SDKs are imported by get_model(), so light entry points
+# (e.g. the kiosk client attaching to a running server) never load them
 import os
 from dotenv import load_dotenv
-from google.adk.models.google_llm import Gemini
-from google.genai import types
 
 # Load environment variables from a .env file if present
 load_dotenv()
 
-retry_config = types.HttpRetryOptions(
-    attempts=5,  # Maximum retry attempts
-    exp_base=7,  # Delay multiplier
-    initial_delay=1,
-    http_status_codes=[429, 500, 503, 504],  # Retry on these HTTP errors
-)
-
-def get_model():
-    """Returns the configured Gemini model instance."""
-    # You can swap "gemini-2.5-flash" for "gemini-2.5-pro" for better reasoning
-    return Gemini(model="gemini-2.5-flash-lite", retry_options=retry_config)
\ No newline at end of file
+# The SDK makes a single attempt (see _backend): retries happen in the model governor (src/rate_limit.py),
+# with full-jitter exponential backoff and outside the concurrency slot, so 429 bursts don't synchronize
+MODEL_RETRY_ATTEMPTS = int(os.getenv("MEDISCREEN_MODEL_RETRY_ATTEMPTS", "5"))
+MODEL_RETRY_BASE_DELAY = float(os.getenv("MEDISCREEN_MODEL_RETRY_BASE_DELAY", "1.0"))
+MODEL_RETRY_MAX_DELAY = float(os.getenv("MEDISCREEN_MODEL_RETRY_MAX_DELAY", "20"))
+
+# Shared limits for all model calls: requests/second (token bucket; 0 = unlimited), burst size and
+# concurrent calls (0 = unlimited). Queued calls are served by agent priority, lowest number first.
+MODEL_RATE_PER_SEC = float(os.getenv("MEDISCREEN_MODEL_RPS", "20"))
+MODEL_BURST = int(os.getenv("MEDISCREEN_MODEL_BURST", "20"))
+MODEL_MAX_CONCURRENT = int(os.getenv("MEDISCREEN_MODEL_MAX_CONCURRENT", "16"))
+AGENT_PRIORITIES = {"IntakeCoordinator": 0, "SymptomSpecialist": 1, "ClinicalScribe": 2}
+
+# Client-side cache of patient history payloads (see src/history_client.py)
+HISTORY_CACHE_SIZE = int(os.getenv("MEDISCREEN_HISTORY_CACHE_SIZE", "1024"))
+HISTORY_CACHE_TTL = float(os.getenv("MEDISCREEN_HISTORY_CACHE_TTL", "300"))
+
+# Number of history_server.py processes behind the MCP client (see src/mcp_pool.py)
+HISTORY_POOL_SIZE = int(os.getenv("MEDISCREEN_HISTORY_WORKERS", "1"))
+
+# Connect to a long-lived HistoryArchivist HTTP service instead of spawning stdio children,
+# e.g. http://127.0.0.1:8766/mcp (streamable HTTP) or http://127.0.0.1:8766/sse
+HISTORY_SERVER_URL = os.getenv("MEDISCREEN_HISTORY_URL") or None
+
+# Trace writer (see src/plugins.py): rotation and payload capping/sampling
+TRACE_MAX_BYTES = int(os.getenv("MEDISCREEN_TRACE_MAX_BYTES", str(50 * 1024 * 1024)))
+TRACE_BACKUP_COUNT = int(os.getenv("MEDISCREEN_TRACE_BACKUPS", "10"))
+TRACE_MAX_PAYLOAD_CHARS = int(os.getenv("MEDISCREEN_TRACE_MAX_PAYLOAD_CHARS", "2000"))
+TRACE_PAYLOAD_SAMPLE_RATE = float(os.getenv("MEDISCREEN_TRACE_SAMPLE_RATE", "1.0"))
+
+# Trace logs, metrics exports and (by default) transcripts and session archives go under LOG_DIR
+LOG_DIR = os.getenv("MEDISCREEN_LOG_DIR", "logs")
+
+# Seconds between metrics exports to LOG_DIR/metrics.json and LOG_DIR/metrics.prom
+METRICS_EXPORT_INTERVAL = float(os.getenv("MEDISCREEN_METRICS_INTERVAL", "15"))
+
+# Answer ID checks and emergency keywords locally before the IntakeCoordinator model (see src/rules.py)
+INTAKE_RULES_ENABLED = os.getenv("MEDISCREEN_INTAKE_RULES", "1") != "0"
+
+# Per-session transcripts, appended turn by turn as JSONL ("" disables); scribe prompt budget (see src/transcript.py)
+TRANSCRIPT_DIR = os.getenv("MEDISCREEN_TRANSCRIPT_DIR", os.path.join(LOG_DIR, "transcripts"))
+SCRIBE_MAX_TOKENS = int(os.getenv("MEDISCREEN_SCRIBE_MAX_TOKENS", "6000"))
+
+# Per-agent prompt budgets in estimated tokens, system prompt included (0 = unlimited; see src/prompt_budget.py)
+AGENT_PROMPT_BUDGETS = {
+    "IntakeCoordinator": int(os.getenv("MEDISCREEN_INTAKE_PROMPT_BUDGET", "8000")),
+    "SymptomSpecialist": int(os.getenv("MEDISCREEN_SYMPTOM_PROMPT_BUDGET", "12000")),
+    "ClinicalScribe": int(os.getenv("MEDISCREEN_SCRIBE_PROMPT_BUDGET", "10000")),
+}
+
+# Draft the SOAP note in the background during the symptom interview (see src/drafting.py)
+SOAP_DRAFTING_ENABLED = os.getenv("MEDISCREEN_SOAP_DRAFTING", "1") != "0"
+
+# Cache of context-free agent replies, e.g. the warm-start greeting (see src/response_cache.py)
+RESPONSE_CACHE_ENABLED = os.getenv("MEDISCREEN_RESPONSE_CACHE", "1") != "0"
+RESPONSE_CACHE_SIZE = int(os.getenv("MEDISCREEN_RESPONSE_CACHE_SIZE", "256"))
+RESPONSE_CACHE_TTL = float(os.getenv("MEDISCREEN_RESPONSE_CACHE_TTL", "3600"))
+
+# SOAP note store (see src/note_store.py)
+NOTE_DB_PATH = os.getenv("MEDISCREEN_NOTE_DB", "soap_notes.db")
+
+# Session DB URL (ADK DatabaseSessionService)
+SESSION_DB_URL = os.getenv("MEDISCREEN_SESSION_DB", "sqlite:///mediscreen.db")
+
+# Session retention (see src/retention.py): compact completed sessions after SESSION_COMPACT_AFTER seconds
+# idle, archive and delete any session idle longer than SESSION_TTL; sweep every RETENTION_INTERVAL (0 disables)
+SESSION_TTL = float(os.getenv("MEDISCREEN_SESSION_TTL", str(7 * 86400)))
+SESSION_COMPACT_AFTER = float(os.getenv("MEDISCREEN_SESSION_COMPACT_AFTER", "3600"))
+SESSION_ARCHIVE_DIR = os.getenv("MEDISCREEN_SESSION_ARCHIVE_DIR", os.path.join(LOG_DIR, "session_archive"))
+RETENTION_INTERVAL = float(os.getenv("MEDISCREEN_RETENTION_INTERVAL", "600"))
+
+# Session DB (see src/session_store.py): connection pool size and per-turn batched event writes
+SESSION_DB_POOL_SIZE = int(os.getenv("MEDISCREEN_SESSION_POOL_SIZE", "10"))
+SESSION_WRITE_BEHIND = os.getenv("MEDISCREEN_SESSION_WRITE_BEHIND", "0") == "1"
+
+# Multi-session server (python -m src.main --serve)
+SERVER_HOST = os.getenv("MEDISCREEN_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("MEDISCREEN_PORT", "8765"))
+
+# Kiosk CLI: attach to a running daemon (python -m src.main --daemon) at this HOST:PORT if one is
+# listening, instead of starting everything in-process; e.g. MEDISCREEN_DAEMON=127.0.0.1:8765
+DAEMON_ADDRESS = os.getenv("MEDISCREEN_DAEMON") or None
+
+# Model backend: "gemini" (default) or "stub" for the offline scripted model (src/stub_model.py)
+MODEL_BACKEND = os.getenv("MEDISCREEN_MODEL_BACKEND", "gemini").lower()
+STUB_LATENCY_MS = float(os.getenv("MEDISCREEN_STUB_LATENCY_MS", "0"))
+STUB_JITTER_MS = float(os.getenv("MEDISCREEN_STUB_JITTER_MS", "0"))
+
+# Per-agent model tiers (see src/model_pool.py): comma-separated backends, primary first.
+# "stub-<name>[@latency_ms]" is the offline ScriptedLlm, e.g. MEDISCREEN_INTAKE_MODELS=stub-slow@3000,stub-fast@50
+# You can swap "gemini-2.5-flash" for "gemini-2.5-pro" for better reasoning
+DEFAULT_MODELS = "stub-scripted" if MODEL_BACKEND == "stub" else "gemini-2.5-flash-lite,gemini-2.5-flash"
+AGENT_MODELS = {
+    "IntakeCoordinator": os.getenv("MEDISCREEN_INTAKE_MODELS", DEFAULT_MODELS),
+    "SymptomSpecialist": os.getenv("MEDISCREEN_SYMPTOM_MODELS", DEFAULT_MODELS),
+    "ClinicalScribe": os.getenv("MEDISCREEN_SCRIBE_MODELS", DEFAULT_MODELS),
+}
+
+# Failover: a backend whose rolling p95 or error rate crosses these is skipped for the cooldown
+MODEL_FAILOVER_P95_MS = float(os.getenv("MEDISCREEN_MODEL_FAILOVER_P95_MS", "8000"))
+MODEL_FAILOVER_ERROR_RATE = float(os.getenv("MEDISCREEN_MODEL_FAILOVER_ERROR_RATE", "0.5"))
+MODEL_HEALTH_WINDOW = int(os.getenv("MEDISCREEN_MODEL_HEALTH_WINDOW", "50"))
+MODEL_HEALTH_MIN_SAMPLES = int(os.getenv("MEDISCREEN_MODEL_HEALTH_MIN_SAMPLES", "10"))
+MODEL_FAILOVER_COOLDOWN = float(os.getenv("MEDISCREEN_MODEL_FAILOVER_COOLDOWN", "60"))
+
+# Hedged requests: send a duplicate to the next backend if the first hasn't answered in N ms (0 = off)
+AGENT_HEDGE_MS = {"IntakeCoordinator": float(os.getenv("MEDISCREEN_INTAKE_HEDGE_MS", "0"))}
+
+# agent name -> its ModelPool, for stats
+MODEL_POOLS = {}
+_model_governor = None
+
+def get_model_governor():
+    """The process-wide ModelGovernor shared by every agent (created on first use)."""
+    global _model_governor
+    if _model_governor is None:
+        from src.rate_limit import ModelGovernor
+        _model_governor = ModelGovernor(rate_per_sec=MODEL_RATE_PER_SEC, burst=MODEL_BURST,
+                                        max_concurrent=MODEL_MAX_CONCURRENT)
+    return _model_governor
+
+def _backend(spec: str, agent_name: str, attempts: int = MODEL_RETRY_ATTEMPTS):
+    """One model backend behind the shared governor."""
+    from src.rate_limit import GovernedLlm
+    name, _, latency_ms = spec.strip().partition("@")
+    if name.startswith("stub-"):
+        from src.stub_model import ScriptedLlm
+        inner = ScriptedLlm(model=name, latency_ms=float(latency_ms) if latency_ms else STUB_LATENCY_MS,
+                            jitter_ms=STUB_JITTER_MS)
+    else:
+        from google.adk.models.google_llm import Gemini
+        from google.genai import types
+        inner = Gemini(model=name, retry_options=types.HttpRetryOptions(attempts=1))
+    return GovernedLlm(
+        model=inner.model,
+        inner=inner,
+        governor=get_model_governor(),
+        agent=agent_name,
+        priority=AGENT_PRIORITIES.get(agent_name, 1),
+        attempts=attempts,
+        backoff_base=MODEL_RETRY_BASE_DELAY,
+        backoff_cap=MODEL_RETRY_MAX_DELAY,
+    )
+
+def get_model(agent_name: str = ""):
+    """Returns the agent's model pool (primary + fallbacks, each behind the shared governor)."""
+    from src.model_pool import ModelPool
+    specs = [spec for spec in AGENT_MODELS.get(agent_name, DEFAULT_MODELS).split(",") if spec.strip()]
+    # Only the last backend retries with backoff; the others fail over to the next one at once
+    backends = [_backend(spec, agent_name, attempts=MODEL_RETRY_ATTEMPTS if i == len(specs) - 1 else 1)
+                for i, spec in enumerate(specs)]
+    pool = ModelPool(
+        model=backends[0].model,
+        backends=backends,
+        agent=agent_name,
+        p95_threshold_ms=MODEL_FAILOVER_P95_MS,
+        error_rate_threshold=MODEL_FAILOVER_ERROR_RATE,
+        window=MODEL_HEALTH_WINDOW,
+        min_samples=MODEL_HEALTH_MIN_SAMPLES,
+        cooldown_seconds=MODEL_FAILOVER_COOLDOWN,
+        hedge_after_ms=AGENT_HEDGE_MS.get(agent_name, 0.0),
+    )
+    MODEL_POOLS[agent_name] = pool
+    return pool
\ No newline at end of file
@@ -0,0 +1,97 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/drafting.py
+# Incremental SOAP drafting during the symptom interview.
+# After each SymptomSpecialist turn a background task folds the new turns
+# into a running draft (in its own scribe session, so the interview never sees
+# it). At SUMMARY_COMPLETE the scribe only reconciles the draft with the few
+# turns that arrived since, so the final call stays the same size however long
+# the interview was.
+import asyncio
+from typing import Any, Awaitable, Callable, Optional
+
+from src.transcript import Transcript
+from src.utils import AGENT_ERROR_PREFIX
+
+UPDATE_PROMPT = ("UPDATE SOAP DRAFT. Merge the new interview turns into the current draft and "
+                 "return the complete updated note in the usual format.\n"
+                 "[CURRENT DRAFT]:\n{draft}\n[NEW LOGS]:\n{logs}")
+FINALIZE_PROMPT = ("GENERATE SOAP NOTE. Reconcile the draft with the final interview turns and "
+                   "return the finished note.\n[DRAFT]:\n{draft}\n[NEW LOGS]:\n{logs}")
+
+
+class SoapDrafter:
+    """
+    Running SOAP draft for one conversation.
+    run(prompt) executes one ClinicalScribe turn in the drafting session and
+    returns its text. At most one update runs at a time; turns that complete
+    meanwhile are folded in by a follow-up update.
+    """
+
+    def __init__(self, transcript: Transcript, run: Callable[[str], Awaitable[str]], tracer: Any):
+        self.transcript = transcript
+        self.run = run
+        self.tracer = tracer
+        self.draft = ""
+        self.drafted = 0  # Turns of the transcript already folded into the draft
+        self.updates = 0
+        self._task: Optional[asyncio.Task] = None
+        self._dirty = False
+
+    def schedule(self) -> None:
+        """Called after each interview turn; never blocks the conversation."""
+        if self._task is not None and not self._task.done():
+            self._dirty = True
+            return
+        self._task = asyncio.create_task(self._update_loop())
+
+    async def _update_loop(self) -> None:
+        while True:
+            self._dirty = False
+            upto = len(self.transcript)
+            logs = self._logs(self.drafted, upto)
+            if not logs:
+                return
+            prompt = UPDATE_PROMPT.format(draft=self.draft or "(empty)", logs=logs)
+            try:
+                with self.tracer.span("soap_draft"):
+                    text = await self.run(prompt)
+            except Exception as e:
+                self.tracer.on_error(e)
+                return
+            if not text or text.startswith(AGENT_ERROR_PREFIX):
+                return  # Keep the last good draft; the final step covers the rest
+            self.draft, self.drafted = text, upto
+            self.updates += 1
+            if not self._dirty:
+                return
+
+    async def finalize_prompt(self) -> Optional[str]:
+        """
+        Stops any update still running and returns the reconcile prompt for the
+        final note, or None if no draft was completed (the caller falls back to
+        the full transcript).
+        """
+        if self._task is not None and not self._task.done():
+            # Waiting for it would put a whole draft call on the critical path
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if not self.draft:
+            return None
+        return FINALIZE_PROMPT.format(draft=self.draft, logs=self._logs(self.drafted, len(self.transcript)) or "(none)")
+
+    def _logs(self, start: int, end: int) -> str:
+        return "\n".join(turn.line() for turn in self.transcript.turns[start:end])
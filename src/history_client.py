@@ -0,0 +1,138 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/history_client.py
+import asyncio
+import json
+import re
+from typing import Any, Dict, Optional, Tuple
+
+from src.cache import TTLCache
+
+# A plausible Patient ID anywhere in free text (any case), e.g. "it's pt-1004"
+PATIENT_ID_PATTERN = re.compile(r"PT-\d+", re.IGNORECASE)
+
+
+def normalize_patient_id(patient_id: str) -> str:
+    """Canonical form used for cache keys and lookups (e.g. ' pt-1004 ', 'pt 1004', 'PT_1004' -> 'PT-1004')."""
+    match = re.fullmatch(r"\s*([A-Za-z]{2})[\s_-]*(\d+)\s*", patient_id)
+    if match:
+        return f"{match.group(1).upper()}-{match.group(2)}"
+    return patient_id.strip().upper()
+
+
+class HistoryClient:
+    """
+    Client-side access to the HistoryArchivist MCP server.
+    Successful lookups are cached (LRU + TTL) so repeat lookups for the same
+    patient don't cross the process boundary again. Concurrent lookups for the
+    same ID share one in-flight MCP call, which is also what lets a speculative
+    prefetch() be picked up by the tool call that follows it.
+    """
+
+    def __init__(self, session: Any, tracer: Any, cache: Optional[TTLCache] = None):
+        # Anything with an MCP-style `call_tool(name, arguments=...)` coroutine
+        self.session = session
+        self.tracer = tracer
+        self.cache = cache if cache is not None else TTLCache()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._waiters: Dict[asyncio.Task, int] = {}
+
+    async def fetch(self, patient_id: str) -> str:
+        """Returns the history payload (or the server's error message) for a Patient ID."""
+        key = normalize_patient_id(patient_id)
+        cached = self.cache.get(key)
+        self.tracer.on_cache_lookup("history", key, cached is not None, self.cache.stats())
+        if cached is not None:
+            self.tracer.metrics.observe("history_fetch", 0.0, source="cache")
+            return cached
+
+        task = self._inflight.get(key)
+        if task is None:
+            task = self._start(key, prefetch=False)
+        else:
+            self.tracer.metrics.observe("history_fetch", 0.0, source="inflight")
+
+        self._waiters[task] = self._waiters.get(task, 0) + 1
+        # Shielded: a cancelled waiter must not cancel the lookup other waiters share
+        return await asyncio.shield(task)
+
+    def prefetch(self, patient_id: str) -> Optional[asyncio.Task]:
+        """
+        Starts a lookup without waiting for it. Returns the in-flight task, or
+        None if the record is already cached.
+        """
+        key = normalize_patient_id(patient_id)
+        if key in self.cache:
+            return None
+        return self._inflight.get(key) or self._start(key, prefetch=True)
+
+    def cancel_prefetch(self, task: Optional[asyncio.Task]) -> bool:
+        """Cancels a prefetch that is still running and that no fetch() has picked up."""
+        if task is None or task.done() or self._waiters.get(task):
+            return False
+        # Unregister first so no later fetch() joins a task that is being cancelled
+        for key, inflight in list(self._inflight.items()):
+            if inflight is task:
+                del self._inflight[key]
+        task.cancel()
+        self.tracer.logger.info("Cancelled unused history prefetch")
+        return True
+
+    def _start(self, key: str, prefetch: bool) -> asyncio.Task:
+        task = asyncio.create_task(self._fetch_remote(key, prefetch))
+        self._inflight[key] = task
+
+        def _done(finished: asyncio.Task) -> None:
+            if self._inflight.get(key) is finished:
+                del self._inflight[key]
+            self._waiters.pop(finished, None)
+            if not finished.cancelled():
+                finished.exception()  # Mark retrieved so unused prefetch failures aren't reported
+        task.add_done_callback(_done)
+        return task
+
+    async def _fetch_remote(self, key: str, prefetch: bool) -> str:
+        self.tracer.on_tool_call("get_patient_history", {"patient_id": key, "prefetch": prefetch})
+        with self.tracer.span("history_fetch", source="prefetch" if prefetch else "mcp"):
+            result = await self.session.call_tool("get_patient_history", arguments={"patient_id": key})
+        payload = result.content[0].text
+
+        # Only cache real records; an unknown ID may be registered later
+        if not result.isError and not payload.startswith("Error:"):
+            self.cache.set(key, payload)
+        return payload
+
+    async def find(self, name: str, dob: str, patient_id: str = "") -> Tuple[str, Optional[str]]:
+        """
+        Name + date-of-birth lookup (find_patient tool). Returns (payload, resolved Patient ID or
+        None). Never cached: the arguments are PII.
+        """
+        # Name and DOB are not traced either
+        self.tracer.on_tool_call("find_patient", {"patient_id": patient_id})
+        with self.tracer.span("history_find"):
+            result = await self.session.call_tool(
+                "find_patient", arguments={"name": name, "dob": dob, "patient_id": patient_id}
+            )
+        payload = result.content[0].text
+        try:
+            resolved = json.loads(payload).get("patient_id")
+        except (ValueError, AttributeError):
+            resolved = None
+        return payload, resolved
+
+    def invalidate(self, patient_id: Optional[str] = None) -> None:
+        """Drops one patient's cached history, or the whole cache when no ID is given."""
+        self.cache.invalidate(normalize_patient_id(patient_id) if patient_id else None)
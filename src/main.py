@@ -13,11 +13,10 @@
 # limitations under the License.
 
 
+import argparse
 import asyncio
-import os
 import logging
-import sys
-import datetime
+import os
 
 # --- 1. AGGRESSIVE LOGGING SUPPRESSION (Must be at the top) ---
 # Redirect standard logs to null or file to keep console clean
@@ -39,232 +38,100 @@ except ImportError:
 
 from dotenv import load_dotenv
 
-# ADK & GenAI
-from google.adk.runners import Runner
-from google.adk.sessions import DatabaseSessionService
-from sqlalchemy import create_engine
-import uuid
-
-from mcp import ClientSession, StdioServerParameters
-from mcp.client.stdio import stdio_client
-
-# Local Modules
-from src.agents.intake import IntakeCoordinator
-from src.agents.symptom import SymptomSpecialist
-from src.agents.scribe import ClinicalScribe
-from src.utils import get_or_create_session, run_agent_turn
-from src.plugins import FileLoggingPlugin
+# Local Modules (config only: the orchestrator pulls in google.adk, sqlalchemy and mcp, so each
+# mode imports what it needs; attaching to a running daemon never loads them)
+from src.config import SERVER_HOST, SERVER_PORT, HISTORY_SERVER_URL, DAEMON_ADDRESS
 
 load_dotenv()
 
-async def run_mediscreen():
-    # Setup our file tracer (Logs go here, not to screen)
-    today_str = datetime.datetime.now().strftime("%Y-%m-%d")
-    log_file_path = f"logs/agent_trace_{today_str}.log"
-    tracer = FileLoggingPlugin(log_file_path=log_file_path)
-    #Old: tracer = FileLoggingPlugin(log_file_path="logs/agent_trace.log")
-    
-    # We use the tracer's internal logger for system messages now
-    system_log = tracer.logger 
-    system_log.info("--- SYSTEM STARTUP ---")
-
-    # DB Setup
-    db_url = "sqlite:///mediscreen.db"
-    session_service = DatabaseSessionService(db_url=db_url)
-    system_log.info(f"--- Logging and Database Connection Initialized ---")
-
-    # MCP Setup
-    server_params = StdioServerParameters(
-        command="python",
-        args=["servers/history_server.py"],
-        env=os.environ
-    )
-
-    # We redirect stderr to devnull temporarily to hide MCP startup logs if needed
-    # But usually, the logging.CRITICAL above catches most python-based logs.
-    
-    async with stdio_client(server_params) as (read, write):
-        async with ClientSession(read, write) as session:
-            await session.initialize()
-
-            async def fetch_history_tool(patient_id: str):
-                tracer.on_tool_call("get_patient_history", {"patient_id": patient_id})
-                result = await session.call_tool("get_patient_history", arguments={"patient_id": patient_id})
-                return result.content[0].text
-
-            # Initialize Agents
-            intake_wrapper = IntakeCoordinator(tools=[fetch_history_tool])
-            symptom_wrapper = SymptomSpecialist()
-            scribe_wrapper = ClinicalScribe()
-            
-            app_name = "mediscreen_ai"
-
-            # Initialize Runners
-            intake_runner = Runner(agent=intake_wrapper.agent, session_service=session_service, app_name=app_name)
-            symptom_runner = Runner(agent=symptom_wrapper.agent, session_service=session_service, app_name=app_name)
-            scribe_runner = Runner(agent=scribe_wrapper.agent, session_service=session_service, app_name=app_name)
-
-            # Session Setup
-            USER_ID = "patient_cli_user" 
-            SESSION_ID = str(uuid.uuid4())
-
-            CURRENT_PATIENT_ID = USER_ID # Initialize with the generic CLI user ID
-            
-            # Log this to file, don't print
-            system_log.info(f"Initializing Session: {SESSION_ID}")
-            await get_or_create_session(session_service, app_name, USER_ID, SESSION_ID)
-
-            # --- MAIN LOOP SETUP ---
-            current_runner = intake_runner
-            current_agent_name = "IntakeCoordinator"
-            full_conversation_log = []
-
-            print("\n" + "="*80)
-            print("🏥  MEDISCREEN AI  ")
-            print("You are connected with MediScreen AI. To exit, type 'quit' or 'exit'.")
-            print("="*80 + "\n")
-
-            # --- 2. WARM START (Auto-Introduction) ---
-            # We send a hidden instruction to the agent to make it speak first.
-            start_instruction = "The user has connected. Introduce yourself and ask for their Patient ID."
-            tracer.before_agent(current_agent_name, "SYSTEM_TRIGGER: " + start_instruction)
-            
-            intro_response = await run_agent_turn(
-                runner=current_runner,
-                user_input=start_instruction,
-                user_id=USER_ID,
-                session_id=SESSION_ID
-            )
-            
-            print(f"{current_agent_name}: {intro_response}\n")
-            full_conversation_log.append(f"{current_agent_name}: {intro_response}")
-
-            # --- 3. INTERACTIVE LOOP ---
-            while True:
-                try:
-                    user_input = input("Patient: ")
-                except EOFError:
-                    break
-
-                # --- 4. EMPTY INPUT HANDLING ---
-                if not user_input.strip():
-                    # If the user enters nothing, check if the LLM has already spoken
-                    last_agent_message = next((msg.split(": ")[-1] for msg in reversed(full_conversation_log) if not msg.startswith("Patient")), "")
-                    
-                    if "thank you," in last_agent_message.lower() and "main reason" in last_agent_message.lower():
-                        # The agent has already asked the next question, so just remind the user.
-                        print(f"\n{current_agent_name}: I didn't catch that. Please share the main reason for your visit.\n")
-                    else:
-                        # If the agent hasn't responded yet (likely due to an ongoing tool call), 
-                        # just tell the user to wait and continue the loop without submitting an empty message.
-                        print(f"\n{current_agent_name}: Just a moment, I'm processing your Patient ID. Please wait few seconds or re-enter your ID.\n")
-                    
-                    #print(f"\n{current_agent_name}: I didn't catch that. Please type your response.\n")
-                    continue
-                
-                if user_input.lower() in ["quit", "exit"]:
-                    print("\n Thanks for using MediScreen AI. Closing Session. Goodbye!")
-                    break
-                
-                full_conversation_log.append(f"Patient: {user_input}")
-                tracer.before_agent(current_agent_name, user_input)
-
-                agent_response = await run_agent_turn(
-                    runner=current_runner,
-                    user_input=user_input,
-                    user_id=USER_ID,
-                    session_id=SESSION_ID
-                )
-                
-                tracer.after_model(current_agent_name, agent_response)
-
-                # Only print if we actually got text back (handles silent tool use)
-                if agent_response and agent_response.strip():
-                    print(f"\n{current_agent_name}: {agent_response}\n")
-                    full_conversation_log.append(f"{current_agent_name}: {agent_response}")
-                else:
-                    # If response is empty (rare, but happens on tool use sometimes), don't print a blank line
-                    pass 
-
-                # --- ROUTING LOGIC ---
-                if current_agent_name == "IntakeCoordinator":
-                    # Check if the IntakeCoordinator has responded with the patient's name
-                    if "thank you," in agent_response.lower() and "i see your file" in agent_response.lower():
-                        # Heuristic: The model's response should be immediately after the tool call.
-                        # We try to extract the ID from the user's *last* input.
-                        last_user_input = full_conversation_log[-2].split("Patient: ")[-1]
-                        
-                        # Use regex or a simple split to find the ID (e.g., PT-1004)
-                        import re
-                        match = re.search(r'(PT-\d+)', last_user_input, re.IGNORECASE)
-                        
-                        if match:
-                            # --- UPDATE THE DYNAMIC ID ---
-                            
-                            CURRENT_PATIENT_ID = match.group(0).upper()
-                            system_log.info(f"Patient ID successfully extracted and set to: {CURRENT_PATIENT_ID}")
-                    
-                    # Check for explicit handoff text
-                    if "specialist" in agent_response.lower() and "connect you" in agent_response.lower():
-                        system_log.info("Handing off to SymptomSpecialist")
-                        
-                        current_runner = symptom_runner
-                        current_agent_name = "SymptomSpecialist"
-                        
-                        # Warm Handoff
-                        # Ensure we use the most recently recognized ID for context
-                        handoff_context = f"Patient ID: {CURRENT_PATIENT_ID} is on the line. Complaint: {user_input}."
-                        
-                        # We run this hidden turn to get the specialist to greet the user
-                        greeting = await run_agent_turn(current_runner, handoff_context, USER_ID, SESSION_ID)
-                        print(f"\n{current_agent_name}: {greeting}\n")
-                        full_conversation_log.append(f"{current_agent_name}: {greeting}")
-
-                elif current_agent_name == "SymptomSpecialist":
-                    if "SUMMARY_COMPLETE" in agent_response:
-                        system_log.info("Interview Complete. Generating Note for Doctor to review.")
-                        #print("\n[Generating Clinical Note...]\n")
-                        
-                        scribe_input = f"GENERATE SOAP NOTE.\n[LOGS]: {' '.join(full_conversation_log)}"
-                        tracer.before_agent("ClinicalScribe", scribe_input)
-                        
-                        final_note = await run_agent_turn(scribe_runner, scribe_input, USER_ID, SESSION_ID)
-                        
-                        tracer.after_model("ClinicalScribe", final_note)
-                        
-                        # --- SAVE TO FILE ---
-                        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-                        filename = f"logs/{CURRENT_PATIENT_ID}_SOAP_Note_{timestamp}.txt"
-                        
-                        # Ensure logs dir exists (it should, but safety first)
-                        os.makedirs("logs", exist_ok=True)
-                        
-                        with open(filename, "w", encoding="utf-8") as f:
-                            f.write(final_note)
-                        # Print Clinical notes to console within separators, For Demo purposes
-                        print("="*50)
-                        print(final_note)
-                        print("="*50)
-                        #print(f"\n✅ Clinical Note saved to: {filename}")
-                        #print("System shutting down. Goodbye!")
-                        break
+async def attach(address: str) -> bool:
+    """Kiosk fast path: attaches the CLI to a running daemon. False if nothing is listening there."""
+    from src.client import run_cli_client
+    host, _, port = address.rpartition(":")
+    try:
+        await run_cli_client(host or "127.0.0.1", int(port))
+    except ConnectionRefusedError:
+        return False
+    return True
+
+async def run_mediscreen(history_url=HISTORY_SERVER_URL):
+    """Single-kiosk CLI: serves in-process on a loopback port and attaches the CLI as its client."""
+    if DAEMON_ADDRESS and await attach(DAEMON_ADDRESS):
+        return
+    from src.orchestrator import open_service
+    from src.server import serve
+    from src.client import run_cli_client
+    async with open_service(history_url=history_url) as service:
+        server = await serve(service, "127.0.0.1", 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            await run_cli_client("127.0.0.1", port)
+
+async def run_server(host: str, port: int, history_url=HISTORY_SERVER_URL, prewarm: bool = False):
+    """Multi-session mode: one process holds many concurrent intake conversations."""
+    from src.orchestrator import open_service
+    from src.server import serve
+    async with open_service(history_url=history_url) as service:
+        if prewarm:
+            # Daemon: runners, session DB and MCP children are already up; also prime the
+            # greeting cache and model connection so the first kiosk attaches instantly
+            await service.prewarm()
+        server = await serve(service, host, port)
+        service.system_log.info(f"--- Serving conversations on {host}:{port} ---")
+        print(f"🏥  MediScreen AI serving on {host}:{port} (Ctrl+C to stop)")
+        async with server:
+            await server.serve_forever()
+
+async def run_batch_mode(input_path: str, output_path: str, parallel: int, history_url=HISTORY_SERVER_URL,
+                         note_db: str = ""):
+    """
+    Headless mode: replays scripted conversations concurrently and writes SOAP notes + timings.
+    Replayed notes go to note_db (a scratch store), never to the production note store.
+    """
+    from src.orchestrator import open_service
+    from src.batch import run_batch
+    async with open_service(history_url=history_url, note_db=note_db) as service:
+        summary = await run_batch(service, input_path, output_path, parallel=parallel)
+        service.system_log.info(f"Batch replay finished: {summary}")
+    print(f"Batch replay: {summary}")
+    print(f"Results written to {output_path}")
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="MediScreen AI intake system")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--serve", action="store_true", help="Run the multi-session server")
+    mode.add_argument("--daemon", action="store_true",
+                      help="Run a pre-warmed server on loopback for kiosks to attach to (see MEDISCREEN_DAEMON)")
+    mode.add_argument("--connect", metavar="HOST:PORT", help="Attach the CLI to a running server")
+    mode.add_argument("--batch", metavar="FILE", help="Replay scripted conversations from a JSONL file")
+    parser.add_argument("--host", default=SERVER_HOST, help="Server bind address (with --serve)")
+    parser.add_argument("--port", type=int, default=SERVER_PORT, help="Server port (with --serve)")
+    parser.add_argument("--parallel", type=int, default=4, help="Concurrent conversations (with --batch)")
+    parser.add_argument("--output", default="logs/batch_results.jsonl", help="Results file (with --batch)")
+    parser.add_argument("--note-db", help="Note store for replayed SOAP notes (with --batch; default: "
+                                          "<output>.notes.db next to --output, \"\" for none)")
+    parser.add_argument("--history-url", default=HISTORY_SERVER_URL,
+                        help="Use a running history server (e.g. http://127.0.0.1:8766/mcp) instead of spawning one")
+    return parser.parse_args(argv)
+
+async def main(argv=None):
+    args = parse_args(argv)
+    if args.serve:
+        await run_server(args.host, args.port, history_url=args.history_url)
+    elif args.daemon:
+        await run_server("127.0.0.1", args.port, history_url=args.history_url, prewarm=True)
+    elif args.batch:
+        note_db = args.note_db if args.note_db is not None else os.path.splitext(args.output)[0] + ".notes.db"
+        await run_batch_mode(args.batch, args.output, args.parallel, history_url=args.history_url, note_db=note_db)
+    elif args.connect:
+        from src.client import run_cli_client
+        host, _, port = args.connect.rpartition(":")
+        await run_cli_client(host or "127.0.0.1", int(port))
+    else:
+        await run_mediscreen(history_url=args.history_url)
 
-'''                elif current_agent_name == "SymptomSpecialist":
-                    if "SUMMARY_COMPLETE" in agent_response:
-                        system_log.info("Interview Complete. Generating Note.")
-                        print("\n[Generating Clinical Note...]\n")
-                        
-                        scribe_input = f"GENERATE SOAP NOTE.\n[LOGS]: {' '.join(full_conversation_log)}"
-                        tracer.before_agent("ClinicalScribe", scribe_input)
-                        
-                        final_note = await run_agent_turn(scribe_runner, scribe_input, USER_ID, SESSION_ID)
-                        
-                        tracer.after_model("ClinicalScribe", final_note)
-                        print("="*50 + "\n" + final_note + "\n" + "="*50)
-                        break
-'''
 if __name__ == "__main__":
     try:
-        asyncio.run(run_mediscreen())
+        asyncio.run(main())
     except KeyboardInterrupt:
-        print("\nSystem forced shutdown.")
\ No newline at end of file
+        print("\nSystem forced shutdown.")
@@ -0,0 +1,204 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/mcp_pool.py
+# A pool of connections to the HistoryArchivist MCP server.
+# Each worker owns one connection (a stdio child process, or a session on a
+# shared HTTP server) + ClientSession inside its own supervisor task (MCP
+# transports must be entered and exited from the same task), and is
+# reconnected automatically when it dies or stops answering pings.
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Any, Callable, Dict, List, Optional
+
+from mcp import ClientSession, StdioServerParameters
+from mcp.client.stdio import stdio_client
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+
+
+def history_transport(server_params: Optional[StdioServerParameters] = None, url: Optional[str] = None) -> Callable:
+    """
+    Returns a factory of (read, write) stream pairs for one MCP connection.
+    With a URL, connects to an already-running server (".../sse" for SSE,
+    anything else for streamable HTTP); otherwise spawns a stdio child.
+    """
+    if not url:
+        return lambda: stdio_client(server_params)
+    if url.rstrip("/").endswith("/sse"):
+        return lambda: sse_client(url)
+
+    @asynccontextmanager
+    async def connect():
+        async with streamablehttp_client(url) as (read, write, _):
+            yield read, write
+    return connect
+
+
+class HistoryWorker:
+    """One supervised history server connection."""
+
+    def __init__(self, index: int, connect: Callable, tracer: Any,
+                 on_ready: asyncio.Event, health_interval: float = 15.0):
+        self.index = index
+        self.connect = connect
+        self.tracer = tracer
+        self.health_interval = health_interval
+
+        self.session: Optional[ClientSession] = None
+        self.in_flight = 0  # Calls currently queued on this worker's pipe
+        self.calls = 0
+        self.failures = 0
+        self.restarts = 0
+
+        self._on_ready = on_ready
+        self._ready = asyncio.Event()
+        self._dead = asyncio.Event()
+        self._stopping = False
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def alive(self) -> bool:
+        return self.session is not None
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._supervise(), name=f"history-worker-{self.index}")
+
+    def mark_dead(self) -> None:
+        """Asks the supervisor to tear the process down and start a new one."""
+        self.session = None
+        self._dead.set()
+
+    async def wait_ready(self) -> None:
+        await self._ready.wait()
+
+    async def _supervise(self) -> None:
+        backoff = 0.5
+        while not self._stopping:
+            try:
+                async with self.connect() as (read, write):
+                    async with ClientSession(read, write) as session:
+                        await session.initialize()
+                        self.session = session
+                        self._ready.set()
+                        self._on_ready.set()
+                        backoff = 0.5
+                        await self._watch(session)
+            except Exception as e:
+                self.tracer.on_error(e)
+            finally:
+                self.session = None
+                self._ready.clear()
+                self._dead.clear()
+
+            if self._stopping:
+                break
+            self.restarts += 1
+            self.tracer.logger.info(f"History worker {self.index} died; restarting in {backoff:.1f}s")
+            await asyncio.sleep(backoff)
+            backoff = min(backoff * 2, 10.0)
+
+    async def _watch(self, session: ClientSession) -> None:
+        """Parks until the worker is marked dead, stopped, or fails a health ping."""
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._dead.wait(), timeout=self.health_interval)
+                return
+            except asyncio.TimeoutError:
+                pass
+            try:
+                await asyncio.wait_for(session.send_ping(), timeout=5.0)
+            except Exception:
+                return
+
+    async def stop(self) -> None:
+        self._stopping = True
+        self._dead.set()
+        if self._task:
+            await self._task
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "worker": self.index,
+            "alive": self.alive,
+            "queue_depth": self.in_flight,
+            "calls": self.calls,
+            "failures": self.failures,
+            "restarts": self.restarts,
+        }
+
+
+class HistoryServerPool:
+    """
+    N history server connections behind one `call_tool` method.
+    Calls go to the live worker with the fewest in-flight calls; a call that
+    fails at the transport level marks its worker dead and is retried on
+    another one.
+    """
+
+    def __init__(self, size: int, connect: Callable, tracer: Any, ready_timeout: float = 30.0):
+        self.tracer = tracer
+        self.ready_timeout = ready_timeout
+        self._available = asyncio.Event()
+        self.workers: List[HistoryWorker] = [
+            HistoryWorker(i, connect, tracer, self._available) for i in range(max(1, size))
+        ]
+
+    async def __aenter__(self) -> "HistoryServerPool":
+        for worker in self.workers:
+            worker.start()
+        # Wait for the whole pool, but don't fail startup if a straggler is still retrying
+        await asyncio.wait(
+            [asyncio.create_task(worker.wait_ready()) for worker in self.workers],
+            timeout=self.ready_timeout,
+        )
+        self.tracer.logger.info(f"History server pool ready: {self.stats()}")
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await asyncio.gather(*(worker.stop() for worker in self.workers), return_exceptions=True)
+
+    async def _pick(self) -> HistoryWorker:
+        while True:
+            live = [worker for worker in self.workers if worker.alive]
+            if live:
+                return min(live, key=lambda worker: worker.in_flight)
+            self._available.clear()
+            await asyncio.wait_for(self._available.wait(), timeout=self.ready_timeout)
+
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None) -> Any:
+        """Same contract as ClientSession.call_tool, load-balanced across the pool."""
+        last_error: Optional[Exception] = None
+        for _ in range(len(self.workers)):
+            worker = await self._pick()
+            session = worker.session
+            worker.in_flight += 1
+            worker.calls += 1
+            try:
+                return await session.call_tool(name, arguments=arguments)
+            except Exception as e:
+                # Tool-level errors come back as results; an exception means the pipe is broken
+                worker.failures += 1
+                if worker.session is session:  # Don't kill a process that was already restarted
+                    worker.mark_dead()
+                self.tracer.on_error(e)
+                last_error = e
+            finally:
+                worker.in_flight -= 1
+        raise last_error
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Per-worker liveness and queue depth, for sizing the pool."""
+        return [worker.stats() for worker in self.workers]
@@ -0,0 +1,149 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/metrics.py
+# In-process latency metrics: labelled histograms with p50/p95/p99, exported
+# as Prometheus text or a JSON snapshot.
+import asyncio
+import json
+import os
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+# Upper bounds (seconds) of the cumulative Prometheus buckets
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+class LatencyHistogram:
+    """
+    Bucketed counts for export, plus a bounded window of recent samples from
+    which percentiles are computed.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS, window: int = 2048):
+        self.buckets = buckets
+        self.bucket_counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.count = 0
+        self.total = 0.0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, seconds: float) -> None:
+        self.bucket_counts[bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.recent.append(seconds)
+
+    def percentile(self, pct: float) -> float:
+        if not self.recent:
+            return 0.0
+        ordered = sorted(self.recent)
+        rank = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+        return ordered[rank]
+
+    def summary(self) -> Dict[str, float]:
+        return {
+            "count": self.count,
+            "mean_ms": round(1000 * self.total / self.count, 3) if self.count else 0.0,
+            "p50_ms": round(1000 * self.percentile(50), 3),
+            "p95_ms": round(1000 * self.percentile(95), 3),
+            "p99_ms": round(1000 * self.percentile(99), 3),
+        }
+
+
+class MetricsRegistry:
+    """Named, labelled latency histograms (e.g. agent_turn{agent="IntakeCoordinator"})."""
+
+    def __init__(self, namespace: str = "mediscreen"):
+        self.namespace = namespace
+        self._histograms: Dict[str, Dict[LabelKey, LatencyHistogram]] = {}
+
+    def observe(self, name: str, seconds: float, **labels: str) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        series = self._histograms.setdefault(name, {})
+        histogram = series.get(key)
+        if histogram is None:
+            histogram = series[key] = LatencyHistogram()
+        histogram.observe(seconds)
+
+    @contextmanager
+    def span(self, name: str, **labels: str) -> Iterator[None]:
+        """Times the enclosed block (sync or async code) into the named histogram."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started, **labels)
+
+    def snapshot(self) -> Dict[str, list]:
+        """JSON-friendly view: {metric: [{labels..., count, mean_ms, p50_ms, p95_ms, p99_ms}]}."""
+        return {
+            name: [{**dict(key), **histogram.summary()} for key, histogram in series.items()]
+            for name, series in self._histograms.items()
+        }
+
+    def to_prometheus(self) -> str:
+        """Prometheus text exposition format (histogram type, seconds)."""
+        lines = []
+        for name, series in self._histograms.items():
+            metric = f"{self.namespace}_{name}_seconds"
+            lines.append(f"# TYPE {metric} histogram")
+            for key, histogram in series.items():
+                base = [f'{k}="{v}"' for k, v in key]
+                cumulative = 0
+                for bound, count in zip(list(histogram.buckets) + ["+Inf"], histogram.bucket_counts):
+                    cumulative += count
+                    labels = ",".join(base + [f'le="{bound}"'])
+                    lines.append(f"{metric}_bucket{{{labels}}} {cumulative}")
+                label_str = "{" + ",".join(base) + "}" if base else ""
+                lines.append(f"{metric}_sum{label_str} {histogram.total:.6f}")
+                lines.append(f"{metric}_count{label_str} {histogram.count}")
+        return "\n".join(lines) + "\n"
+
+    def _render(self) -> Dict[str, str]:
+        return {"metrics.json": json.dumps(self.snapshot(), indent=2), "metrics.prom": self.to_prometheus()}
+
+    @staticmethod
+    def _write(directory: str, files: Dict[str, str]) -> None:
+        # Atomic replace: readers never see half a file
+        os.makedirs(directory, exist_ok=True)
+        for filename, content in files.items():
+            path = os.path.join(directory, filename)
+            with open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(path + ".tmp", path)
+
+    def write_files(self, directory: str) -> None:
+        """Writes metrics.json and metrics.prom into `directory`."""
+        self._write(directory, self._render())
+
+    async def export_periodically(self, directory: str, interval: float = 15.0) -> None:
+        """Background task: refreshes the export files every `interval` seconds until cancelled."""
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                # Render on the loop (histograms aren't thread-safe), write off it
+                await asyncio.to_thread(self._write, directory, self._render())
+        finally:
+            # Final export on shutdown
+            self.write_files(directory)
+
+
+# Process-wide default registry
+METRICS = MetricsRegistry()
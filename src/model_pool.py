@@ -0,0 +1,219 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/model_pool.py
+# Per-agent ordered pool of model backends with latency-aware failover.
+# Each backend keeps a rolling window of (latency, ok) samples. When its p95
+# latency or error rate crosses the threshold it is taken out of rotation for
+# a cooldown and requests go to the next backend in the list; after the
+# cooldown it is tried again with a fresh window. A request that fails before
+# producing output is retried on the next backend. Optionally a hedged
+# duplicate is sent to the next backend if the first hasn't answered within
+# hedge_after_ms, and whichever answers first wins.
+import asyncio
+import time
+from collections import deque
+from typing import Any, AsyncGenerator, Dict, List, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from pydantic import PrivateAttr
+
+_DONE = object()
+
+
+class BackendHealth:
+    """Rolling latency / error window for one backend, plus its cooldown state."""
+
+    def __init__(self, name: str, window: int = 50):
+        self.name = name
+        self.samples = deque(maxlen=window)  # (seconds, ok)
+        self.tripped_until = 0.0
+        self.trips = 0
+
+    def record(self, seconds: float, ok: bool) -> None:
+        self.samples.append((seconds, ok))
+
+    def p95(self) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(seconds for seconds, _ in self.samples)
+        return ordered[max(0, int(round(0.95 * len(ordered))) - 1)]
+
+    def error_rate(self) -> float:
+        if not self.samples:
+            return 0.0
+        return sum(1 for _, ok in self.samples if not ok) / len(self.samples)
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.tripped_until
+
+    def stats(self, now: float) -> Dict[str, Any]:
+        return {
+            "backend": self.name,
+            "healthy": self.healthy(now),
+            "samples": len(self.samples),
+            "p95_ms": round(1000 * self.p95(), 1),
+            "error_rate": round(self.error_rate(), 3),
+            "trips": self.trips,
+        }
+
+
+class ModelPool(BaseLlm):
+    """
+    Ordered backends for one agent (primary first). Any ADK model works as a
+    backend, so the selector can be exercised with ScriptedLlm stubs.
+    """
+
+    backends: List[Any]
+    agent: str = ""
+    p95_threshold_ms: float = 8000.0
+    error_rate_threshold: float = 0.5
+    window: int = 50
+    min_samples: int = 10
+    cooldown_seconds: float = 60.0
+    hedge_after_ms: float = 0.0  # 0 disables hedging
+    clock: Any = time.monotonic
+
+    _health: List[BackendHealth] = PrivateAttr(default_factory=list)
+    _counters: Dict[str, int] = PrivateAttr(default_factory=dict)
+
+    def model_post_init(self, __context: Any) -> None:
+        super().model_post_init(__context)
+        self._health = [BackendHealth(getattr(backend, "model", str(i)), self.window)
+                        for i, backend in enumerate(self.backends)]
+        self._counters = {"failovers": 0, "hedges": 0, "hedge_wins": 0}
+
+    def order(self) -> List[int]:
+        """Backend indices to try: healthy ones in configured order, then tripped ones by recovery time."""
+        now = self.clock()
+        healthy = [i for i, health in enumerate(self._health) if health.healthy(now)]
+        tripped = sorted((i for i in range(len(self._health)) if i not in healthy),
+                         key=lambda i: self._health[i].tripped_until)
+        return healthy + tripped
+
+    def record(self, index: int, seconds: float, ok: bool) -> None:
+        health = self._health[index]
+        health.record(seconds, ok)
+        if len(health.samples) < self.min_samples:
+            return
+        if health.p95() * 1000 > self.p95_threshold_ms or health.error_rate() > self.error_rate_threshold:
+            health.tripped_until = self.clock() + self.cooldown_seconds
+            health.trips += 1
+            health.samples.clear()  # Judge it afresh after the cooldown
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        order = self.order()
+        if self.hedge_after_ms > 0 and len(order) > 1:
+            async for response in self._hedged(llm_request, stream, order[0], order[1]):
+                yield response
+            return
+
+        last_error: Optional[Exception] = None
+        for position, index in enumerate(order):
+            if position:
+                self._counters["failovers"] += 1
+            started, produced = self.clock(), False
+            try:
+                async for response in self.backends[index].generate_content_async(self._request_for(index, llm_request),
+                                                                                  stream=stream):
+                    produced = True
+                    yield response
+            except Exception as e:
+                self.record(index, self.clock() - started, ok=False)
+                if produced:
+                    raise  # Can't splice a second backend into a half-streamed reply
+                last_error = e
+                continue
+            self.record(index, self.clock() - started, ok=True)
+            return
+        raise last_error
+
+    def _request_for(self, index: int, llm_request: LlmRequest) -> LlmRequest:
+        # ADK stamps the pool's model name on the request; each backend must see its own
+        return llm_request.model_copy(update={"model": self.backends[index].model})
+
+    async def _pump(self, index: int, llm_request: LlmRequest, stream: bool, queue: asyncio.Queue) -> None:
+        try:
+            async for response in self.backends[index].generate_content_async(self._request_for(index, llm_request),
+                                                                              stream=stream):
+                await queue.put((index, response, None))
+            await queue.put((index, _DONE, None))
+        except Exception as e:
+            await queue.put((index, None, e))
+
+    async def _hedged(self, llm_request: LlmRequest, stream: bool, first: int, second: int) -> AsyncGenerator[LlmResponse, None]:
+        queue: asyncio.Queue = asyncio.Queue()
+        tasks: Dict[int, asyncio.Task] = {}
+        started: Dict[int, float] = {}
+        failed: Dict[int, Exception] = {}
+        winner: Optional[int] = None
+
+        def launch(index: int) -> None:
+            started[index] = self.clock()
+            tasks[index] = asyncio.create_task(self._pump(index, llm_request, stream, queue))
+
+        launch(first)
+        hedge_deadline = asyncio.get_running_loop().time() + self.hedge_after_ms / 1000.0
+        try:
+            while True:
+                timeout = None
+                if winner is None and second not in tasks:
+                    timeout = max(0.0, hedge_deadline - asyncio.get_running_loop().time())
+                try:
+                    index, item, error = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    self._counters["hedges"] += 1
+                    launch(second)
+                    continue
+
+                if winner is None:
+                    if error is not None:
+                        self.record(index, self.clock() - started[index], ok=False)
+                        failed[index] = error
+                        if second not in tasks:
+                            launch(second)  # Primary failed early: fail over at once
+                        if len(failed) == len(tasks):
+                            raise error
+                        continue
+                    winner = index
+                    if index == second:
+                        self._counters["hedge_wins"] += 1
+                    for other, task in tasks.items():
+                        if other != winner:
+                            task.cancel()
+                            if other not in failed:
+                                # A lower bound on its latency, so a backend that keeps losing still trips
+                                self.record(other, self.clock() - started[other], ok=True)
+                if index != winner:
+                    continue
+                if error is not None:
+                    self.record(index, self.clock() - started[index], ok=False)
+                    raise error
+                if item is _DONE:
+                    self.record(index, self.clock() - started[index], ok=True)
+                    return
+                yield item
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+    def connect(self, llm_request: LlmRequest):
+        return self.backends[self.order()[0]].connect(llm_request)
+
+    def stats(self) -> Dict[str, Any]:
+        now = self.clock()
+        return {"agent": self.agent, **self._counters, "backends": [health.stats(now) for health in self._health]}
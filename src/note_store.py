@@ -0,0 +1,150 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/note_store.py
+# SQLite store for finished SOAP notes, indexed by (patient_id, created_at)
+# and by created_at. Writes and queries run on a worker thread, so saving a
+# note never blocks the event loop.
+#
+#   python -m src.note_store --patient PT-1001             # latest note for a patient
+#   python -m src.note_store --since 2025-11-01 --until 2025-11-30
+import asyncio
+import datetime
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional, Union
+
+Timestamp = Union[float, datetime.datetime, datetime.date, str]
+
+
+def to_epoch(value: Timestamp) -> float:
+    """Epoch seconds from an epoch, a datetime/date (local time if naive) or an ISO date string."""
+    if isinstance(value, (int, float)):
+        return float(value)
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value)
+    if not isinstance(value, datetime.datetime):
+        value = datetime.datetime.combine(value, datetime.time())
+    return value.timestamp()
+
+
+class NoteStore:
+    """
+    Append-mostly SOAP note store.
+    latest() and between() are single index range scans, so they stay fast
+    however many notes accumulate.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS notes ("
+                " id INTEGER PRIMARY KEY,"
+                " patient_id TEXT NOT NULL,"
+                " session_id TEXT,"
+                " created_at REAL NOT NULL,"
+                " note TEXT NOT NULL)"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS notes_patient_time ON notes (patient_id, created_at)")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS notes_time ON notes (created_at)")
+
+    # --- async API (event loop side) ---
+
+    async def save(self, patient_id: str, note: str, session_id: Optional[str] = None,
+                   created_at: Optional[float] = None) -> int:
+        """Stores a note off the event loop. Returns its row ID."""
+        return await asyncio.to_thread(self.save_sync, patient_id, note, session_id, created_at)
+
+    async def latest(self, patient_id: str) -> Optional[Dict[str, Any]]:
+        return await asyncio.to_thread(self.latest_sync, patient_id)
+
+    async def between(self, start: Timestamp, end: Timestamp, patient_id: Optional[str] = None,
+                      limit: int = 1000) -> List[Dict[str, Any]]:
+        return await asyncio.to_thread(self.between_sync, start, end, patient_id, limit)
+
+    # --- blocking implementations ---
+
+    def save_sync(self, patient_id: str, note: str, session_id: Optional[str] = None,
+                  created_at: Optional[float] = None) -> int:
+        with self._lock, self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO notes (patient_id, session_id, created_at, note) VALUES (?, ?, ?, ?)",
+                (patient_id, session_id, created_at if created_at is not None else time.time(), note),
+            )
+            return cursor.lastrowid
+
+    def latest_sync(self, patient_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM notes WHERE patient_id = ? ORDER BY created_at DESC LIMIT 1", (patient_id,)
+            ).fetchone()
+        return self._to_dict(row) if row else None
+
+    def between_sync(self, start: Timestamp, end: Timestamp, patient_id: Optional[str] = None,
+                     limit: int = 1000) -> List[Dict[str, Any]]:
+        """Notes with start <= created_at < end, oldest first (optionally for one patient)."""
+        query = "SELECT * FROM notes WHERE created_at >= ? AND created_at < ?"
+        params: List[Any] = [to_epoch(start), to_epoch(end)]
+        if patient_id:
+            query += " AND patient_id = ?"
+            params.append(patient_id)
+        query += " ORDER BY created_at LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self._conn.execute(query, params).fetchall()
+        return [self._to_dict(row) for row in rows]
+
+    @staticmethod
+    def _to_dict(row: sqlite3.Row) -> Dict[str, Any]:
+        note = dict(row)
+        note["created"] = datetime.datetime.fromtimestamp(note["created_at"]).isoformat(timespec="seconds")
+        return note
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    import os
+
+    parser = argparse.ArgumentParser(description="Query stored SOAP notes")
+    parser.add_argument("--db", default=os.getenv("MEDISCREEN_NOTE_DB", "soap_notes.db"))
+    parser.add_argument("--patient", help="Patient ID (latest note, or filter for --since/--until)")
+    parser.add_argument("--since", help="ISO date/time, inclusive")
+    parser.add_argument("--until", help="ISO date/time, exclusive (default: now)")
+    args = parser.parse_args()
+
+    store = NoteStore(args.db)
+    if args.since:
+        notes = store.between_sync(args.since, args.until or time.time(), patient_id=args.patient)
+    elif args.patient:
+        notes = [note for note in [store.latest_sync(args.patient)] if note]
+    else:
+        parser.error("give --patient and/or --since")
+    for note in notes:
+        print(f"=== {note['patient_id']}  {note['created']}  (session {note['session_id']}) ===")
+        print(note["note"] + "\n")
@@ -0,0 +1,469 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/orchestrator.py
+# Routing logic shared by every front end (CLI, TCP server).
+# One MediScreenService holds the Runners, the session DB and the MCP client;
+# each patient gets a lightweight Conversation carrying its own routing state.
+import asyncio
+import os
+import re
+import uuid
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from google.adk.runners import Runner
+
+from mcp import StdioServerParameters
+
+from src.agents.intake import IntakeCoordinator
+from src.agents.symptom import SymptomSpecialist
+from src.agents.scribe import ClinicalScribe
+from src.utils import AGENT_ERROR_PREFIX, get_or_create_session, record_turn, run_agent_turn
+from src.plugins import FileLoggingPlugin
+from src.cache import TTLCache
+from src.config import HISTORY_CACHE_SIZE, HISTORY_CACHE_TTL, HISTORY_POOL_SIZE, HISTORY_SERVER_URL
+from src.config import TRACE_MAX_BYTES, TRACE_BACKUP_COUNT, TRACE_MAX_PAYLOAD_CHARS, TRACE_PAYLOAD_SAMPLE_RATE
+from src.config import LOG_DIR, METRICS_EXPORT_INTERVAL, INTAKE_RULES_ENABLED, TRANSCRIPT_DIR, SCRIBE_MAX_TOKENS
+from src.config import SOAP_DRAFTING_ENABLED, SESSION_DB_POOL_SIZE, SESSION_WRITE_BEHIND, SESSION_DB_URL
+from src.config import SESSION_TTL, SESSION_COMPACT_AFTER, SESSION_ARCHIVE_DIR, RETENTION_INTERVAL
+from src.config import NOTE_DB_PATH, RESPONSE_CACHE_ENABLED, RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL
+from src.config import MODEL_POOLS, AGENT_PROMPT_BUDGETS, get_model_governor
+from src.session_store import InstrumentedSessionService
+from src.history_client import HistoryClient, PATIENT_ID_PATTERN
+from src.mcp_pool import HistoryServerPool, history_transport
+from src.rules import IntakeRules, RuleResult
+from src.transcript import PATIENT, Transcript, transcript_path
+from src.drafting import SoapDrafter
+from src.retention import SessionRetention
+from src.note_store import NoteStore
+from src.response_cache import CacheRule, ResponseCache
+from src.prompt_budget import PromptBudget
+
+APP_NAME = "mediscreen_ai"
+DB_URL = SESSION_DB_URL
+
+# Receives (agent_name, partial_text) while an agent's reply is being generated
+ChunkCallback = Callable[[str, str], Awaitable[None]]
+
+# Hidden instruction sent to the IntakeCoordinator so it speaks first.
+START_INSTRUCTION = "The user has connected. Introduce yourself and ask for their Patient ID."
+
+# Turns whose reply doesn't depend on the conversation, so it can be served from the response cache
+RESPONSE_CACHE_RULES = [
+    CacheRule("IntakeCoordinator", re.escape(START_INSTRUCTION)),
+]
+
+
+class Reply:
+    """One message for the patient. kind is 'message' for chat text or 'note' for the final SOAP note."""
+
+    def __init__(self, agent: str, text: str, kind: str = "message"):
+        self.agent = agent
+        self.text = text
+        self.kind = kind
+
+    def to_dict(self) -> Dict[str, str]:
+        return {"type": self.kind, "agent": self.agent, "text": self.text}
+
+
+class Conversation:
+    """Per-patient routing state: active agent, extracted Patient ID and transcript."""
+
+    def __init__(self, user_id: str, session_id: Optional[str] = None):
+        self.user_id = user_id
+        self.session_id = session_id or str(uuid.uuid4())
+        self.current_agent = "IntakeCoordinator"
+        self.patient_id = user_id  # Initialize with the generic user ID until one is verified
+        self.resolved_patient_id: Optional[str] = None  # Set by find_patient_tool (name + DOB lookup)
+        self.transcript = Transcript()
+        self.drafter: Optional[SoapDrafter] = None  # Background SOAP draft, once the interview starts
+        self.done = False
+
+
+# The conversation whose turn is running, so tools can record what they resolve on it
+CURRENT_CONVERSATION: ContextVar[Optional[Conversation]] = ContextVar("current_conversation", default=None)
+
+
+class MediScreenService:
+    """Serves any number of concurrent Conversations over one set of Runners."""
+
+    def __init__(self, runners: Dict[str, Runner], session_service: Any, tracer: FileLoggingPlugin,
+                 history_client: HistoryClient, history_pool: Optional[HistoryServerPool] = None,
+                 intake_rules: Optional[IntakeRules] = None, note_store: Optional[NoteStore] = None,
+                 response_cache: Optional[ResponseCache] = None, prompt_budget: Optional[PromptBudget] = None,
+                 app_name: str = APP_NAME):
+        self.runners = runners
+        self.session_service = session_service
+        self.tracer = tracer
+        self.history_client = history_client
+        self.history_pool = history_pool
+        self.intake_rules = intake_rules
+        self.note_store = note_store
+        self.response_cache = response_cache
+        self.prompt_budget = prompt_budget
+        if response_cache is not None:
+            for name, runner in runners.items():
+                response_cache.register_agent(name, runner.agent)
+        self.app_name = app_name
+        self.system_log = tracer.logger
+
+    def stats(self) -> Dict[str, Any]:
+        """Operational counters for sizing the deployment."""
+        return {
+            "history_cache": self.history_client.cache.stats(),
+            "history_pool": self.history_pool.stats() if self.history_pool else [],
+            "response_cache": self.response_cache.stats() if self.response_cache else {},
+            "model_governor": get_model_governor().stats(),
+            "model_pools": [pool.stats() for pool in MODEL_POOLS.values()],
+            "prompt_size": self.prompt_budget.stats() if self.prompt_budget else {},
+            "latency": self.tracer.metrics.snapshot(),
+        }
+
+    async def start_conversation(self, user_id: str, session_id: Optional[str] = None,
+                                 on_chunk: Optional[ChunkCallback] = None):
+        """Creates the session and runs the warm start. Returns (conversation, replies)."""
+        conv = Conversation(user_id, session_id)
+
+        # Log this to file, don't print
+        self.system_log.info(f"Initializing Session: {conv.session_id}")
+        await get_or_create_session(self.session_service, self.app_name, conv.user_id, conv.session_id)
+
+        self.tracer.before_agent(conv.current_agent, "SYSTEM_TRIGGER: " + START_INSTRUCTION)
+        intro_response = await self._run(conv, conv.current_agent, START_INSTRUCTION, on_chunk)
+        conv.transcript.append(conv.current_agent, intro_response)
+        await self._persist_transcript(conv)
+        return conv, [Reply(conv.current_agent, intro_response)]
+
+    async def prewarm(self) -> None:
+        """
+        Runs one throwaway warm start (daemon startup), so the first real session
+        finds the greeting in the response cache and the model connection open.
+        """
+        with self.tracer.span("prewarm"):
+            conv, _ = await self.start_conversation("prewarm", session_id=f"prewarm_{uuid.uuid4().hex[:8]}")
+        # Its events must be written before the session can be deleted
+        flush = getattr(self.session_service, "flush", None)
+        if flush is not None:
+            await flush(conv.session_id)
+        await self.session_service.delete_session(app_name=self.app_name, user_id=conv.user_id,
+                                                  session_id=conv.session_id)
+        if TRANSCRIPT_DIR and os.path.exists(transcript_path(TRANSCRIPT_DIR, conv.session_id)):
+            os.remove(transcript_path(TRANSCRIPT_DIR, conv.session_id))
+
+    async def handle_input(self, conv: Conversation, user_input: str,
+                           on_chunk: Optional[ChunkCallback] = None) -> List[Reply]:
+        """
+        Runs one patient turn through the active agent and applies the routing rules.
+        Partial text is streamed to on_chunk as it arrives; routing always runs on the final text.
+        """
+        # --- EMPTY INPUT HANDLING ---
+        if not user_input.strip():
+            # If the user enters nothing, check if the LLM has already spoken
+            last_agent_turn = conv.transcript.latest("agent")
+            last_agent_message = last_agent_turn.text if last_agent_turn else ""
+
+            if "thank you," in last_agent_message.lower() and "main reason" in last_agent_message.lower():
+                # The agent has already asked the next question, so just remind the user.
+                return [Reply(conv.current_agent, "I didn't catch that. Please share the main reason for your visit.")]
+            # If the agent hasn't responded yet (likely due to an ongoing tool call),
+            # just tell the user to wait without submitting an empty message.
+            return [Reply(conv.current_agent, "Just a moment, I'm processing your Patient ID. Please wait few seconds or re-enter your ID.")]
+
+        replies = []
+        conv.transcript.append(PATIENT, user_input)
+        self.tracer.before_agent(conv.current_agent, user_input)
+
+        # Rule stage: ID checks and emergencies are answered without a model round trip
+        rule = await self._apply_rules(conv, user_input)
+        if rule is not None:
+            agent_response = rule.reply
+        else:
+            # Speculative prefetch: start the history lookup now, concurrently with the model turn;
+            # fetch_history_tool joins it instead of issuing its own MCP call
+            prefetch = None
+            if conv.current_agent == "IntakeCoordinator":
+                id_match = PATIENT_ID_PATTERN.search(user_input)
+                if id_match:
+                    prefetch = self.history_client.prefetch(id_match.group(0))
+
+            token = CURRENT_CONVERSATION.set(conv)
+            try:
+                agent_response = await self._run(conv, conv.current_agent, user_input, on_chunk)
+            finally:
+                CURRENT_CONVERSATION.reset(token)
+                self.history_client.cancel_prefetch(prefetch)
+
+        self.tracer.after_model(conv.current_agent, agent_response)
+
+        # Only reply if we actually got text back (handles silent tool use)
+        if agent_response and agent_response.strip():
+            replies.append(Reply(conv.current_agent, agent_response))
+            conv.transcript.append(conv.current_agent, agent_response)
+
+        # --- ROUTING LOGIC ---
+        if conv.current_agent == "IntakeCoordinator":
+            # Check if the IntakeCoordinator has responded with the patient's name
+            if "thank you," in agent_response.lower() and "i see your file" in agent_response.lower():
+                # Heuristic: The model's response should be immediately after the tool call.
+                # We take the ID extracted from the user's *last* input (e.g., PT-1004).
+                extracted_id = conv.transcript.latest("patient").entities.get("patient_id")
+
+                if rule is not None and rule.patient_id:
+                    # The rule stage already normalized and verified it
+                    conv.patient_id = rule.patient_id
+                    self.system_log.info(f"Patient ID successfully extracted and set to: {conv.patient_id}")
+                elif conv.resolved_patient_id:
+                    # Found by name + DOB; this turn holds those, not the ID
+                    conv.patient_id = conv.resolved_patient_id
+                    self.system_log.info(f"Patient ID resolved by name and DOB: {conv.patient_id}")
+                elif extracted_id:
+                    # --- UPDATE THE DYNAMIC ID ---
+                    conv.patient_id = extracted_id
+                    self.system_log.info(f"Patient ID successfully extracted and set to: {conv.patient_id}")
+
+            # Check for explicit handoff text
+            if "specialist" in agent_response.lower() and "connect you" in agent_response.lower():
+                self.system_log.info("Handing off to SymptomSpecialist")
+                conv.current_agent = "SymptomSpecialist"
+
+                # Warm Handoff
+                # Ensure we use the most recently recognized ID for context
+                handoff_context = f"Patient ID: {conv.patient_id} is on the line. Complaint: {user_input}."
+
+                # We run this hidden turn to get the specialist to greet the user
+                greeting = await self._run(conv, conv.current_agent, handoff_context, on_chunk)
+                replies.append(Reply(conv.current_agent, greeting))
+                conv.transcript.append(conv.current_agent, greeting)
+
+        elif conv.current_agent == "SymptomSpecialist":
+            if "SUMMARY_COMPLETE" in agent_response:
+                self.system_log.info("Interview Complete. Generating Note for Doctor to review.")
+                final_note = await self._generate_note(conv)
+                replies.append(Reply("ClinicalScribe", final_note, kind="note"))
+                conv.done = True
+            elif SOAP_DRAFTING_ENABLED:
+                # Fold this turn into the running draft, off the critical path
+                self._schedule_draft(conv)
+
+        await self._persist_transcript(conv)
+        return replies
+
+    async def _persist_transcript(self, conv: Conversation) -> None:
+        """Appends this turn's new transcript entries to the session's JSONL file (off the event loop)."""
+        if TRANSCRIPT_DIR:
+            await asyncio.to_thread(conv.transcript.persist, transcript_path(TRANSCRIPT_DIR, conv.session_id))
+
+    async def _apply_rules(self, conv: Conversation, user_input: str) -> Optional[RuleResult]:
+        """Runs the intake rule stage; a hit is written to the session so the model keeps the context."""
+        if self.intake_rules is None or conv.current_agent != "IntakeCoordinator":
+            return None
+        with self.tracer.span("intake_rules"):
+            rule = await self.intake_rules.evaluate(user_input)
+        if rule is None:
+            return None
+
+        self.system_log.info(f"Intake rule '{rule.rule}' answered without a model call")
+        with self.tracer.span("agent_turn", agent=conv.current_agent, path="rules"):
+            await record_turn(self.session_service, self.app_name, conv.user_id, conv.session_id,
+                              conv.current_agent, user_input, rule.reply, tool_call=rule.tool_call)
+        return rule
+
+    def _schedule_draft(self, conv: Conversation) -> None:
+        if conv.drafter is None:
+            # Drafts live in their own session so the interview agents never see them
+            draft_session_id = f"{conv.session_id}_draft"
+            session_ready = False
+
+            async def run_draft(prompt: str) -> str:
+                nonlocal session_ready
+                if not session_ready:
+                    await get_or_create_session(self.session_service, self.app_name, conv.user_id, draft_session_id)
+                    session_ready = True
+                return await run_agent_turn(self.runners["ClinicalScribe"], prompt, conv.user_id, draft_session_id)
+
+            conv.drafter = SoapDrafter(conv.transcript, run_draft, self.tracer)
+        conv.drafter.schedule()
+
+    async def _generate_note(self, conv: Conversation) -> str:
+        # Reconcile the background draft with the last few turns when there is one;
+        # otherwise a compact, token-bounded view instead of the whole raw log
+        scribe_input = await conv.drafter.finalize_prompt() if conv.drafter else None
+        if scribe_input:
+            self.system_log.info(f"Finalizing SOAP draft ({conv.drafter.updates} background updates)")
+        else:
+            scribe_input = f"GENERATE SOAP NOTE.\n[LOGS]:\n{conv.transcript.scribe_view(SCRIBE_MAX_TOKENS)}"
+        self.tracer.before_agent("ClinicalScribe", scribe_input)
+
+        final_note = await self._run(conv, "ClinicalScribe", scribe_input)
+
+        self.tracer.after_model("ClinicalScribe", final_note)
+
+        # --- SAVE TO NOTE STORE --- (indexed by patient and date; written off the event loop)
+        if self.note_store is not None:
+            with self.tracer.span("note_write"):
+                note_id = await self.note_store.save(conv.patient_id, final_note, session_id=conv.session_id)
+            self.system_log.info(f"SOAP note {note_id} saved for {conv.patient_id}")
+        return final_note
+
+    async def _run(self, conv: Conversation, agent_name: str, user_input: str,
+                   on_chunk: Optional[ChunkCallback] = None) -> str:
+        rule = self.response_cache.rule_for(agent_name, user_input) if self.response_cache else None
+        if rule is not None:
+            cached = self.response_cache.get(agent_name, user_input)
+            self.tracer.on_cache_lookup("response", agent_name, cached is not None, self.response_cache.stats())
+            if cached is not None:
+                with self.tracer.span("agent_turn", agent=agent_name, path="cache"):
+                    # Written to the session as if the agent had run, so its later turns see it
+                    await record_turn(self.session_service, self.app_name, conv.user_id, conv.session_id,
+                                      agent_name, user_input, cached)
+                return cached
+
+        forward = None
+        if on_chunk is not None:
+            async def forward(text: str) -> None:
+                await on_chunk(agent_name, text)
+
+        try:
+            with self.tracer.span("agent_turn", agent=agent_name):
+                reply = await run_agent_turn(self.runners[agent_name], user_input, conv.user_id, conv.session_id,
+                                             on_chunk=forward)
+        finally:
+            self.tracer.end_turn(conv.session_id)
+        if rule is not None and reply and not reply.startswith(AGENT_ERROR_PREFIX):
+            self.response_cache.set(agent_name, user_input, reply, rule)
+        return reply
+
+
+@asynccontextmanager
+async def open_service(db_url: str = DB_URL, history_url: Optional[str] = HISTORY_SERVER_URL,
+                       note_db: str = NOTE_DB_PATH):
+    """
+    Builds the shared tracer, session DB, MCP client and Runners, and yields a MediScreenService.
+    With history_url, connects to a running HistoryArchivist HTTP service instead of spawning children.
+    Finished SOAP notes are saved to note_db ("" keeps them out of any note store).
+    """
+    # Setup our file tracer (Logs go here, not to screen); rotates by date and size
+    tracer = FileLoggingPlugin(
+        log_dir=LOG_DIR,
+        max_bytes=TRACE_MAX_BYTES,
+        backup_count=TRACE_BACKUP_COUNT,
+        max_payload_chars=TRACE_MAX_PAYLOAD_CHARS,
+        payload_sample_rate=TRACE_PAYLOAD_SAMPLE_RATE,
+    )
+
+    metrics_export = None
+    retention_task = None
+    note_store = None
+    session_service = None
+    try:
+        # We use the tracer's internal logger for system messages now
+        system_log = tracer.logger
+        system_log.info("--- SYSTEM STARTUP ---")
+
+        # DB Setup
+        session_service = InstrumentedSessionService(db_url=db_url, metrics=tracer.metrics,
+                                                     pool_size=SESSION_DB_POOL_SIZE,
+                                                     write_behind=SESSION_WRITE_BEHIND)
+        system_log.info(f"--- Logging and Database Connection Initialized ---")
+
+        # Compact / archive / vacuum old sessions in the background
+        if RETENTION_INTERVAL > 0:
+            retention = SessionRetention(session_service, db_url, APP_NAME, tracer, ttl_seconds=SESSION_TTL,
+                                         compact_after=SESSION_COMPACT_AFTER, archive_dir=SESSION_ARCHIVE_DIR,
+                                         transcript_dir=TRANSCRIPT_DIR)
+            retention_task = asyncio.create_task(retention.run_periodically(RETENTION_INTERVAL))
+
+        # Latency histograms -> logs/metrics.json + logs/metrics.prom
+        metrics_export = asyncio.create_task(tracer.metrics.export_periodically(LOG_DIR, METRICS_EXPORT_INTERVAL))
+
+        # Finished SOAP notes, queryable by patient and date
+        if note_db:
+            note_store = NoteStore(note_db)
+
+        # Process-wide history cache, shared by every session served by this process
+        history_cache = TTLCache(max_size=HISTORY_CACHE_SIZE, ttl_seconds=HISTORY_CACHE_TTL)
+
+        # MCP Setup
+        server_params = StdioServerParameters(
+            command="python",
+            args=["-m", "servers.history_server"],
+            env=os.environ
+        )
+
+        if history_url:
+            system_log.info(f"--- Using shared history server at {history_url} ---")
+
+        # N history server connections; tool calls go to the least-loaded one
+        connect = history_transport(server_params, url=history_url)
+        async with HistoryServerPool(HISTORY_POOL_SIZE, connect, tracer) as pool:
+            history_client = HistoryClient(pool, tracer, cache=history_cache)
+
+            async def fetch_history_tool(patient_id: str):
+                return await history_client.fetch(patient_id)
+
+            async def find_patient_tool(name: str, dob: str, patient_id: str = ""):
+                """Finds a patient's history by full name and date of birth when their Patient ID was not found."""
+                payload, resolved_id = await history_client.find(name, dob, patient_id)
+                conv = CURRENT_CONVERSATION.get()
+                if resolved_id and conv is not None:
+                    conv.resolved_patient_id = resolved_id
+                return payload
+
+            # Initialize Agents (every request is measured and held to its agent's
+            # prompt budget, then the tracer's callbacks time it)
+            prompt_budget = PromptBudget(tracer, AGENT_PROMPT_BUDGETS)
+            model_callbacks = {
+                "before_model_callback": prompt_budget.before_model_callback,
+                "after_model_callback": tracer.after_model_callback,
+            }
+            intake_wrapper = IntakeCoordinator(tools=[fetch_history_tool, find_patient_tool], **model_callbacks)
+            symptom_wrapper = SymptomSpecialist(**model_callbacks)
+            scribe_wrapper = ClinicalScribe(**model_callbacks)
+
+            # Initialize Runners (shared by every conversation)
+            runners = {
+                "IntakeCoordinator": Runner(agent=intake_wrapper.agent, session_service=session_service, app_name=APP_NAME),
+                "SymptomSpecialist": Runner(agent=symptom_wrapper.agent, session_service=session_service, app_name=APP_NAME),
+                "ClinicalScribe": Runner(agent=scribe_wrapper.agent, session_service=session_service, app_name=APP_NAME),
+            }
+
+            response_cache = None
+            if RESPONSE_CACHE_ENABLED:
+                response_cache = ResponseCache(RESPONSE_CACHE_RULES, max_size=RESPONSE_CACHE_SIZE,
+                                               ttl_seconds=RESPONSE_CACHE_TTL)
+
+            intake_rules = IntakeRules(history_client, tracer) if INTAKE_RULES_ENABLED else None
+            if intake_rules is None:
+                system_log.info("--- Intake rule stage disabled; every turn goes to the model ---")
+
+            yield MediScreenService(runners, session_service, tracer, history_client, history_pool=pool,
+                                    intake_rules=intake_rules, note_store=note_store,
+                                    response_cache=response_cache, prompt_budget=prompt_budget)
+    finally:
+        if retention_task is not None:
+            retention_task.cancel()
+            await asyncio.gather(retention_task, return_exceptions=True)
+        if session_service is not None:
+            # Don't lose the last turn's batched events
+            await session_service.flush()
+        if note_store is not None:
+            note_store.close()
+        if metrics_export is not None:
+            metrics_export.cancel()
+            await asyncio.gather(metrics_export, return_exceptions=True)
+        # Flush queued trace records on shutdown
+        tracer.close()
@@ -13,10 +13,90 @@
 # limitations under the License.
 
 
+import atexit
+import datetime
+import json
 import logging
-import time 
+import logging.handlers
 import os
-from typing import Any, Dict
+import queue
+import random
+import time
+import traceback
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+from src.metrics import METRICS, MetricsRegistry
+
+
+class DailySizeRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Writes to {log_dir}/{prefix}_{YYYY-MM-DD}.jsonl.
+    Switches to a new file when the date changes, and rolls over to numbered
+    backups (.1, .2, ...) when the current file exceeds max_bytes.
+    """
+
+    def __init__(self, log_dir: str, prefix: str, max_bytes: int, backup_count: int):
+        self.log_dir = log_dir
+        self.prefix = prefix
+        self.current_date = self._today()
+        super().__init__(self._path_for(self.current_date), maxBytes=max_bytes,
+                         backupCount=backup_count, encoding="utf-8", delay=True)
+
+    @staticmethod
+    def _today() -> str:
+        return datetime.date.today().isoformat()
+
+    def _path_for(self, date_str: str) -> str:
+        return os.path.abspath(os.path.join(self.log_dir, f"{self.prefix}_{date_str}.jsonl"))
+
+    def shouldRollover(self, record: logging.LogRecord) -> bool:
+        if self._today() != self.current_date:
+            return True
+        return bool(super().shouldRollover(record))
+
+    def doRollover(self) -> None:
+        today = self._today()
+        if today != self.current_date:
+            # New day: start a fresh file instead of renaming yesterday's
+            if self.stream:
+                self.stream.close()
+                self.stream = None
+            self.current_date = today
+            self.baseFilename = self._path_for(today)
+            return
+        super().doRollover()
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """One JSON object per line. Structured events travel in record.trace."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+        }
+        trace = getattr(record, "trace", None)
+        if trace:
+            entry.update(trace)
+        else:
+            entry["event"] = "log"
+            entry["message"] = record.getMessage()
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Never blocks the caller: when the queue is full, the record is counted and dropped."""
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
 
 
 class FileLoggingPlugin:
@@ -26,48 +106,144 @@ class FileLoggingPlugin:
     1. Agent Execution Start (before_agent)
     2. Model Call Start (before_model)
     3. Tool Execution (before_tool/after_tool)
+
+    Records are handed to a background thread through a bounded queue and
+    written as JSONL, so tracing never stalls a conversation turn.
     """
 
-    def __init__(self, log_file_path: str = "logs/agent_trace.log"):
+    def __init__(self, log_dir: str = "logs", prefix: str = "agent_trace",
+                 max_bytes: int = 50 * 1024 * 1024, backup_count: int = 10,
+                 max_payload_chars: int = 2000, payload_sample_rate: float = 1.0,
+                 queue_size: int = 10000, metrics: Optional[MetricsRegistry] = None):
         # Ensure logs directory exists
-        os.makedirs(os.path.dirname(log_file_path), exist_ok=True)
-        
+        os.makedirs(log_dir, exist_ok=True)
+        self.max_payload_chars = max_payload_chars
+        self.payload_sample_rate = payload_sample_rate
+
+        # Latency histograms fed by span() and the model callbacks
+        self.metrics = metrics if metrics is not None else METRICS
+        self._model_started: Dict[tuple, float] = {}  # (session_id, invocation_id, agent) -> start
+
         # Configure a specific logger for this plugin
         self.logger = logging.getLogger("MediScreenTracer")
         self.logger.setLevel(logging.INFO)
-        
+
         # Very Imporant for Clean UI: This prevents logs from leaking to the main console
         self.logger.propagate = False
 
-        # File Handler
-        handler = logging.FileHandler(log_file_path)
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        handler.setFormatter(formatter)
-        
+        # File Handler (runs on the listener thread)
+        self.file_handler = DailySizeRotatingFileHandler(log_dir, prefix, max_bytes, backup_count)
+        self.file_handler.setFormatter(JsonLinesFormatter())
+
         # Clear existing handlers to avoid duplicates
         if self.logger.hasHandlers():
             self.logger.handlers.clear()
-        self.logger.addHandler(handler)
+        self.queue_handler = DroppingQueueHandler(queue.Queue(maxsize=queue_size))
+        self.logger.addHandler(self.queue_handler)
+
+        self._listener = logging.handlers.QueueListener(self.queue_handler.queue, self.file_handler)
+        self._listener.start()
+        self._closed = False
+        atexit.register(self.close)
+
+    def _payload(self, payload: Any) -> Optional[str]:
+        """Caps large payloads and samples them; None means 'not logged' (only its size is)."""
+        if payload is None or random.random() >= self.payload_sample_rate:
+            return None
+        text = str(payload)
+        if len(text) > self.max_payload_chars:
+            return text[:self.max_payload_chars] + f"...[+{len(text) - self.max_payload_chars} chars]"
+        return text
+
+    def _emit(self, event: str, level: int = logging.INFO, **fields: Any) -> None:
+        self.logger.log(level, event, extra={"trace": {"event": event, **fields}})
+
+    @contextmanager
+    def span(self, name: str, **labels: Any) -> Iterator[None]:
+        """Times the enclosed block into the `name` histogram and traces its duration."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - started
+            self.metrics.observe(name, duration, **labels)
+            self._emit("span", span=name, duration_ms=round(duration * 1000, 3), **labels)
+
+    @staticmethod
+    def _model_key(callback_context: Any) -> tuple:
+        invocation = getattr(callback_context, "_invocation_context", None)
+        session_id = getattr(getattr(invocation, "session", None), "id", "") or ""
+        return session_id, callback_context.invocation_id, callback_context.agent_name
+
+    def before_model_callback(self, callback_context: Any, llm_request: Any) -> None:
+        """ADK before_model_callback: marks the start of one model request."""
+        self._model_started[self._model_key(callback_context)] = time.perf_counter()
+        prompt_chars = sum(len(part.text or "") for content in llm_request.contents for part in (content.parts or []))
+        self.before_model(callback_context.agent_name, None, prompt_chars=prompt_chars)
+        return None  # Never short-circuits the model call
+
+    def after_model_callback(self, callback_context: Any, llm_response: Any) -> None:
+        """ADK after_model_callback: records model latency once the final (non-partial) response arrives."""
+        if getattr(llm_response, "partial", False):
+            return None
+        started = self._model_started.pop(self._model_key(callback_context), None)
+        if started is not None:
+            self.metrics.observe("model_call", time.perf_counter() - started, agent=callback_context.agent_name)
+        return None
+
+    def end_turn(self, session_id: str) -> None:
+        """
+        Forgets model requests of the session's finished turn that never got a final
+        response (failed or cancelled calls), so their start times don't pile up.
+        """
+        for key in [key for key in self._model_started if key[0] == session_id]:
+            del self._model_started[key]
 
     def before_agent(self, agent_name: str, input_data: Any) -> None:
         """Called by Runner before handing control to an agent."""
-        self.logger.info(f"🏁 [AGENT START] Agent: {agent_name}")
-        self.logger.info(f"📥 [INPUT] {input_data}")
+        self._emit("agent_start", agent=agent_name, input=self._payload(input_data),
+                   input_chars=len(str(input_data)))
 
-    def before_model(self, model_name: str, prompt: Any) -> None:
+    def before_model(self, model_name: str, prompt: Any, prompt_chars: Optional[int] = None) -> None:
         """Called before the Agent sends a prompt to Gemini."""
-        self.logger.info(f"🤖 [MODEL CALL] Invoking {model_name}...")
-        # Optional: Log full prompt if debugging (be careful with PII)
-        # self.logger.debug(f"Prompt: {prompt}")
+        # Prompt content is not logged (be careful with PII); only its size
+        if prompt_chars is None:
+            prompt_chars = len(str(prompt)) if prompt is not None else 0
+        self._emit("model_call", model=model_name, prompt_chars=prompt_chars)
 
     def after_model(self, model_name: str, response: Any) -> None:
         """Called after Gemini returns a response."""
-        self.logger.info(f"✅ [MODEL RESPONSE] Response received from {model_name}")
+        self._emit("model_response", model=model_name, response_chars=len(str(response)) if response is not None else 0)
+
+    def on_prompt_size(self, agent_name: str, session_id: str, sizes: Dict[str, Dict[str, int]],
+                       budget: int = 0, truncated_from: Optional[int] = None) -> None:
+        """Called before each model request with its size by section (system prompt / history / tool output)."""
+        self._emit("prompt_size", agent=agent_name, session_id=session_id, budget=budget,
+                   truncated_from=truncated_from, tokens=sum(size["tokens"] for size in sizes.values()), **sizes)
 
     def on_tool_call(self, tool_name: str, arguments: Dict[str, Any]) -> None:
         """Called when the model decides to use a tool."""
-        self.logger.info(f"🛠️ [TOOL USE] Calling: {tool_name} | Args: {arguments}")
+        self._emit("tool_call", tool=tool_name, arguments=arguments)
+
+    def on_cache_lookup(self, cache_name: str, key: str, hit: bool, stats: Dict[str, int]) -> None:
+        """Called on every client-side cache lookup, with the cache's running counters."""
+        self._emit("cache_lookup", cache=cache_name, key=key, hit=hit, **stats)
 
     def on_error(self, error: Exception) -> None:
         """Captures crashes."""
-        self.logger.error(f"❌ [ERROR] {str(error)}", exc_info=True)
\ No newline at end of file
+        details = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+        self._emit("error", level=logging.ERROR, error=repr(error), traceback=details)
+
+    def close(self) -> None:
+        """Drains the queue to disk and closes the file. Safe to call more than once."""
+        if self._closed:
+            return
+        self._closed = True
+        self._listener.stop()
+        if self.queue_handler.dropped:
+            record = self.logger.makeRecord(
+                self.logger.name, logging.WARNING, __file__, 0, "trace_dropped", None, None,
+                extra={"trace": {"event": "trace_dropped", "count": self.queue_handler.dropped}},
+            )
+            self.file_handler.handle(record)
+        self.file_handler.close()
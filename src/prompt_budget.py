@@ -0,0 +1,174 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/prompt_budget.py
+# Size accounting and budget enforcement for model requests.
+# Every request is measured (chars, UTF-8 bytes, estimated tokens) by section:
+# the system prompt, the conversation history and tool output. The breakdown
+# goes to the tracer and into per-agent and per-session totals. A request over
+# its agent's token budget is cut down before it is sent: the oldest history
+# turns are dropped first, then the largest remaining text is trimmed in the
+# middle. The system prompt and the current input are always kept.
+import json
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+
+from google.genai import types
+
+from src.transcript import estimate_tokens
+
+SECTIONS = ("system_prompt", "history", "tool_output")
+OMITTED_MARKER = "[... {count} earlier message(s) omitted to fit the prompt budget ...]"
+TRIMMED_MARKER = "\n[... {count} characters omitted to fit the prompt budget ...]\n"
+
+
+def _part_sections(part: Any) -> Dict[str, str]:
+    if getattr(part, "function_response", None) is not None:
+        response = part.function_response.response
+        if not isinstance(response, str):
+            response = json.dumps(response, separators=(",", ":"), default=str)
+        return {"tool_output": response}
+    if getattr(part, "function_call", None) is not None:
+        return {"history": json.dumps(part.function_call.args or {}, separators=(",", ":"), default=str)}
+    return {"history": getattr(part, "text", None) or ""}
+
+
+def _system_text(llm_request: Any) -> str:
+    instruction = getattr(getattr(llm_request, "config", None), "system_instruction", None)
+    if instruction is None:
+        return ""
+    if isinstance(instruction, str):
+        return instruction
+    parts = getattr(instruction, "parts", None) or []
+    return "".join(getattr(part, "text", None) or "" for part in parts)
+
+
+def measure(llm_request: Any) -> Dict[str, Dict[str, int]]:
+    """Chars, bytes and estimated tokens per section of an ADK LlmRequest."""
+    texts: Dict[str, List[str]] = {section: [] for section in SECTIONS}
+    texts["system_prompt"].append(_system_text(llm_request))
+    for content in llm_request.contents:
+        for part in content.parts or []:
+            for section, text in _part_sections(part).items():
+                texts[section].append(text)
+    sizes = {}
+    for section, chunks in texts.items():
+        text = "".join(chunks)
+        sizes[section] = {
+            "chars": len(text),
+            "bytes": len(text.encode("utf-8")),
+            "tokens": estimate_tokens(text) if text else 0,
+        }
+    return sizes
+
+
+def total_tokens(sizes: Dict[str, Dict[str, int]]) -> int:
+    return sum(section["tokens"] for section in sizes.values())
+
+
+def _session_id(callback_context: Any) -> str:
+    invocation = getattr(callback_context, "_invocation_context", None)
+    return getattr(getattr(invocation, "session", None), "id", "") or ""
+
+
+def _has_function_response(content: Any) -> bool:
+    return any(getattr(part, "function_response", None) is not None for part in content.parts or [])
+
+
+def _current_turn_size(contents: List[Any]) -> int:
+    """Contents from the last user text (the current input) on: its tool calls and responses belong to it."""
+    for index in range(len(contents) - 1, -1, -1):
+        content = contents[index]
+        if getattr(content, "role", None) == "user" and any(getattr(part, "text", None)
+                                                              for part in content.parts or []):
+            return len(contents) - index
+    return 2 if len(contents) > 1 and _has_function_response(contents[-1]) else 1
+
+
+class PromptBudget:
+    """
+    ADK before_model_callback that measures every request, enforces the
+    per-agent token budget (0 or missing = unlimited) and then hands over to
+    the tracer's own callback.
+    """
+
+    def __init__(self, tracer: Any, budgets: Optional[Dict[str, int]] = None, max_sessions: int = 1024):
+        self.tracer = tracer
+        self.budgets = budgets or {}
+        self.max_sessions = max_sessions
+        self.agents: Dict[str, Dict[str, int]] = {}
+        self.sessions: "OrderedDict[str, Dict[str, int]]" = OrderedDict()
+
+    def before_model_callback(self, callback_context: Any, llm_request: Any) -> None:
+        agent = callback_context.agent_name
+        sizes = measure(llm_request)
+        truncated = 0
+        budget = self.budgets.get(agent, 0)
+        if budget > 0 and total_tokens(sizes) > budget:
+            truncated = total_tokens(sizes)
+            self.enforce(llm_request, budget)
+            sizes = measure(llm_request)
+        session_id = _session_id(callback_context)
+        self._account(agent, session_id, sizes, truncated > 0)
+        self.tracer.on_prompt_size(agent, session_id, sizes, budget=budget, truncated_from=truncated or None)
+        return self.tracer.before_model_callback(callback_context, llm_request)
+
+    def enforce(self, llm_request: Any, budget: int) -> None:
+        """Cuts the request down to about `budget` tokens, in place."""
+        contents = llm_request.contents
+        dropped = 0
+        # Oldest history first; never the current input nor the tool calls and responses that followed it
+        keep = _current_turn_size(contents)
+        while len(contents) > keep and total_tokens(measure(llm_request)) > budget:
+            contents.pop(0)
+            dropped += 1
+            # A tool response without the call that asked for it is rejected by the API
+            while len(contents) > keep and _has_function_response(contents[0]):
+                contents.pop(0)
+                dropped += 1
+        if dropped:
+            contents.insert(0, types.Content(role="user", parts=[types.Part(text=OMITTED_MARKER.format(count=dropped))]))
+
+        # Still over (e.g. one huge input): trim the largest text part in the middle
+        excess = total_tokens(measure(llm_request)) - budget
+        if excess > 0:
+            parts = [part for content in contents for part in content.parts or [] if getattr(part, "text", None)]
+            if parts:
+                largest = max(parts, key=lambda part: len(part.text))
+                cut = min(len(largest.text), excess * 4 + len(TRIMMED_MARKER) + 8)
+                keep_head = (len(largest.text) - cut) // 2
+                keep_tail = len(largest.text) - cut - keep_head
+                largest.text = (largest.text[:keep_head] + TRIMMED_MARKER.format(count=cut)
+                                + (largest.text[-keep_tail:] if keep_tail else ""))
+
+    def _account(self, agent: str, session_id: str, sizes: Dict[str, Dict[str, int]], truncated: bool) -> None:
+        totals = [self.agents.setdefault(agent, {})]
+        if session_id:
+            if session_id not in self.sessions and len(self.sessions) >= self.max_sessions:
+                self.sessions.popitem(last=False)
+            totals.append(self.sessions.setdefault(session_id, {}))
+            self.sessions.move_to_end(session_id)
+        for counters in totals:
+            counters["requests"] = counters.get("requests", 0) + 1
+            counters["truncated"] = counters.get("truncated", 0) + int(truncated)
+            for section, size in sizes.items():
+                counters[f"{section}_tokens"] = counters.get(f"{section}_tokens", 0) + size["tokens"]
+                counters[f"{section}_bytes"] = counters.get(f"{section}_bytes", 0) + size["bytes"]
+
+    def session_totals(self, session_id: str) -> Dict[str, int]:
+        return dict(self.sessions.get(session_id, {}))
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {agent: dict(counters) for agent, counters in self.agents.items()}
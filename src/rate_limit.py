@@ -0,0 +1,178 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/rate_limit.py
+# Process-wide governor for model calls: a token bucket (requests/second) plus
+# a cap on concurrent calls, granted in priority order (intake before
+# symptom interview before scribe). GovernedLlm wraps any ADK model so every
+# agent's requests pass through it. Throttled requests (429/5xx) are retried
+# with full-jitter exponential backoff, outside the concurrency slot, so a
+# burst of 429s spreads out instead of turning into a synchronized retry storm.
+import asyncio
+import heapq
+import itertools
+import random
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, List, Optional
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+
+from src.metrics import METRICS, MetricsRegistry
+
+RETRY_STATUS_CODES = {429, 500, 503, 504}
+
+
+class ModelGovernor:
+    """
+    Token bucket + concurrency limit with a priority queue of waiters (lower
+    number = served first; FIFO within a priority). rate_per_sec <= 0 disables
+    the rate limit; max_concurrent <= 0 disables the concurrency cap.
+    """
+
+    def __init__(self, rate_per_sec: float = 20.0, burst: int = 20, max_concurrent: int = 16,
+                 metrics: Optional[MetricsRegistry] = None, clock=time.monotonic):
+        self.rate_per_sec = rate_per_sec
+        self.burst = max(1, burst)
+        self.max_concurrent = max_concurrent
+        self.metrics = metrics if metrics is not None else METRICS
+        self._clock = clock
+
+        self._tokens = float(self.burst)
+        self._refilled_at = clock()
+        self._in_flight = 0
+        self._waiters: List[tuple] = []  # (priority, seq, future)
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.TimerHandle] = None
+
+        self.granted = 0
+        self.throttled = 0
+
+    @asynccontextmanager
+    async def slot(self, agent: str, priority: int) -> AsyncIterator[None]:
+        """Holds one rate token and one concurrency slot for the enclosed model call."""
+        started = self._clock()
+        await self._acquire(priority)
+        self.metrics.observe("model_queue_wait", self._clock() - started, agent=agent)
+        try:
+            yield
+        finally:
+            self._in_flight -= 1
+            self._dispatch()
+
+    def throttle(self) -> None:
+        """Called on a 429: empty the bucket so every caller backs off for a refill period."""
+        self.throttled += 1
+        self._tokens = 0.0
+
+    async def _acquire(self, priority: int) -> None:
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), future))
+        self._dispatch()
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Granted just as we were cancelled: hand the slot back
+                self._in_flight -= 1
+                self._dispatch()
+            raise
+
+    def _refill(self) -> None:
+        now = self._clock()
+        if self.rate_per_sec > 0:
+            self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate_per_sec)
+        self._refilled_at = now
+
+    def _dispatch(self) -> None:
+        self._refill()
+        while self._waiters:
+            if self._waiters[0][2].done():  # Cancelled while queued
+                heapq.heappop(self._waiters)
+                continue
+            if 0 < self.max_concurrent <= self._in_flight:
+                return  # A release will dispatch again
+            if self.rate_per_sec > 0 and self._tokens < 1.0:
+                self._schedule_wakeup((1.0 - self._tokens) / self.rate_per_sec)
+                return
+            _, _, future = heapq.heappop(self._waiters)
+            if self.rate_per_sec > 0:
+                self._tokens -= 1.0
+            self._in_flight += 1
+            self.granted += 1
+            future.set_result(None)
+
+    def _schedule_wakeup(self, delay: float) -> None:
+        if self._wakeup is None or self._wakeup.cancelled() or self._wakeup.when() <= asyncio.get_running_loop().time():
+            self._wakeup = asyncio.get_running_loop().call_later(delay, self._dispatch)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": sum(1 for _, _, future in self._waiters if not future.done()),
+            "in_flight": self._in_flight,
+            "tokens": round(self._tokens, 2),
+            "granted": self.granted,
+            "throttled": self.throttled,
+        }
+
+
+def backoff_delay(attempt: int, base: float = 1.0, cap: float = 20.0) -> float:
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2**attempt))."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _status_code(error: Exception) -> Optional[int]:
+    code = getattr(error, "code", None) or getattr(error, "status_code", None)
+    return code if isinstance(code, int) else None
+
+
+class GovernedLlm(BaseLlm):
+    """
+    Wraps another ADK model; every request waits for a governor slot first.
+    Retryable errors raised before any output was produced are retried with
+    jittered backoff (attempts in total, including the first).
+    """
+
+    inner: Any
+    governor: Any
+    agent: str = ""
+    priority: int = 1
+    attempts: int = 5
+    backoff_base: float = 1.0
+    backoff_cap: float = 20.0
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        for attempt in range(self.attempts):
+            produced = False
+            try:
+                async with self.governor.slot(self.agent, self.priority):
+                    async for response in self.inner.generate_content_async(llm_request, stream=stream):
+                        produced = True
+                        yield response
+                return
+            except Exception as e:
+                code = _status_code(e)
+                if produced or code not in RETRY_STATUS_CODES or attempt == self.attempts - 1:
+                    raise
+                if code == 429:
+                    self.governor.throttle()
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_cap)
+                self.governor.metrics.observe("model_retry_backoff", delay, agent=self.agent, status=code)
+                await asyncio.sleep(delay)
+
+    def connect(self, llm_request: LlmRequest):
+        return self.inner.connect(llm_request)
@@ -0,0 +1,71 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/response_cache.py
+# Cache of agent replies for turns whose answer doesn't depend on the
+# conversation (e.g. the hidden warm-start greeting). Only turns matching an
+# opt-in CacheRule are cached; keys include a hash of the agent's system prompt
+# and model, so editing a prompt never serves stale replies.
+import hashlib
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.cache import TTLCache
+
+
+class CacheRule:
+    """Opt-in: turns of `agent` whose whole input matches `pattern` may be cached for ttl_seconds."""
+
+    def __init__(self, agent: str, pattern: str, ttl_seconds: Optional[float] = None):
+        self.agent = agent
+        self.pattern = re.compile(pattern, re.DOTALL)
+        self.ttl_seconds = ttl_seconds
+
+    def matches(self, agent: str, user_input: str) -> bool:
+        return agent == self.agent and self.pattern.fullmatch(user_input) is not None
+
+
+def prompt_version(agent: Any) -> str:
+    """Short hash of an ADK agent's instruction and model name."""
+    model = getattr(agent, "model", "")
+    fingerprint = f"{getattr(model, 'model', model)}\n{getattr(agent, 'instruction', '')}"
+    return hashlib.sha1(fingerprint.encode("utf-8")).hexdigest()[:12]
+
+
+class ResponseCache:
+    """LRU + TTL cache of replies keyed on (agent, prompt version, input), for rule-approved turns only."""
+
+    def __init__(self, rules: List[CacheRule], max_size: int = 256, ttl_seconds: float = 3600.0):
+        self.rules = rules
+        self.cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._versions: Dict[str, str] = {}
+
+    def register_agent(self, name: str, agent: Any) -> None:
+        self._versions[name] = prompt_version(agent)
+
+    def rule_for(self, agent: str, user_input: str) -> Optional[CacheRule]:
+        return next((rule for rule in self.rules if rule.matches(agent, user_input)), None)
+
+    def key(self, agent: str, user_input: str) -> Tuple[str, str, str]:
+        return agent, self._versions.get(agent, ""), " ".join(user_input.split())
+
+    def get(self, agent: str, user_input: str) -> Optional[str]:
+        return self.cache.get(self.key(agent, user_input))
+
+    def set(self, agent: str, user_input: str, reply: str, rule: CacheRule) -> None:
+        self.cache.set(self.key(agent, user_input), reply, ttl_seconds=rule.ttl_seconds)
+
+    def stats(self) -> Dict[str, int]:
+        return self.cache.stats()
@@ -0,0 +1,255 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/retention.py
+# Keeps mediscreen.db from growing without bound.
+# A background sweep, run every few minutes:
+# - compacts completed sessions (a ClinicalScribe note exists) idle longer than
+#   compact_after to their final SOAP note + metadata,
+# - archives sessions idle longer than the TTL to gzip JSONL and deletes them,
+# - drops the scratch "<session>_draft" sessions used for SOAP drafting,
+# - removes the per-session transcript file once its session is archived or
+#   compacted (the archive holds the full conversation),
+# - reclaims free pages with incremental vacuum in small steps, so writers
+#   are never locked out for long.
+# Every session is written to the archive before its events leave the DB.
+import asyncio
+import datetime
+import gzip
+import os
+import sqlite3
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.history_client import PATIENT_ID_PATTERN
+from src.transcript import transcript_path
+
+COMPACTED_KEY = "retention_compacted"
+DRAFT_SUFFIX = "_draft"
+
+
+def sqlite_path(db_url: str) -> Optional[str]:
+    """File path of a sqlite:/// (or sqlite+driver:///) URL; None for other databases or in-memory."""
+    if not db_url.startswith("sqlite") or ":///" not in db_url:
+        return None
+    path = db_url.split(":///", 1)[1].split("?", 1)[0]
+    return None if not path or path == ":memory:" else path
+
+
+# update_time is stored by SQLAlchemy as naive UTC text, so cutoffs compare as strings
+CANDIDATES_SQL = """
+SELECT s.user_id, s.id, s.state FROM sessions s
+WHERE s.app_name = ? AND (
+    s.update_time < ?
+    OR (s.update_time < ? AND s.id LIKE ?)
+    OR (s.update_time < ? AND s.state NOT LIKE ? AND EXISTS (
+        SELECT 1 FROM events e
+        WHERE e.app_name = s.app_name AND e.user_id = s.user_id AND e.session_id = s.id
+          AND e.author = 'ClinicalScribe'))
+)
+ORDER BY s.update_time LIMIT ?
+"""
+
+
+def _utc_text(epoch: float) -> str:
+    return datetime.datetime.fromtimestamp(epoch, datetime.timezone.utc).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def _event_text(event: Any) -> str:
+    content = getattr(event, "content", None)
+    return "".join(part.text or "" for part in (content.parts or [])) if content else ""
+
+
+class SessionRetention:
+    """TTL-based compaction, archiving and vacuuming of the session DB."""
+
+    def __init__(self, session_service: Any, db_url: str, app_name: str, tracer: Any,
+                 ttl_seconds: float = 7 * 86400, compact_after: float = 3600,
+                 archive_dir: str = os.path.join("logs", "session_archive"), transcript_dir: str = "",
+                 batch_size: int = 200, vacuum_pages: int = 256):
+        self.session_service = session_service
+        self.db_path = sqlite_path(db_url)
+        self.app_name = app_name
+        self.tracer = tracer
+        self.ttl_seconds = ttl_seconds
+        self.compact_after = compact_after
+        self.archive_dir = archive_dir
+        self.transcript_dir = transcript_dir
+        self.batch_size = batch_size
+        self.vacuum_pages = vacuum_pages
+        self.totals = {"compacted": 0, "archived": 0, "drafts_dropped": 0, "pages_freed": 0}
+
+    async def run_periodically(self, interval: float = 600.0) -> None:
+        """Background task: sweeps every `interval` seconds until cancelled."""
+        if self.db_path is None:
+            self.tracer.logger.info("Session retention needs a file-backed SQLite session DB; disabled")
+            return
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.sweep()
+            except Exception as e:
+                self.tracer.on_error(e)
+
+    async def sweep(self) -> Dict[str, int]:
+        """One retention pass. Returns what it did."""
+        result = {"compacted": 0, "archived": 0, "drafts_dropped": 0, "pages_freed": 0}
+        now = time.time()
+        with self.tracer.span("retention_sweep"):
+            candidates = await asyncio.to_thread(self._candidates, now)
+            for user_id, session_id, compacted in candidates:
+                action = await self._retire(user_id, session_id, compacted, now)
+                if action:
+                    result[action] += 1
+                await asyncio.sleep(0)  # Let live conversations run between sessions
+            if any(result.values()):
+                result["pages_freed"] = await asyncio.to_thread(self._incremental_vacuum)
+
+        for key, value in result.items():
+            self.totals[key] += value
+        self.tracer.logger.info(f"Session retention sweep: {result}")
+        return result
+
+    def _candidates(self, now: float) -> List[Tuple[str, str, bool]]:
+        """
+        (user_id, session_id, already_compacted) of sessions with something to do: past the TTL,
+        or idle past compact_after and either a draft or completed but not yet compacted.
+        """
+        ttl_cutoff, compact_cutoff = _utc_text(now - self.ttl_seconds), _utc_text(now - self.compact_after)
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            rows = conn.execute(
+                CANDIDATES_SQL,
+                (self.app_name, ttl_cutoff, compact_cutoff, "%" + DRAFT_SUFFIX, compact_cutoff,
+                 f"%{COMPACTED_KEY}%", self.batch_size),
+            ).fetchall()
+        finally:
+            conn.close()
+        return [(user_id, session_id, COMPACTED_KEY in (state or "")) for user_id, session_id, state in rows]
+
+    async def _retire(self, user_id: str, session_id: str, compacted: bool, now: float) -> Optional[str]:
+        if session_id.endswith(DRAFT_SUFFIX):
+            await self._delete(user_id, session_id)
+            return "drafts_dropped"
+
+        session = await self.session_service.get_session(app_name=self.app_name, user_id=user_id, session_id=session_id)
+        if session is None:
+            return None
+        idle = now - session.last_update_time
+
+        if idle >= self.ttl_seconds:
+            archive_file = await asyncio.to_thread(self._archive, session)
+            await self._delete(user_id, session_id)
+            await asyncio.to_thread(self._drop_transcript, session_id)
+            self.tracer.logger.info(f"Archived session {session_id} to {archive_file}")
+            return "archived"
+
+        if not compacted and idle >= self.compact_after:
+            summary = self._summarize(session)
+            if summary is None:
+                return None  # Not completed yet; only the TTL retires it
+            summary["archive_file"] = await asyncio.to_thread(self._archive, session)
+            await self._delete(user_id, session_id)
+            await self.session_service.create_session(app_name=self.app_name, user_id=user_id,
+                                                      session_id=session_id, state=summary)
+            await asyncio.to_thread(self._drop_transcript, session_id)
+            return "compacted"
+        return None
+
+    async def _delete(self, user_id: str, session_id: str) -> None:
+        with self.tracer.span("session_write", op="delete_session"):
+            await self.session_service.delete_session(app_name=self.app_name, user_id=user_id, session_id=session_id)
+
+    @staticmethod
+    def _summarize(session: Any) -> Optional[Dict[str, Any]]:
+        """Final SOAP note + metadata for a completed session, or None if no note was written."""
+        notes = [_event_text(event) for event in session.events if event.author == "ClinicalScribe"]
+        notes = [note for note in notes if note]
+        if not notes:
+            return None
+        patient_ids = (PATIENT_ID_PATTERN.search(_event_text(event)) for event in session.events if event.author == "user")
+        patient_id = next((match.group(0).upper() for match in patient_ids if match), None)
+        return {
+            COMPACTED_KEY: True,
+            "soap_note": notes[-1],
+            "patient_id": patient_id,
+            "event_count": len(session.events),
+            "started_at": session.events[0].timestamp if session.events else None,
+            "completed_at": session.last_update_time,
+        }
+
+    def _drop_transcript(self, session_id: str) -> None:
+        """The transcript is a second copy of the conversation; it goes once the session is archived."""
+        if not self.transcript_dir:
+            return
+        try:
+            os.remove(transcript_path(self.transcript_dir, session_id))
+        except FileNotFoundError:
+            pass
+
+    def _archive(self, session: Any) -> str:
+        """Appends the full session to today's gzip JSONL archive (one gzip member per session)."""
+        os.makedirs(self.archive_dir, exist_ok=True)
+        path = os.path.join(self.archive_dir, f"sessions_{datetime.date.today():%Y%m%d}.jsonl.gz")
+        line = session.model_dump_json() + "\n"
+        with gzip.open(path, "ab") as f:
+            f.write(line.encode("utf-8"))
+        return path
+
+    def _incremental_vacuum(self) -> int:
+        """Frees pages in short steps (each holds the write lock briefly). Returns pages freed."""
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+                # Existing DBs created before auto_vacuum=INCREMENTAL need one offline VACUUM to switch
+                self.tracer.logger.info("Session DB is not in incremental auto_vacuum mode; "
+                                        "run `python -m src.retention --vacuum` once while the service is stopped")
+                return 0
+            freed = 0
+            while True:
+                free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+                if not free_before:
+                    break
+                conn.execute(f"PRAGMA incremental_vacuum({self.vacuum_pages})").fetchall()
+                conn.commit()
+                freed += free_before - conn.execute("PRAGMA freelist_count").fetchone()[0]
+                time.sleep(0.01)  # Give waiting writers the lock
+            conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
+            return freed
+        finally:
+            conn.close()
+
+
+def convert_to_incremental_vacuum(db_path: str) -> None:
+    """One-off full VACUUM switching an existing DB to auto_vacuum=INCREMENTAL (exclusive; run offline)."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from src.config import SESSION_DB_URL
+
+    parser = argparse.ArgumentParser(description="Session DB maintenance")
+    parser.add_argument("--vacuum", action="store_true", help="Switch the DB to incremental auto_vacuum (offline)")
+    args = parser.parse_args()
+    if args.vacuum:
+        convert_to_incremental_vacuum(sqlite_path(SESSION_DB_URL))
+        print(f"{SESSION_DB_URL}: auto_vacuum=INCREMENTAL")
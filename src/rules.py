@@ -0,0 +1,140 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/rules.py
+# Deterministic pre-model stage for the IntakeCoordinator.
+# The rule-based parts of INTAKE_COORDINATOR_SYS (ID normalization, PT-XXXX
+# format check, history lookup, emergency keywords) are answered locally with
+# the same wording the prompt prescribes; everything else goes to the model.
+import json
+import re
+from typing import Any, Dict, Optional, Tuple
+
+# Same phrases INTAKE_COORDINATOR_SYS tells the model to use
+EMERGENCY_REPLY = "Please call emergency services immediately, I can help in non-emergency matters only."
+VERIFIED_REPLY = ("Thank you, {name}. I see your file. To ensure I route you correctly, "
+                  "what is the main reason for your visit today?")
+NOT_FOUND_REPLY = ("I'm sorry, I couldn't find a file for {patient_id}. Please check the ID again, "
+                   "it should be in (PT-XXXX) format. If you are a new patient, please contact the "
+                   "patient registration desk for assistance.")
+# The history server found near-miss IDs; the model resolves the name + DOB answer with find_patient_tool
+SIMILAR_ID_REPLY = ("I couldn't find a file for {patient_id}, but it may be a small typo. To find your file, "
+                    "please tell me your full name and date of birth.")
+BAD_FORMAT_REPLY = ("I'm sorry, that doesn't look like a valid Patient ID. Please check it again, "
+                    "it should be in (PT-XXXX) format, for example PT-1004.")
+
+EMERGENCY_PATTERN = re.compile(
+    r"chest pains?|trouble breathing|difficulty breathing|can'?t breathe|cannot breathe|unable to breathe"
+    r"|short(?:ness)? of breath|severe(?:ly)? bleeding|bleeding heavily|heavy bleeding|won'?t stop bleeding",
+    re.IGNORECASE,
+)
+# "no chest pain", "I don't have trouble breathing" -- a negation at most three words before the
+# phrase, in the same clause ("not sure. chest pain" and "I don't know, I can't breathe" are not negated)
+NEGATION_PATTERN = re.compile(r"\b(?:no|not|never|without|denies|don'?t|doesn'?t|didn'?t)\b(?:\s+[\w']+){0,3}\s*$",
+                              re.IGNORECASE)
+CLAUSE_BOUNDARY = re.compile(r"[.,;:!?]|\b(?:but|and|or|so|though)\b", re.IGNORECASE)
+
+# A message that is nothing but a PT Patient ID, optionally introduced ("my patient id is pt 1004.").
+# How many digits an ID has is up to the roster, so any length is looked up.
+ID_ONLY_PATTERN = re.compile(
+    r"^\s*(?:(?:my\s+)?(?:patient\s+)?id\s*(?:is|:)?\s*|it'?s\s+)?"
+    r"pt\s*[-_ ]?\s*(?P<digits>\d{1,12})\s*[.!]?\s*$",
+    re.IGNORECASE,
+)
+# An explicitly introduced ID in some other format ("my id is PX-12", "my patient id is 1004")
+ID_ATTEMPT_PATTERN = re.compile(
+    r"^\s*(?:my\s+)?(?:patient\s+)?id\s*(?:is|:)\s*[a-z]{0,3}\s*[-_ ]?\s*\d{1,12}\s*[.!]?\s*$",
+    re.IGNORECASE,
+)
+
+
+# The intake agent's history tool; a rule-stage lookup is recorded as a call to it
+HISTORY_TOOL = "fetch_history_tool"
+
+
+class RuleResult:
+    """
+    A reply produced without a model call. patient_id is set when an ID was verified;
+    tool_call is (tool name, args, result) when the rule looked the ID up.
+    """
+
+    def __init__(self, rule: str, reply: str, patient_id: Optional[str] = None,
+                 tool_call: Optional[Tuple[str, Dict[str, Any], str]] = None):
+        self.rule = rule
+        self.reply = reply
+        self.patient_id = patient_id
+        self.tool_call = tool_call
+
+
+def is_emergency(text: str) -> bool:
+    """True if the text mentions an emergency symptom that isn't negated."""
+    for match in EMERGENCY_PATTERN.finditer(text):
+        clause = CLAUSE_BOUNDARY.split(text[:match.start()])[-1]
+        if not NEGATION_PATTERN.search(clause):
+            return True
+    return False
+
+
+def parse_patient_id(text: str):
+    """
+    Returns (normalized_id, valid) if the whole message is an ID attempt, else None.
+    'pt-1004', 'PT 1004', 'pt_10001' -> ('PT-1004', True) ...; 'my id is PX-12' -> (None, False).
+    Other short replies ("yes 2", a typed date of birth) are not ID attempts.
+    """
+    match = ID_ONLY_PATTERN.match(text)
+    if match:
+        return f"PT-{match.group('digits')}", True
+    if ID_ATTEMPT_PATTERN.match(text):
+        return None, False
+    return None
+
+
+class IntakeRules:
+    """
+    Rule stage in front of the IntakeCoordinator runner. evaluate() returns a
+    RuleResult when the turn can be answered deterministically, or None to
+    hand the turn to the model unchanged.
+    """
+
+    def __init__(self, history_client: Any, tracer: Any = None):
+        self.history_client = history_client
+        self.tracer = tracer
+
+    async def evaluate(self, user_input: str) -> Optional[RuleResult]:
+        if is_emergency(user_input):
+            return RuleResult("emergency", EMERGENCY_REPLY)
+
+        parsed = parse_patient_id(user_input)
+        if parsed is None:
+            return None
+        patient_id, valid = parsed
+        if not valid:
+            return RuleResult("id_format", BAD_FORMAT_REPLY)
+
+        try:
+            payload = await self.history_client.fetch(patient_id)
+        except Exception as e:
+            # Broken MCP pipe, pool timeout, ...: let the model handle the turn (its tool call retries)
+            if self.tracer is not None:
+                self.tracer.on_error(e)
+            return None
+        tool_call = (HISTORY_TOOL, {"patient_id": patient_id}, payload)
+        try:
+            name = json.loads(payload)["name"]
+        except (ValueError, TypeError, KeyError):
+            if "find_patient" in str(payload):
+                return RuleResult("id_similar", SIMILAR_ID_REPLY.format(patient_id=patient_id), tool_call=tool_call)
+            return RuleResult("id_not_found", NOT_FOUND_REPLY.format(patient_id=patient_id), tool_call=tool_call)
+        return RuleResult("id_verified", VERIFIED_REPLY.format(name=name), patient_id=patient_id, tool_call=tool_call)
@@ -0,0 +1,100 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/server.py
+# Line-protocol TCP front end: one connection == one intake conversation.
+#
+# Every line is a JSON object.
+#   client -> server: {"type": "start", "user_id": "...", "stream": bool}   (first line)
+#                     {"type": "input", "text": "..."}
+#                     {"type": "stats"}                     (any time; operational counters)
+#   server -> client: {"type": "message" | "note", "agent": "...", "text": "..."}
+#                     {"type": "error", "text": "..."}
+#                     {"type": "stats", ...}
+#                     {"type": "chunk", "agent": "...", "text": "..."}  (partial text, if "stream" was set;
+#                                                                       the full "message" still follows)
+#                     {"type": "turn_end", "done": bool}    (after every start/input)
+import asyncio
+import json
+import uuid
+from functools import partial
+from typing import Any, Dict
+
+from src.orchestrator import MediScreenService
+
+
+async def _send(writer: asyncio.StreamWriter, message: Dict[str, Any]) -> None:
+    writer.write((json.dumps(message) + "\n").encode("utf-8"))
+    await writer.drain()
+
+
+async def handle_connection(service: MediScreenService, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Drives one conversation for as long as the client stays connected."""
+    conv = None
+    on_chunk = None
+
+    async def send_chunk(agent: str, text: str) -> None:
+        await _send(writer, {"type": "chunk", "agent": agent, "text": text})
+
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            try:
+                message = json.loads(line)
+            except ValueError:
+                await _send(writer, {"type": "error", "text": "Malformed message, expected one JSON object per line."})
+                continue
+
+            if message.get("type") == "stats":
+                await _send(writer, {"type": "stats", **service.stats()})
+                continue
+            if message.get("type") == "start" and conv is None:
+                user_id = message.get("user_id") or f"patient_{uuid.uuid4().hex[:8]}"
+                on_chunk = send_chunk if message.get("stream") else None
+                conv, replies = await service.start_conversation(user_id, on_chunk=on_chunk)
+            elif message.get("type") == "input" and conv is not None:
+                replies = await service.handle_input(conv, message.get("text", ""), on_chunk=on_chunk)
+            else:
+                await _send(writer, {"type": "error", "text": "Send a 'start' message first, then 'input' messages."})
+                continue
+
+            for reply in replies:
+                await _send(writer, reply.to_dict())
+            await _send(writer, {"type": "turn_end", "done": conv.done})
+            if conv.done:
+                break
+    except (ConnectionError, asyncio.IncompleteReadError):
+        pass  # Client went away mid-turn
+    except Exception as e:
+        service.tracer.on_error(e)
+        try:
+            await _send(writer, {"type": "error", "text": f"System Error: {e}"})
+        except ConnectionError:
+            pass
+    finally:
+        if conv is not None:
+            service.system_log.info(f"Connection closed for Session: {conv.session_id}")
+        writer.close()
+        try:
+            await writer.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def serve(service: MediScreenService, host: str, port: int) -> asyncio.AbstractServer:
+    """Starts accepting conversations; the caller owns the returned server."""
+    return await asyncio.start_server(partial(handle_connection, service), host, port)
@@ -0,0 +1,176 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/session_store.py
+# Session persistence layer over ADK's DatabaseSessionService.
+# - SQLite runs in WAL mode (readers don't block the writer, no fsync per commit)
+#   behind a pooled engine.
+# - Events are applied to the in-memory session immediately, but written to the
+#   DB when the turn ends (write-behind): one transaction per turn, with a bulk
+#   insert of its event rows and a single session/state update, run in a worker
+#   thread so the commit never blocks the event loop. Reads of a session wait
+#   for its pending batch, so the next turn always sees every event.
+import asyncio
+from typing import Any, Dict, List, Optional, Tuple
+
+from google.adk.sessions import DatabaseSessionService
+from google.adk.sessions.base_session_service import BaseSessionService
+from google.adk.sessions.database_session_service import (StorageAppState, StorageEvent, StorageSession,
+                                                          StorageUserState, _extract_state_delta)
+from sqlalchemy import event as sa_event
+from sqlalchemy import func
+
+from src.metrics import METRICS, MetricsRegistry
+
+SQLITE_PRAGMAS = (
+    "PRAGMA busy_timeout=30000",  # First, so the pragmas below wait on a busy DB instead of failing
+    "PRAGMA auto_vacuum=INCREMENTAL",  # Only takes effect on a new DB; lets src/retention.py reclaim space
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",  # Durable at checkpoints; safe with WAL
+    "PRAGMA temp_store=MEMORY",
+)
+
+
+def engine_options(db_url: str, pool_size: int = 10) -> Dict[str, Any]:
+    """create_engine() keyword arguments for a pooled engine suited to many concurrent sessions."""
+    if not db_url.startswith("sqlite"):
+        return {"pool_size": pool_size, "max_overflow": pool_size, "pool_pre_ping": True}
+    if ":memory:" in db_url or db_url.rstrip("/").endswith(":"):
+        return {}  # In-memory databases must stay on a single connection
+    return {
+        "pool_size": pool_size,
+        "max_overflow": pool_size,
+        "connect_args": {"check_same_thread": False, "timeout": 30},
+    }
+
+
+def _set_sqlite_pragmas(dbapi_connection, _connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        if pragma == "PRAGMA journal_mode=WAL" and cursor.execute("PRAGMA journal_mode").fetchone()[0] == "wal":
+            continue  # WAL is persistent; switching again needs a lock other connections may hold
+        cursor.execute(pragma)
+    cursor.close()
+
+
+class InstrumentedSessionService(DatabaseSessionService):
+    """
+    DatabaseSessionService with a tuned SQLite engine and optional per-turn
+    batched event writes. Every DB write is timed into the `session_write`
+    histogram. With write_behind=False (the default) events are written one
+    by one as ADK appends them.
+    """
+
+    def __init__(self, db_url: str, metrics: Optional[MetricsRegistry] = None, pool_size: int = 10,
+                 write_behind: bool = False, **kwargs: Any):
+        super().__init__(db_url=db_url, **{**engine_options(db_url, pool_size), **kwargs})
+        self.metrics = metrics if metrics is not None else METRICS
+        self.write_behind = write_behind
+
+        engine = getattr(self, "db_engine", None)
+        if engine is not None and db_url.startswith("sqlite"):
+            # Async engines expose the underlying sync engine for event hooks
+            sa_event.listen(getattr(engine, "sync_engine", engine), "connect", _set_sqlite_pragmas)
+
+        # session_id -> events waiting for the end of the turn, and the task writing them
+        self._pending: Dict[str, List[Tuple[Any, Any]]] = {}
+        self._flushing: Dict[str, asyncio.Task] = {}
+
+    async def create_session(self, **kwargs: Any):
+        with self.metrics.span("session_write", op="create_session"):
+            return await super().create_session(**kwargs)
+
+    async def get_session(self, **kwargs: Any):
+        # Never hand out a session that is missing events still queued for the DB
+        session_id = kwargs.get("session_id")
+        if session_id in self._pending or session_id in self._flushing:
+            await self.flush(session_id)
+        return await super().get_session(**kwargs)
+
+    async def append_event(self, session, event):
+        if not self.write_behind or event.partial:
+            return await self._write(session, event)
+        # Apply to the in-memory session now (what the running agent reads); persist at end_turn()
+        await BaseSessionService.append_event(self, session=session, event=event)
+        self._pending.setdefault(session.id, []).append((session, event))
+        return event
+
+    def end_turn(self, session_id: str) -> None:
+        """Starts writing the turn's events in the background."""
+        if session_id in self._pending and session_id not in self._flushing:
+            task = asyncio.create_task(self._flush_loop(session_id))
+            self._flushing[session_id] = task
+            task.add_done_callback(lambda _: self._flushing.pop(session_id, None))
+
+    async def flush(self, session_id: Optional[str] = None) -> None:
+        """Waits until the session's (or every session's) queued events are in the DB."""
+        for sid in [session_id] if session_id else list(self._pending) + list(self._flushing):
+            self.end_turn(sid)
+            task = self._flushing.get(sid)
+            if task is not None:
+                await asyncio.shield(task)
+
+    async def _flush_loop(self, session_id: str) -> None:
+        while self._pending.get(session_id):
+            batch = self._pending.pop(session_id)
+            session = batch[-1][0]
+            try:
+                with self.metrics.span("session_write", op="flush_turn"):
+                    updated = await asyncio.to_thread(self._write_turn, session, [event for _, event in batch])
+            except Exception:
+                # Keep the batch so a later flush can retry it
+                self._pending[session_id] = batch + self._pending.get(session_id, [])
+                raise
+            session.last_update_time = updated
+
+    def _write_turn(self, session, events: List[Any]) -> float:
+        """
+        Writes a turn's events in one transaction: a bulk insert of the event rows
+        plus one update of the session row (state and update_time) and of any app/user
+        state they change. Runs in a worker thread. Returns the new update time.
+        """
+        app_delta: Dict[str, Any] = {}
+        user_delta: Dict[str, Any] = {}
+        session_delta: Dict[str, Any] = {}
+        for event in events:
+            if event.actions and event.actions.state_delta:
+                app_part, user_part, session_part = _extract_state_delta(event.actions.state_delta)
+                app_delta.update(app_part)
+                user_delta.update(user_part)
+                session_delta.update(session_part)
+
+        with self.database_session_factory() as sql_session:
+            storage_session = sql_session.get(StorageSession, (session.app_name, session.user_id, session.id))
+            if storage_session is None:
+                raise ValueError(f"Session {session.id} no longer exists; {len(events)} event(s) not written")
+            if app_delta:
+                storage_app_state = sql_session.get(StorageAppState, (session.app_name))
+                if storage_app_state is not None:
+                    storage_app_state.state = {**storage_app_state.state, **app_delta}
+            if user_delta:
+                storage_user_state = sql_session.get(StorageUserState, (session.app_name, session.user_id))
+                if storage_user_state is not None:
+                    storage_user_state.state = {**storage_user_state.state, **user_delta}
+            if session_delta:
+                storage_session.state = {**storage_session.state, **session_delta}
+            storage_session.update_time = func.now()
+            sql_session.add_all([StorageEvent.from_event(session, event) for event in events])
+            sql_session.commit()
+            sql_session.refresh(storage_session)
+            return storage_session.update_timestamp_tz
+
+    async def _write(self, session, event):
+        with self.metrics.span("session_write", op="append_event"):
+            return await super().append_event(session, event)
@@ -0,0 +1,172 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/stub_model.py
+# A deterministic, offline stand-in for Gemini (MEDISCREEN_MODEL_BACKEND=stub).
+# It plays scripted Intake, Symptom and Scribe turns that follow the same
+# phrases the routing logic keys on, so whole conversations can be load-tested
+# without network calls.
+import asyncio
+import json
+import random
+import re
+from typing import AsyncGenerator, List
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from src.rules import is_emergency
+
+SYMPTOM_SCRIPT = [
+    "I'm sorry to hear that. When did this first start, and did it come on suddenly or gradually?",
+    "Could you describe what it feels like? For example, is it sharp, dull, or throbbing?",
+    "On a scale of 1 to 10, how severe would you say it is right now?",
+    "Does anything make it better or worse, and does it move anywhere else?",
+    "Have you noticed any other symptoms along with it, such as nausea or changes in vision?",
+    "Have you taken any medications for this yet, and do you have any new allergies?",
+    "Just to make sure I have the full picture, I've noted everything you described. "
+    "Is there anything else you think the doctor should know?",
+]
+
+SCRIBE_TEMPLATE = """**SUBJECTIVE:**
+* **CC:** {complaint}
+* **HPI:** Patient reports {complaint}. Details gathered via structured OPQRST interview ({turns} patient responses).
+* **ROS:** As discussed in interview.
+* **Meds/Allergies:** As reported in chat.
+
+**OBJECTIVE:**
+* *Vitals:* Not assessed in triage.
+* *General:* Patient appears calm via text interface.
+
+**ASSESSMENT:**
+* **Clinical Impression:** Patient presenting with {complaint}.
+* **Differential Considerations:** Not Reported.
+* **Disclaimer:** Generated by AI for physician review.
+
+**PLAN:**
+* **Triage Level:** Routine
+* **Recommendation:** Schedule physical exam."""
+
+
+def _text_of(content: types.Content) -> str:
+    return "".join(part.text or "" for part in (content.parts or []))
+
+
+def _instruction_of(llm_request: LlmRequest) -> str:
+    instruction = llm_request.config.system_instruction if llm_request.config else None
+    if instruction is None:
+        return ""
+    if isinstance(instruction, str):
+        return instruction
+    return _text_of(instruction)
+
+
+class ScriptedLlm(BaseLlm):
+    """
+    Scripted LLM backend. Which script runs is decided from the agent's
+    system prompt; where it is in the script is decided from the request
+    history. latency_ms (+/- jitter_ms) is slept before every response.
+    """
+
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0
+    seed: int = 0
+
+    @classmethod
+    def supported_models(cls) -> List[str]:
+        return [r"stub-.*"]
+
+    async def generate_content_async(self, llm_request: LlmRequest, stream: bool = False) -> AsyncGenerator[LlmResponse, None]:
+        await asyncio.sleep(self._delay(llm_request))
+
+        # Keyed on the persona line: other prompts mention the agents they hand over to or from
+        instruction = _instruction_of(llm_request)
+        if "You are the 'Intake Coordinator'" in instruction:
+            part = self._intake(llm_request)
+        elif "You are the 'Symptom Specialist'" in instruction:
+            part = types.Part(text=self._symptom(llm_request))
+        else:
+            part = types.Part(text=self._scribe(llm_request))
+
+        if stream and part.text:
+            # Word-sized partial chunks, then the full text as the final response
+            words = part.text.split(" ")
+            for i, word in enumerate(words):
+                chunk = word if i == len(words) - 1 else word + " "
+                yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=chunk)]), partial=True)
+        yield LlmResponse(content=types.Content(role="model", parts=[part]))
+
+    def _delay(self, llm_request: LlmRequest) -> float:
+        if not self.jitter_ms:
+            return self.latency_ms / 1000.0
+        # Seeded by the request size so replays see the same latencies
+        rng = random.Random(self.seed + len(llm_request.contents))
+        return max(0.0, self.latency_ms + rng.uniform(-self.jitter_ms, self.jitter_ms)) / 1000.0
+
+    def _intake(self, llm_request: LlmRequest) -> types.Part:
+        last = llm_request.contents[-1] if llm_request.contents else types.Content(role="user", parts=[])
+
+        # Second half of the ID-verification turn: the tool result is in
+        responses = [part.function_response for part in (last.parts or []) if part.function_response]
+        if responses:
+            payload = responses[0].response or {}
+            result = payload.get("result", payload) if isinstance(payload, dict) else payload
+            try:
+                record = json.loads(result) if isinstance(result, str) else result
+                name = record["name"]
+            except (ValueError, TypeError, KeyError):
+                return types.Part(text="I'm sorry, I couldn't find that Patient ID. "
+                                       "Please check it again, it should be in (PT-XXXX) format.")
+            return types.Part(text=f"Thank you, {name}. I see your file. To ensure I route you correctly, "
+                                   "what is the main reason for your visit today?")
+
+        text = _text_of(last)
+        if "has connected" in text:
+            return types.Part(text="Hello, I'm MediScreen AI and I'll be assisting you today. "
+                                   "Could you please share your Patient ID?")
+
+        match = re.search(r"PT-\d+", text, re.IGNORECASE)
+        if match:
+            tool_name = next((name for name in llm_request.tools_dict if "history" in name), "fetch_history_tool")
+            return types.Part(function_call=types.FunctionCall(name=tool_name, args={"patient_id": match.group(0)}))
+
+        if is_emergency(text):
+            return types.Part(text="Please call emergency services immediately, I can help in non-emergency matters only.")
+        return types.Part(text="Understood. Our triage specialist will connect with you to gather more details "
+                               "for the doctor to review. I'm going to connect you with our triage specialist now.")
+
+    def _symptom(self, llm_request: LlmRequest) -> str:
+        # Other agents' turns reach this agent as user-role context, so model-role turns are its own
+        asked = sum(1 for content in llm_request.contents if content.role == "model")
+        if asked < len(SYMPTOM_SCRIPT):
+            return SYMPTOM_SCRIPT[asked]
+        return ("Thank you for sharing all of this. Please wait, the doctor will review your information "
+                "and examine you shortly. SUMMARY_COMPLETE")
+
+    def _scribe(self, llm_request: LlmRequest) -> str:
+        text = _text_of(llm_request.contents[-1]) if llm_request.contents else ""
+        # The first patient utterance that isn't an ID is the chief complaint
+        utterances = re.findall(r"^Patient: (.*)$", text, re.MULTILINE)
+        complaint = next((u.strip() for u in utterances if not re.search(r"PT-\d+", u, re.IGNORECASE)), "Not Reported")
+
+        # Incremental drafting: carry the complaint and response count over from the draft
+        drafted_complaint = re.search(r"\* \*\*CC:\*\* (.*)", text)
+        drafted_turns = re.search(r"\((\d+) patient responses\)", text)
+        if drafted_complaint and drafted_complaint.group(1) != "Not Reported":
+            complaint = drafted_complaint.group(1)
+        turns = len(utterances) + (int(drafted_turns.group(1)) if drafted_turns else 0)
+        return SCRIBE_TEMPLATE.format(complaint=complaint, turns=turns)
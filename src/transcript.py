@@ -0,0 +1,154 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# src/transcript.py
+# Structured conversation transcript.
+# Turns are typed (speaker, text, timestamp, entities) and indexed by speaker
+# and role as they are appended, so routing never re-parses strings. The
+# scribe gets a compact, token-bounded view, and persistence appends only the
+# turns written since the last flush.
+import json
+import os
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from src.history_client import PATIENT_ID_PATTERN
+from src.rules import is_emergency
+
+PATIENT = "Patient"
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token), good enough for budgeting prompts."""
+    return len(text) // 4 + 1
+
+
+class Turn:
+    """One utterance. role is 'patient' or 'agent'; entities holds what was extracted from the text."""
+
+    __slots__ = ("speaker", "text", "timestamp", "entities")
+
+    def __init__(self, speaker: str, text: str, timestamp: Optional[float] = None,
+                 entities: Optional[Dict[str, Any]] = None):
+        self.speaker = speaker
+        self.text = text
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.entities = entities if entities is not None else extract_entities(speaker, text)
+
+    @property
+    def role(self) -> str:
+        return "patient" if self.speaker == PATIENT else "agent"
+
+    def line(self) -> str:
+        return f"{self.speaker}: {' '.join(self.text.split())}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"speaker": self.speaker, "text": self.text, "ts": round(self.timestamp, 3), "entities": self.entities}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Turn":
+        return cls(data["speaker"], data["text"], data.get("ts"), data.get("entities") or {})
+
+
+def extract_entities(speaker: str, text: str) -> Dict[str, Any]:
+    """Patient ID and emergency flag from patient turns; agent turns carry none."""
+    if speaker != PATIENT:
+        return {}
+    entities: Dict[str, Any] = {}
+    match = PATIENT_ID_PATTERN.search(text)
+    if match:
+        entities["patient_id"] = match.group(0).upper()
+    if is_emergency(text):
+        entities["emergency"] = True
+    return entities
+
+
+class Transcript:
+    """Append-only list of Turns with O(1) access to the latest turn per speaker and per role."""
+
+    def __init__(self, turns: Optional[List[Turn]] = None):
+        self.turns: List[Turn] = []
+        self._latest: Dict[str, Turn] = {}
+        self._persisted = 0  # Number of turns already written by persist()
+        for turn in turns or []:
+            self._add(turn)
+
+    def __len__(self) -> int:
+        return len(self.turns)
+
+    def __iter__(self) -> Iterator[Turn]:
+        return iter(self.turns)
+
+    def append(self, speaker: str, text: str) -> Turn:
+        turn = Turn(speaker, text)
+        self._add(turn)
+        return turn
+
+    def _add(self, turn: Turn) -> None:
+        self.turns.append(turn)
+        self._latest[turn.speaker] = turn
+        self._latest[turn.role] = turn
+
+    def latest(self, key: str) -> Optional[Turn]:
+        """Latest turn by role ('patient'/'agent') or by speaker name (e.g. 'SymptomSpecialist')."""
+        return self._latest.get(key)
+
+    def scribe_view(self, max_tokens: int = 6000, keep_head: int = 4) -> str:
+        """
+        Compact "Speaker: text" lines (whitespace collapsed) within max_tokens.
+        If the interview is longer, the first keep_head turns (greeting, ID,
+        complaint) and as many recent turns as fit are kept, and the gap is marked.
+        """
+        lines = [turn.line() for turn in self.turns]
+        costs = [estimate_tokens(line) for line in lines]
+        if sum(costs) <= max_tokens:
+            return "\n".join(lines)
+
+        head = min(keep_head, len(lines))
+        while head and sum(costs[:head]) > max_tokens:
+            head -= 1
+        budget = max_tokens - sum(costs[:head])
+        tail_start = len(lines)
+        while tail_start > head and costs[tail_start - 1] <= budget:
+            tail_start -= 1
+            budget -= costs[tail_start]
+        omitted = tail_start - head
+        marker = [f"[... {omitted} earlier turns omitted ...]"] if omitted else []
+        return "\n".join(lines[:head] + marker + lines[tail_start:])
+
+    def persist(self, path: str) -> int:
+        """Appends the turns added since the last call to a JSONL file. Returns how many were written."""
+        pending = self.turns[self._persisted:]
+        if not pending:
+            return 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(turn.to_dict()) + "\n" for turn in pending))
+        self._persisted += len(pending)
+        return len(pending)
+
+    @classmethod
+    def load(cls, path: str) -> "Transcript":
+        """Rebuilds a transcript from a persist() file."""
+        with open(path, encoding="utf-8") as f:
+            transcript = cls([Turn.from_dict(json.loads(line)) for line in f if line.strip()])
+        transcript._persisted = len(transcript.turns)
+        return transcript
+
+
+def transcript_path(directory: str, session_id: str) -> str:
+    # Session IDs are UUIDs or caller-provided; keep the filename safe either way
+    return os.path.join(directory, re.sub(r"[^A-Za-z0-9_.-]", "_", session_id) + ".jsonl")
@@ -16,10 +16,17 @@
 
 # src/utils.py, similar to helper functions
 import asyncio
+import uuid
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Optional, Tuple
+from google.adk.agents.run_config import RunConfig, StreamingMode
+from google.adk.events import Event
 from google.adk.runners import Runner
 from google.adk.sessions import InMemorySessionService, DatabaseSessionService
 from google.genai import types
 
+# Start of the reply text when the agent run itself failed
+AGENT_ERROR_PREFIX = "[ I encountered an error"
+
 async def get_or_create_session(
     session_service: InMemorySessionService, 
     app_name: str, 
@@ -29,35 +36,38 @@ async def get_or_create_session(
     """
     Safely retrieves an existing session or creates a new one if it doesn't exist.
     """
-    #print(f"[SYSTEM] Initializing Session: {session_id}...")
-    try:
-        # Try to create a new session
-        # Note: explicit app_name is required by newer ADK versions
-        await session_service.create_session(
-            session_id=session_id,
-            user_id=user_id,
-            app_name=app_name 
-        )
-        #print("[SYSTEM] Session Created Successfully.")
-    except Exception as e:
-        # If creation fails (likely because it exists), we just proceed.
-        # We don't strictly need to 'get' it for the Runner to work, 
-        # Silently ignore as long as it exists in the service.
-        pass
-        #print(f"[SYSTEM] Session already exists (or error ignored): {e}")
+    # Explicit existence check: one indexed read instead of a failed INSERT + exception
+    session = await session_service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    if session is not None:
+        return session
+    # Note: explicit app_name is required by newer ADK versions
+    return await session_service.create_session(
+        session_id=session_id,
+        user_id=user_id,
+        app_name=app_name
+    )
 
-async def run_agent_turn(
+def end_turn(session_service, session_id: str):
+    """Tells a write-behind session store (src/session_store.py) that the turn's events can be written."""
+    hook = getattr(session_service, "end_turn", None)
+    if hook is not None:
+        hook(session_id)
+
+async def stream_agent_turn(
     runner: Runner,
     user_input: str,
     user_id: str,
-    session_id: str
-) -> str:
+    session_id: str,
+    streaming: bool = True
+) -> AsyncIterator[Tuple[str, bool]]:
     """
-    Handles the nitty-gritty of converting text to ADK content, 
-    streaming the response, and returning the final text.
+    Async generator over one agent turn. Yields (text, partial) pairs:
+    partial text chunks as the model produces them (only when streaming),
+    then exactly one (final_text, False) at the end.
     """
     # 1. Convert string to strictly typed Content object
     user_msg = types.Content(role="user", parts=[types.Part(text=user_input)])
+    run_config = RunConfig(streaming_mode=StreamingMode.SSE if streaming else StreamingMode.NONE)
 
     final_text_response = ""
 
@@ -66,17 +76,92 @@ async def run_agent_turn(
         async for event in runner.run_async(
             new_message=user_msg,
             user_id=user_id,
-            session_id=session_id
+            session_id=session_id,
+            run_config=run_config
         ):
             # Capture the text from the event
             # (In complex agents, you might get Thought Traces here too, but we filter for text)
             if event.content and event.content.parts:
                 part_text = event.content.parts[0].text
                 if part_text and part_text != "None":
-                    final_text_response = part_text
-                    # Optional: Print streaming chunks here if you want a "typing" effect
+                    if event.partial:
+                        yield part_text, True
+                    else:
+                        final_text_response = part_text
     except Exception as e:
         #print(f"[ERROR] Agent Execution Failed: {e}")
-        return f"[ I encountered an error processing your request System Error: {str(e)} ]" 
+        final_text_response = f"{AGENT_ERROR_PREFIX} processing your request System Error: {str(e)} ]"
+    finally:
+        end_turn(runner.session_service, session_id)
 
-    return final_text_response
\ No newline at end of file
+    yield final_text_response, False
+
+async def run_agent_turn(
+    runner: Runner,
+    user_input: str,
+    user_id: str,
+    session_id: str,
+    on_chunk: Optional[Callable[[str], Awaitable[None]]] = None
+) -> str:
+    """
+    Handles the nitty-gritty of converting text to ADK content, 
+    streaming the response, and returning the final text.
+    If on_chunk is given, partial text is passed to it as it arrives.
+    """
+    final_text_response = ""
+    async for text, partial in stream_agent_turn(runner, user_input, user_id, session_id, streaming=on_chunk is not None):
+        if partial:
+            await on_chunk(text)
+        else:
+            final_text_response = text
+    return final_text_response
+
+async def record_turn(
+    session_service: DatabaseSessionService,
+    app_name: str,
+    user_id: str,
+    session_id: str,
+    author: str,
+    user_input: str,
+    reply: str,
+    tool_call: Optional[Tuple[str, Dict[str, Any], Any]] = None
+):
+    """
+    Writes a turn that was answered without running the agent into the session,
+    as the user message plus a reply authored by `author`, so later model turns
+    still see it in their history. tool_call (name, args, result) is written
+    before the reply as the function_call / function_response pair the agent
+    would have produced, so downstream agents get the tool result as context.
+    """
+    session = await session_service.get_session(app_name=app_name, user_id=user_id, session_id=session_id)
+    if session is None:
+        return
+    invocation_id = f"e-{uuid.uuid4()}"
+    await session_service.append_event(session, Event(
+        invocation_id=invocation_id,
+        author="user",
+        content=types.Content(role="user", parts=[types.Part(text=user_input)]),
+    ))
+    if tool_call is not None:
+        name, args, result = tool_call
+        call_id = f"adk-{uuid.uuid4()}"
+        await session_service.append_event(session, Event(
+            invocation_id=invocation_id,
+            author=author,
+            content=types.Content(role="model", parts=[types.Part(
+                function_call=types.FunctionCall(id=call_id, name=name, args=args))]),
+        ))
+        # ADK wraps a non-dict tool return value the same way
+        response = result if isinstance(result, dict) else {"result": result}
+        await session_service.append_event(session, Event(
+            invocation_id=invocation_id,
+            author=author,
+            content=types.Content(role="user", parts=[types.Part(
+                function_response=types.FunctionResponse(id=call_id, name=name, response=response))]),
+        ))
+    await session_service.append_event(session, Event(
+        invocation_id=invocation_id,
+        author=author,
+        content=types.Content(role="model", parts=[types.Part(text=reply)]),
+    ))
+    end_turn(session_service, session_id)
@@ -0,0 +1,75 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# tests/test_cache.py
+from src.cache import TTLCache
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_hit_and_miss_counters():
+    cache = TTLCache()
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    assert cache.stats() == {"hits": 1, "misses": 1, "evictions": 0, "size": 1}
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    cache = TTLCache(ttl_seconds=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2, ttl_seconds=30)
+    clock.now = 10
+    assert "a" not in cache
+    assert cache.get("a") is None
+    assert len(cache) == 1  # The expired entry is dropped on read
+    assert cache.get("b") == 2
+
+
+def test_least_recently_used_is_evicted():
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert "b" not in cache
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.stats()["evictions"] == 1
+
+
+def test_contains_does_not_count_or_reorder():
+    cache = TTLCache(max_size=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert "a" in cache
+    cache.set("c", 3)
+    assert "a" not in cache  # Still the oldest: the membership test didn't touch it
+    assert cache.stats()["hits"] == 0 and cache.stats()["misses"] == 0
+
+
+def test_invalidate_one_or_all():
+    cache = TTLCache()
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.invalidate("a")
+    assert "a" not in cache and "b" in cache
+    cache.invalidate("missing")
+    cache.invalidate()
+    assert len(cache) == 0
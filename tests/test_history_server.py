@@ -0,0 +1,65 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# tests/test_history_server.py
+import json
+
+import pytest
+
+pytest.importorskip("mcp.server.fastmcp")
+
+from servers import history_server
+from servers.patient_store import PatientStore
+
+ROSTER = {
+    "PT-1002": {"name": "Jane Smith", "dob": "1979-05-12"},
+    "PT-1004": {"name": "Jake Smith", "dob": "1979-05-12"},
+    "PT-5123": {"name": "Jane Smyth", "dob": "1979-05-12"},
+}
+
+
+@pytest.fixture(autouse=True)
+def store(tmp_path, monkeypatch):
+    path = tmp_path / "roster.json"
+    path.write_text(json.dumps(ROSTER))
+    store = PatientStore(str(path))
+    monkeypatch.setattr(history_server, "store", store)
+    yield store
+    store.close()
+
+
+def find(name, dob, patient_id=""):
+    return json.loads(history_server.find_patient(name, dob, patient_id))
+
+
+def test_find_patient_near_name_needs_a_near_id():
+    assert find("Jane Smyth", "05/12/1979", "PT-5132")["patient_id"] == "PT-5123"
+    # Same DOB, a name within two edits, but the typed ID is nowhere near this chart
+    assert "error" in find("Jane Smyth", "05/12/1979", "PT-9876")
+
+
+def test_find_patient_without_id_needs_exact_name():
+    assert find("smith, jane", "1979-05-12")["patient_id"] == "PT-1002"
+    assert "error" in find("Jane Smitt", "1979-05-12")
+
+
+def test_find_patient_ambiguous_namesakes():
+    # Both Jane Smith (PT-1002) and Jake Smith (PT-1004) are within reach of the name and the ID
+    assert "2 patients match" in find("Jane Smith", "1979-05-12", "PT-1003")["error"]
+
+
+def test_history_lookups_normalize_ids():
+    assert json.loads(history_server.get_patient_history("pt 1002"))["name"] == "Jane Smith"
+    assert "1 similar ID(s)" in history_server.get_patient_history("PT-5124")
+    batch = json.loads(history_server.get_patient_histories(["pt-1002", "PT-7777"], fields=["name"]))
+    assert batch == {"patients": {"pt-1002": {"name": "Jane Smith"}}, "not_found": ["PT-7777"]}
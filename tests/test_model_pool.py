@@ -0,0 +1,134 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# tests/test_model_pool.py
+import asyncio
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from google.adk.models.base_llm import BaseLlm
+from google.adk.models.llm_request import LlmRequest
+from google.adk.models.llm_response import LlmResponse
+from google.genai import types
+
+from src.model_pool import ModelPool
+
+
+class StubLlm(BaseLlm):
+    """Answers with its own name after delay seconds, or raises if fail is set."""
+
+    delay: float = 0.0
+    fail: bool = False
+    calls: int = 0
+
+    async def generate_content_async(self, llm_request, stream=False):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError(f"{self.model} unavailable")
+        yield LlmResponse(content=types.Content(role="model", parts=[types.Part(text=self.model)]))
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def run(pool):
+    async def collect():
+        request = LlmRequest(model=pool.model, contents=[types.Content(role="user", parts=[types.Part(text="hi")])])
+        return [response.content.parts[0].text async for response in pool.generate_content_async(request)]
+    return asyncio.run(collect())
+
+
+def make_pool(*backends, **settings):
+    return ModelPool(model=backends[0].model, backends=list(backends), **settings)
+
+
+def test_fails_over_to_next_backend():
+    primary, fallback = StubLlm(model="primary", fail=True), StubLlm(model="fallback")
+    pool = make_pool(primary, fallback)
+    assert run(pool) == ["fallback"]
+    assert pool.stats()["failovers"] == 1
+    assert pool.stats()["backends"][0]["error_rate"] == 1.0
+
+
+def test_all_backends_failing_raises():
+    pool = make_pool(StubLlm(model="a", fail=True), StubLlm(model="b", fail=True))
+    with pytest.raises(RuntimeError, match="b unavailable"):
+        run(pool)
+
+
+def test_error_rate_trips_backend_until_cooldown_ends():
+    clock = FakeClock()
+    primary, fallback = StubLlm(model="primary", fail=True), StubLlm(model="fallback")
+    pool = make_pool(primary, fallback, min_samples=2, error_rate_threshold=0.5, cooldown_seconds=60, clock=clock)
+    run(pool)
+    run(pool)
+    assert pool.order() == [1, 0]
+    assert pool.stats()["backends"][0]["trips"] == 1
+
+    # Tripped: requests go straight to the fallback
+    run(pool)
+    assert primary.calls == 2
+
+    clock.now += 61
+    assert pool.order() == [0, 1]
+    primary.fail = False
+    assert run(pool) == ["primary"]
+
+
+def test_slow_backend_trips_on_p95():
+    clock = FakeClock()
+    pool = make_pool(StubLlm(model="a"), StubLlm(model="b"), min_samples=3, p95_threshold_ms=500, clock=clock)
+    for _ in range(3):
+        pool.record(0, 0.9, ok=True)
+    assert pool.order() == [1, 0]
+    # The window is cleared on a trip, so the backend is judged afresh afterwards
+    assert pool.stats()["backends"][0]["samples"] == 0
+
+
+def test_hedge_wins_when_primary_is_slow():
+    primary, fallback = StubLlm(model="primary", delay=0.5), StubLlm(model="fallback")
+    pool = make_pool(primary, fallback, hedge_after_ms=20)
+    assert run(pool) == ["fallback"]
+    assert pool.stats()["hedges"] == 1
+    assert pool.stats()["hedge_wins"] == 1
+
+
+def test_no_hedge_when_primary_answers_in_time():
+    primary, fallback = StubLlm(model="primary"), StubLlm(model="fallback")
+    pool = make_pool(primary, fallback, hedge_after_ms=200)
+    assert run(pool) == ["primary"]
+    assert fallback.calls == 0
+
+
+def test_hedge_fails_over_at_once_when_primary_errors():
+    primary, fallback = StubLlm(model="primary", fail=True), StubLlm(model="fallback")
+    pool = make_pool(primary, fallback, hedge_after_ms=5000)
+    assert run(pool) == ["fallback"]
+
+
+def test_only_last_backend_retries(monkeypatch):
+    from src import config
+    monkeypatch.setitem(config.AGENT_MODELS, "TestAgent", "stub-a,stub-b,stub-c")
+    monkeypatch.setattr(config, "MODEL_POOLS", {})
+    pool = config.get_model("TestAgent")
+    assert [backend.attempts for backend in pool.backends] == [1, 1, config.MODEL_RETRY_ATTEMPTS]
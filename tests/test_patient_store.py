@@ -0,0 +1,128 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# tests/test_patient_store.py
+import json
+import os
+
+import pytest
+
+from servers.patient_store import PatientStore, edit_distance, id_key, name_key, normalize_dob
+
+ROSTER = {
+    "PT-1001": {"name": "John Doe", "dob": "1980-01-15"},
+    "PT-1002": {"name": "Jane Smith", "dob": "1979-05-12"},
+    "PT-1004": {"name": "Jake Smith", "dob": "1979-05-12"},
+    "PT-2002": {"name": "Jane Smyth", "dob": "1979-05-12"},
+}
+
+
+def write_json(path, payload):
+    with open(path, "w") as f:
+        json.dump(payload, f)
+    # Distinct mtimes even on coarse filesystem clocks
+    stamp = os.stat(path).st_mtime_ns + 1_000_000_000
+    os.utime(path, ns=(stamp, stamp))
+
+
+@pytest.fixture
+def roster_path(tmp_path):
+    path = str(tmp_path / "roster.json")
+    write_json(path, ROSTER)
+    return path
+
+
+@pytest.fixture
+def store(roster_path):
+    store = PatientStore(roster_path, check_interval=0)
+    yield store
+    store.close()
+
+
+def test_helpers_normalize():
+    assert id_key("pt 1004") == id_key("Pt_1004") == "PT1004"
+    assert name_key("SMITH,  jane") == "jane smith"
+    assert normalize_dob("05/12/1979") == normalize_dob("May 12, 1979") == "1979-05-12"
+    assert normalize_dob("19790512") is None
+    assert edit_distance("PT1002", "PT1020", 2) == 1  # Transposition
+    assert edit_distance("PT1002", "PT9999", 2) == 3  # Capped at limit + 1
+
+
+def test_resolve_any_case_or_format(store):
+    assert store.resolve("PT-1002")[0] == "PT-1002"
+    assert store.resolve("pt_1002") == ("PT-1002", ROSTER["PT-1002"])
+    assert store.resolve("PT-9999") is None
+
+
+def test_get_many_normalizes_and_keys_by_request(store):
+    found = store.get_many(["pt-1002", "PT-1001", "PT-9999", "PT-1001"])
+    assert found == {"pt-1002": ROSTER["PT-1002"], "PT-1001": ROSTER["PT-1001"]}
+
+
+def test_suggest_ranks_by_distance(store):
+    assert store.suggest("PT-1003") == ["PT-1001", "PT-1002", "PT-1004"]
+    assert store.suggest("PT-1003", limit=1) == ["PT-1001"]
+    assert store.suggest("PT-2001", max_distance=2) == ["PT-1001", "PT-2002", "PT-1002", "PT-1004"]
+    assert store.suggest("PT-7777") == []
+
+
+def test_find_by_name_dob_tolerates_typos_and_order(store):
+    matches = store.find_by_name_dob("smith jane", "May 12, 1979")
+    assert [pid for pid, _ in matches] == ["PT-1002", "PT-1004", "PT-2002"]
+    assert [pid for pid, _ in store.find_by_name_dob("Jane Smith", "1979-05-12", max_distance=0)] == ["PT-1002"]
+    assert store.find_by_name_dob("Jane Smith", "not a date") == []
+
+
+def test_reload_happens_in_the_background(store, roster_path):
+    updated = {**ROSTER, "PT-1005": {"name": "New Patient", "dob": "2000-02-02"}}
+    del updated["PT-1001"]
+    write_json(roster_path, updated)
+
+    # The lookup that notices the change is served from the current index
+    assert store.get("PT-1001") == ROSTER["PT-1001"]
+    store.wait_for_sync(timeout=10)
+    assert store.last_sync_error is None
+    assert store.get("PT-1001") is None
+    assert store.get("PT-1005") == updated["PT-1005"]
+
+
+def test_failed_reload_keeps_serving_the_old_index(store, roster_path):
+    with open(roster_path, "w") as f:
+        f.write("{ not json")
+    stamp = os.stat(roster_path).st_mtime_ns + 2_000_000_000
+    os.utime(roster_path, ns=(stamp, stamp))
+    store.get("PT-1002")
+    store.wait_for_sync(timeout=10)
+    assert store.last_sync_error is not None
+    assert store.get("PT-1002") == ROSTER["PT-1002"]
+
+
+def test_index_is_reused_across_stores(roster_path):
+    first = PatientStore(roster_path)
+    first.close()
+    second = PatientStore(roster_path)
+    # Already current: nothing is rewritten
+    assert second.refresh(force=True) is False
+    assert second.get("PT-1004") == ROSTER["PT-1004"]
+    second.close()
+
+
+def test_shard_directory(tmp_path):
+    shards = tmp_path / "roster"
+    shards.mkdir()
+    write_json(str(shards / "a.json"), {"PT-1001": ROSTER["PT-1001"]})
+    write_json(str(shards / "b.json"), {"PT-1002": ROSTER["PT-1002"]})
+    store = PatientStore(str(shards), check_interval=0)
+    assert store.index_path == str(tmp_path / "roster.index.sqlite")
+    assert sorted(store.get_many(["PT-1001", "PT-1002"])) == ["PT-1001", "PT-1002"]
+    store.close()
@@ -0,0 +1,53 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# tests/test_plugins.py
+from types import SimpleNamespace
+
+import pytest
+
+from src.metrics import MetricsRegistry
+from src.plugins import FileLoggingPlugin
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    tracer = FileLoggingPlugin(log_dir=str(tmp_path), metrics=MetricsRegistry())
+    yield tracer
+    tracer.close()
+
+
+def context(session_id, invocation_id="inv-1", agent="IntakeCoordinator"):
+    invocation = SimpleNamespace(session=SimpleNamespace(id=session_id))
+    return SimpleNamespace(invocation_id=invocation_id, agent_name=agent, _invocation_context=invocation)
+
+
+def request(text="hi"):
+    return SimpleNamespace(contents=[SimpleNamespace(parts=[SimpleNamespace(text=text)])])
+
+
+def test_final_response_records_model_latency(tracer):
+    tracer.before_model_callback(context("s1"), request())
+    tracer.after_model_callback(context("s1"), SimpleNamespace(partial=True))
+    assert len(tracer._model_started) == 1  # Partial chunks don't end the call
+    tracer.after_model_callback(context("s1"), SimpleNamespace(partial=False))
+    assert tracer._model_started == {}
+    assert "model_call" in tracer.metrics.snapshot()
+
+
+def test_failed_calls_are_forgotten_when_the_turn_ends(tracer):
+    tracer.before_model_callback(context("s1"), request())
+    tracer.before_model_callback(context("s1", "inv-2", "SymptomSpecialist"), request())
+    tracer.before_model_callback(context("s2"), request())
+    tracer.end_turn("s1")
+    assert list(tracer._model_started) == [("s2", "inv-1", "IntakeCoordinator")]
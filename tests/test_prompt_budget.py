@@ -0,0 +1,93 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# tests/test_prompt_budget.py
+import pytest
+
+pytest.importorskip("google.adk")
+
+from google.adk.models.llm_request import LlmRequest
+from google.genai import types
+
+from src.prompt_budget import PromptBudget, measure, total_tokens
+
+
+def text(role, value):
+    return types.Content(role=role, parts=[types.Part(text=value)])
+
+
+def tool_call(name="fetch_history_tool"):
+    return types.Content(role="model", parts=[types.Part(
+        function_call=types.FunctionCall(name=name, args={"patient_id": "PT-1001"}))])
+
+
+def tool_response(payload, name="fetch_history_tool"):
+    return types.Content(role="user", parts=[types.Part(
+        function_response=types.FunctionResponse(name=name, response={"result": payload}))])
+
+
+def request(*contents):
+    return LlmRequest(model="stub-scripted", contents=list(contents),
+                      config=types.GenerateContentConfig(system_instruction="You are the intake coordinator."))
+
+
+def is_call(content):
+    return any(part.function_call for part in content.parts)
+
+
+def is_response(content):
+    return any(part.function_response for part in content.parts)
+
+
+def test_measure_splits_sections():
+    sizes = measure(request(text("user", "hello"), tool_call(), tool_response("x" * 400)))
+    assert sizes["system_prompt"]["chars"] == len("You are the intake coordinator.")
+    assert sizes["tool_output"]["chars"] > 400
+    assert sizes["history"]["chars"] > len("hello")
+
+
+def test_drops_tool_call_and_response_together():
+    llm_request = request(tool_call(), tool_response("x" * 4000), text("model", "Thanks, I see your file."),
+                          text("user", "I have a headache"))
+    PromptBudget(tracer=None).enforce(llm_request, budget=200)
+    contents = llm_request.contents
+    assert "2 earlier message(s) omitted" in contents[0].parts[0].text
+    assert not any(is_call(content) or is_response(content) for content in contents)
+    assert contents[-1].parts[0].text == "I have a headache"
+
+
+def test_keeps_the_input_and_tool_pair_of_the_current_turn():
+    llm_request = request(text("user", "old " * 400), text("model", "earlier reply"),
+                          text("user", "My ID is PT-1001 " + "and more " * 200), tool_call(), tool_response("record"))
+    PromptBudget(tracer=None).enforce(llm_request, budget=100)
+    contents = llm_request.contents
+    assert "2 earlier message(s) omitted" in contents[0].parts[0].text
+    # The input survives (trimmed in the middle), followed by its call and response
+    assert contents[1].role == "user" and contents[1].parts[0].text.startswith("My ID is PT-1001")
+    assert is_call(contents[-2]) and is_response(contents[-1])
+
+
+def test_trims_an_oversized_input_in_the_middle():
+    current = "A" * 2000 + "B" * 2000
+    llm_request = request(text("user", current))
+    PromptBudget(tracer=None).enforce(llm_request, budget=300)
+    trimmed = llm_request.contents[-1].parts[0].text
+    assert trimmed.startswith("A") and trimmed.endswith("B")
+    assert "characters omitted to fit the prompt budget" in trimmed
+    assert total_tokens(measure(llm_request)) <= 300
+
+
+def test_under_budget_is_untouched():
+    llm_request = request(text("user", "hi"), text("model", "hello"), text("user", "chest pain"))
+    PromptBudget(tracer=None).enforce(llm_request, budget=1000)
+    assert [content.parts[0].text for content in llm_request.contents] == ["hi", "hello", "chest pain"]
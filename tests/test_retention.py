@@ -0,0 +1,96 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# tests/test_retention.py
+import asyncio
+import logging
+import time
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+from src.retention import COMPACTED_KEY, SessionRetention
+from src.transcript import transcript_path
+
+
+class FakeTracer:
+    logger = logging.getLogger("test_retention")
+
+    @contextmanager
+    def span(self, name, **labels):
+        yield
+
+    def on_error(self, error):
+        raise error
+
+
+def event(author, text, timestamp=0.0):
+    return SimpleNamespace(author=author, timestamp=timestamp,
+                           content=SimpleNamespace(parts=[SimpleNamespace(text=text)]))
+
+
+class FakeSessionService:
+    def __init__(self, session):
+        self.sessions = {session.id: session}
+
+    async def get_session(self, app_name, user_id, session_id):
+        return self.sessions.get(session_id)
+
+    async def delete_session(self, app_name, user_id, session_id):
+        self.sessions.pop(session_id, None)
+
+    async def create_session(self, app_name, user_id, session_id, state):
+        self.sessions[session_id] = SimpleNamespace(id=session_id, state=state, events=[],
+                                                    last_update_time=time.time())
+
+
+def completed_session(session_id, idle_seconds):
+    events = [event("user", "PT-1001"), event("IntakeCoordinator", "Thank you, Jane."),
+              event("ClinicalScribe", "**SUBJECTIVE:** headache")]
+    return SimpleNamespace(id=session_id, events=events, last_update_time=time.time() - idle_seconds,
+                           model_dump_json=lambda: '{"id": "%s"}' % session_id)
+
+
+def retire(tmp_path, session, compacted=False):
+    transcripts = tmp_path / "transcripts"
+    transcripts.mkdir()
+    path = transcript_path(str(transcripts), session.id)
+    with open(path, "w") as f:
+        f.write('{"role": "patient", "text": "PT-1001"}\n')
+    service = FakeSessionService(session)
+    retention = SessionRetention(service, "sqlite:///unused.db", "app", FakeTracer(), ttl_seconds=7200,
+                                 compact_after=60, archive_dir=str(tmp_path / "archive"),
+                                 transcript_dir=str(transcripts))
+    action = asyncio.run(retention._retire("user", session.id, compacted, time.time()))
+    return action, service, path
+
+
+def test_compaction_removes_the_transcript(tmp_path):
+    action, service, path = retire(tmp_path, completed_session("s1", idle_seconds=120))
+    assert action == "compacted"
+    assert service.sessions["s1"].state[COMPACTED_KEY]
+    assert service.sessions["s1"].state["patient_id"] == "PT-1001"
+    assert not (tmp_path / "transcripts" / "s1.jsonl").exists()
+    assert list((tmp_path / "archive").iterdir())
+
+
+def test_archiving_removes_the_transcript(tmp_path):
+    action, service, path = retire(tmp_path, completed_session("s2", idle_seconds=10000), compacted=True)
+    assert action == "archived"
+    assert "s2" not in service.sessions
+    assert not (tmp_path / "transcripts" / "s2.jsonl").exists()
+
+
+def test_live_session_keeps_its_transcript(tmp_path):
+    action, _, path = retire(tmp_path, completed_session("s3", idle_seconds=5))
+    assert action is None
+    assert (tmp_path / "transcripts" / "s3.jsonl").exists()
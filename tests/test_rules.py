@@ -0,0 +1,130 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# tests/test_rules.py
+import asyncio
+import json
+
+import pytest
+
+from src.rules import (BAD_FORMAT_REPLY, EMERGENCY_REPLY, IntakeRules, SIMILAR_ID_REPLY, is_emergency,
+                       parse_patient_id)
+
+
+@pytest.mark.parametrize("text", [
+    "I have chest pain",
+    "chest pains since this morning",
+    "I can't breathe",
+    "not sure. chest pain",
+    "I don't know, I can't breathe",
+    "no fever but chest pain",
+    "I never smoke and I have trouble breathing",
+    "my arm is bleeding heavily",
+])
+def test_emergency(text):
+    assert is_emergency(text)
+
+
+@pytest.mark.parametrize("text", [
+    "no chest pain",
+    "I don't have trouble breathing",
+    "I do not have any chest pain",
+    "denies shortness of breath",
+    "just a headache",
+])
+def test_not_emergency(text):
+    assert not is_emergency(text)
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("PT-1004", "PT-1004"),
+    ("pt 1004", "PT-1004"),
+    ("Pt_1004.", "PT-1004"),
+    ("my patient id is pt-1004", "PT-1004"),
+    ("it's PT-10001", "PT-10001"),
+    ("PT-10001000", "PT-10001000"),
+])
+def test_parse_patient_id(text, expected):
+    assert parse_patient_id(text) == (expected, True)
+
+
+@pytest.mark.parametrize("text", ["yes 2", "19790512", "05/12/1979", "I am 45", "PX-12"])
+def test_not_an_id(text):
+    assert parse_patient_id(text) is None
+
+
+def test_introduced_id_in_wrong_format():
+    assert parse_patient_id("my id is PX-12") == (None, False)
+    assert parse_patient_id("my patient id is 1004") == (None, False)
+
+
+class FakeHistoryClient:
+    def __init__(self, payloads=None, error=None):
+        self.payloads = payloads or {}
+        self.error = error
+        self.calls = []
+
+    async def fetch(self, patient_id):
+        self.calls.append(patient_id)
+        if self.error is not None:
+            raise self.error
+        return self.payloads.get(patient_id, f"Error: Patient ID '{patient_id}' not found.")
+
+
+class FakeTracer:
+    def __init__(self):
+        self.errors = []
+
+    def on_error(self, error):
+        self.errors.append(error)
+
+
+def evaluate(rules, text):
+    return asyncio.run(rules.evaluate(text))
+
+
+def test_verified_id():
+    client = FakeHistoryClient({"PT-10001": json.dumps({"name": "Jane Doe"})})
+    result = evaluate(IntakeRules(client), "pt 10001")
+    assert result.rule == "id_verified"
+    assert result.patient_id == "PT-10001"
+    assert "Jane Doe" in result.reply
+    # Recorded as the tool call the model would have made, so later agents see the chart
+    assert result.tool_call == ("fetch_history_tool", {"patient_id": "PT-10001"}, json.dumps({"name": "Jane Doe"}))
+
+
+def test_unknown_and_similar_ids():
+    client = FakeHistoryClient({"PT-1005": "Error: Patient ID 'PT-1005' not found. 2 similar ID(s) on file: "
+                                           "ask for the patient's full name and date of birth and call find_patient."})
+    assert evaluate(IntakeRules(client), "PT-9999").rule == "id_not_found"
+    result = evaluate(IntakeRules(client), "PT-1005")
+    assert result.rule == "id_similar"
+    assert result.reply == SIMILAR_ID_REPLY.format(patient_id="PT-1005")
+
+
+def test_emergency_and_bad_format_need_no_lookup():
+    client = FakeHistoryClient()
+    assert evaluate(IntakeRules(client), "I can't breathe").reply == EMERGENCY_REPLY
+    assert evaluate(IntakeRules(client), "my id is PX-12").reply == BAD_FORMAT_REPLY
+    assert evaluate(IntakeRules(client), "my id is PX-12").tool_call is None
+    assert evaluate(IntakeRules(client), "yes 2") is None
+    assert client.calls == []
+
+
+def test_lookup_failure_falls_through_to_model():
+    tracer = FakeTracer()
+    client = FakeHistoryClient(error=asyncio.TimeoutError())
+    assert evaluate(IntakeRules(client, tracer), "PT-1004") is None
+    assert len(tracer.errors) == 1
@@ -0,0 +1,81 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+
+# tests/test_session_store.py
+import asyncio
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from google.adk.events import Event, EventActions
+from google.genai import types
+from sqlalchemy import event as sa_event
+
+from src.metrics import MetricsRegistry
+from src.session_store import InstrumentedSessionService
+
+APP_NAME = "mediscreen_test"
+
+
+def make_event(text, state_delta=None):
+    return Event(invocation_id="e-1", author="user", actions=EventActions(state_delta=state_delta or {}),
+                 content=types.Content(role="user", parts=[types.Part(text=text)]))
+
+
+def make_service(tmp_path):
+    return InstrumentedSessionService(db_url=f"sqlite:///{tmp_path / 'sessions.db'}", metrics=MetricsRegistry(),
+                                      write_behind=True)
+
+
+def test_turn_is_written_in_one_transaction(tmp_path):
+    service = make_service(tmp_path)
+    commits = []
+    sa_event.listen(service.db_engine, "commit", lambda conn: commits.append(conn))
+
+    async def scenario():
+        session = await service.create_session(app_name=APP_NAME, user_id="u", session_id="s")
+        commits.clear()
+        for i in range(3):
+            await service.append_event(session, make_event(f"event {i}", {"step": i, "user:seen": True}))
+        service.end_turn("s")
+        return await service.get_session(app_name=APP_NAME, user_id="u", session_id="s")
+
+    loaded = asyncio.run(scenario())
+    assert len(commits) == 1
+    assert [event.content.parts[0].text for event in loaded.events] == ["event 0", "event 1", "event 2"]
+    assert loaded.state["step"] == 2
+    assert loaded.state["user:seen"] is True
+
+
+def test_failed_batch_is_kept_for_retry(tmp_path, monkeypatch):
+    service = make_service(tmp_path)
+
+    async def scenario():
+        session = await service.create_session(app_name=APP_NAME, user_id="u", session_id="s")
+        await service.append_event(session, make_event("kept"))
+        real_write = service._write_turn
+
+        def failing(*args):
+            raise RuntimeError("disk full")
+        monkeypatch.setattr(service, "_write_turn", failing)
+        with pytest.raises(RuntimeError, match="disk full"):
+            await service.flush("s")
+
+        monkeypatch.setattr(service, "_write_turn", real_write)
+        return await service.get_session(app_name=APP_NAME, user_id="u", session_id="s")
+
+    loaded = asyncio.run(scenario())
+    assert [event.content.parts[0].text for event in loaded.events] == ["kept"]
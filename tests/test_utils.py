@@ -0,0 +1,49 @@
+# Copyright 2025 MediScreen AI Contributors
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# tests/test_utils.py
+import asyncio
+
+import pytest
+
+pytest.importorskip("google.adk")
+
+from google.adk.sessions import InMemorySessionService
+
+from src.utils import record_turn
+
+
+def recorded_events(**kwargs):
+    async def scenario():
+        service = InMemorySessionService()
+        await service.create_session(app_name="app", user_id="u", session_id="s")
+        await record_turn(service, "app", "u", "s", "IntakeCoordinator", "PT-1001", "Thank you, Jane.", **kwargs)
+        return (await service.get_session(app_name="app", user_id="u", session_id="s")).events
+    return asyncio.run(scenario())
+
+
+def test_plain_turn_is_input_then_reply():
+    events = recorded_events()
+    assert [(event.author, event.content.parts[0].text) for event in events] == [
+        ("user", "PT-1001"), ("IntakeCoordinator", "Thank you, Jane.")]
+
+
+def test_tool_call_pair_precedes_reply():
+    events = recorded_events(tool_call=("fetch_history_tool", {"patient_id": "PT-1001"}, '{"name":"Jane"}'))
+    call, response = events[1].content.parts[0].function_call, events[2].content.parts[0].function_response
+    assert call.name == response.name == "fetch_history_tool"
+    assert call.id == response.id and call.args == {"patient_id": "PT-1001"}
+    assert response.response == {"result": '{"name":"Jane"}'}
+    assert events[2].content.role == "user"
+    assert events[3].content.parts[0].text == "Thank you, Jane."
+    assert len({event.invocation_id for event in events}) == 1